@@ -7,11 +7,24 @@ from typing import Optional
 from datetime import datetime, timezone, timedelta
 import time
 
-from .aws_client import AWSClient
+from .aws_client import AWSClient, SQS_MAX_BATCH_SIZE
 from .config import config, EMAIL_CONTINUOUS_SLEEP_SECS
 from .models import WorkOrder, Step, StepStatus
 from .step_processor import StepProcessor
 
+
+def _coerce(val):
+    """Unwrap a DynamoDB-typed scalar ({'S': ...}, {'BOOL': ...}, {'NULL': True}); plain values pass through."""
+    if isinstance(val, dict):
+        if 'S' in val:
+            return val['S']
+        if 'BOOL' in val:
+            return val['BOOL']
+        if 'NULL' in val:
+            return None
+    return val
+
+
 class EmailAgent:
     def __init__(self, poll_interval: int = 2, stop_check_interval: int = 1, logging_config=None):
         self.aws_client = AWSClient(logging_config=logging_config)
@@ -318,94 +331,104 @@ class EmailAgent:
                 messages = self.aws_client.receive_sqs_messages()
                 if len(messages) > 0:
                     self.log('progress', f"[SQS-POLL] Processing {len(messages)} message(s)...")
-                for message in messages:
-                    try:
-                        # Process the message
-                        body = json.loads(message['Body'])
-                        
-                        # Validate message format
-                        if not all(key in body for key in ['workOrderId', 'stepName', 'action']):
-                            self.log('error', f"[SQS-RECEIVE] ERROR: Invalid message format. Expected workOrderId, stepName, action. Got: {list(body.keys())}")
-                            # Delete invalid message
-                            try:
-                                self.aws_client.delete_sqs_message(message['ReceiptHandle'])
-                                self.log('progress', f"[SQS-DELETE] Successfully deleted invalid format message")
-                            except Exception as e:
-                                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete invalid format message: {e}")
-                            continue
-                        
-                        work_order_id = body['workOrderId']
-                        step_name = body['stepName']
-                        action = body['action']
-                        
-                        # Validate action
-                        if action not in ['start', 'stop']:
-                            self.log('error', f"[SQS-RECEIVE] ERROR: Invalid action '{action}'. Expected 'start' or 'stop'")
-                            # Delete invalid message
-                            try:
-                                self.aws_client.delete_sqs_message(message['ReceiptHandle'])
-                                self.log('progress', f"[SQS-DELETE] Successfully deleted invalid action message")
-                            except Exception as e:
-                                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete invalid action message: {e}")
-                            continue
-
-                        # Get the work order
-                        work_order = self.aws_client.get_work_order(work_order_id)
-                        
-                        if not work_order:
-                            self.log('error', f"[SQS-RECEIVE] ERROR: Work order not found: {work_order_id}")
-                            # Delete message for non-existent work order
-                            try:
-                                self.aws_client.delete_sqs_message(message['ReceiptHandle'])
-                                self.log('progress', f"[SQS-DELETE] Successfully deleted message for non-existent work order {work_order_id}")
-                            except Exception as e:
-                                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete message for non-existent work order {work_order_id}: {e}")
-                            continue
-
-                        # Handle stop requests
-                        if action == 'stop':
-                            await self._handle_stop_request(work_order_id, work_order, step_name)
-                            # Always delete stop messages after processing
-                            try:
-                                self.aws_client.delete_sqs_message(message['ReceiptHandle'])
-                                self.log('progress', f"[SQS-DELETE] Successfully deleted stop message for work order {work_order_id}")
-                            except Exception as e:
-                                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete stop message for work order {work_order_id}: {e}")
-                                # Continue even if deletion fails - the message will eventually expire
-                            continue
-
-                        # Handle start requests
-                        if action == 'start':
-                            # Invalidate all caches when SQS start message is received
-                            self.aws_client.invalidate_cache_on_sqs_start()
-                            
-                            # Delete start message immediately after validation but before processing
-                            # This prevents receipt handle expiration during long-running email operations
-                            try:
-                                self.aws_client.delete_sqs_message(message['ReceiptHandle'])
-                                self.log('progress', f"[SQS-DELETE] Successfully deleted start message for work order {work_order_id}")
-                            except Exception as e:
-                                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete start message for work order {work_order_id}: {e}")
-                                # Continue processing even if deletion fails - the message will eventually expire
-                            
-                            # Now process the start request
-                            success = await self._handle_start_request(work_order_id, work_order, step_name)
-                            continue
-
-                    except Exception as e:
-                        self.log('error', f"[SQS-RECEIVE] ERROR: Error processing message: {e}")
-                        import traceback
-                        self.log('error', f"[SQS-RECEIVE] ERROR: Full traceback: {traceback.format_exc()}")
-                        self.log('warning', f"[SQS-RECEIVE] Message will remain in queue for retry")
-                        # Don't delete message on unexpected errors
-
-                # Wait before next poll
-                await asyncio.sleep(self.poll_interval)
+                await self._process_sqs_messages(messages)
+
+                # Wait before next poll; a full batch means more may be waiting, so drain it right away
+                if len(messages) < SQS_MAX_BATCH_SIZE:
+                    await asyncio.sleep(self.poll_interval)
 
             except Exception as e:
                 self.log('error', f"Error in main loop: {e}")
                 await asyncio.sleep(self.poll_interval)
 
+    async def _process_sqs_messages(self, messages):
+        """Handle one batch of received SQS messages (start/stop requests for work orders)."""
+        # Receipt handles of handled messages, deleted in one batch after the loop
+        handled_receipts = []
+        released = False
+        for index, message in enumerate(messages):
+            try:
+                # Process the message
+                body = json.loads(message['Body'])
+                
+                # Validate message format
+                if not all(key in body for key in ['workOrderId', 'stepName', 'action']):
+                    self.log('error', f"[SQS-RECEIVE] ERROR: Invalid message format. Expected workOrderId, stepName, action. Got: {list(body.keys())}")
+                    # Delete invalid message
+                    handled_receipts.append(message['ReceiptHandle'])
+                    continue
+                
+                work_order_id = body['workOrderId']
+                step_name = body['stepName']
+                action = body['action']
+                
+                # Validate action
+                if action not in ['start', 'stop']:
+                    self.log('error', f"[SQS-RECEIVE] ERROR: Invalid action '{action}'. Expected 'start' or 'stop'")
+                    # Delete invalid message
+                    handled_receipts.append(message['ReceiptHandle'])
+                    continue
+
+                # Get the work order
+                work_order = self.aws_client.get_work_order(work_order_id)
+                
+                if not work_order:
+                    self.log('error', f"[SQS-RECEIVE] ERROR: Work order not found: {work_order_id}")
+                    # Delete message for non-existent work order
+                    handled_receipts.append(message['ReceiptHandle'])
+                    continue
+
+                # Handle stop requests
+                if action == 'stop':
+                    await self._handle_stop_request(work_order_id, work_order, step_name)
+                    # Always delete stop messages after processing
+                    handled_receipts.append(message['ReceiptHandle'])
+                    continue
+
+                # Handle start requests
+                if action == 'start':
+                    # Invalidate all caches when SQS start message is received
+                    self.aws_client.invalidate_cache_on_sqs_start()
+                    
+                    # Delete start message immediately after validation but before processing
+                    # This prevents receipt handle expiration during long-running email operations
+                    # (messages already handled in this batch are deleted along with it)
+                    handled_receipts.append(message['ReceiptHandle'])
+                    if self.aws_client.delete_sqs_messages(handled_receipts):
+                        self.log('progress', f"[SQS-DELETE] Successfully deleted start message for work order {work_order_id}")
+                    else:
+                        self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete start message for work order {work_order_id}")
+                        # Continue processing even if deletion fails - the message will eventually expire
+                    handled_receipts = []
+                    
+                    # Hand the rest of the batch back to the queue before the (possibly
+                    # hours-long) start runs: a stop for this work order must stay visible
+                    # to check_for_stop_messages, and other starts to other agents
+                    pending_receipts = [m['ReceiptHandle'] for m in messages[index + 1:]]
+                    if pending_receipts:
+                        self.aws_client.release_sqs_messages(pending_receipts)
+                    released = True
+                    await self._handle_start_request(work_order_id, work_order, step_name)
+                    # The released messages are received again on a later poll
+                    break
+
+            except Exception as e:
+                self.log('error', f"[SQS-RECEIVE] ERROR: Error processing message: {e}")
+                import traceback
+                self.log('error', f"[SQS-RECEIVE] ERROR: Full traceback: {traceback.format_exc()}")
+                self.log('warning', f"[SQS-RECEIVE] Message will remain in queue for retry")
+                # Don't delete message on unexpected errors
+                if released:
+                    # The rest of the batch was already handed back to the queue
+                    break
+
+        if handled_receipts:
+            # Continue even if deletion fails - the messages will eventually expire
+            if self.aws_client.delete_sqs_messages(handled_receipts):
+                self.log('progress', f"[SQS-DELETE] Successfully deleted {len(handled_receipts)} handled message(s)")
+            else:
+                self.log('warning', f"[SQS-DELETE] WARNING: Failed to delete some of {len(handled_receipts)} handled message(s)")
+
     async def stop(self):
         """Stop the email agent."""
         self.is_running = False
@@ -420,21 +443,13 @@ class EmailAgent:
         return val
 
     def step_to_plain_dict(self, step):
-        def extract_s(val):
-            if isinstance(val, dict) and 'S' in val:
-                return val['S']
-            if isinstance(val, dict) and 'BOOL' in val:
-                return val['BOOL']
-            if isinstance(val, dict) and 'NULL' in val:
-                return None
-            return val
         return {
-            'name': extract_s(step.name),
-            'status': extract_s(step.status.value if isinstance(step.status, StepStatus) else step.status),
-            'message': extract_s(step.message),
-            'isActive': extract_s(step.isActive),
-            'startTime': extract_s(step.startTime),
-            'endTime': extract_s(step.endTime)
+            'name': _coerce(step.name),
+            'status': _coerce(step.status.value if isinstance(step.status, StepStatus) else step.status),
+            'message': _coerce(step.message),
+            'isActive': _coerce(step.isActive),
+            'startTime': _coerce(step.startTime),
+            'endTime': _coerce(step.endTime)
         }
 
     async def _handle_stop_request(self, work_order_id: str, work_order: WorkOrder, step_name: str):
@@ -1,15 +1,28 @@
 import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 import os
 import json
 import time
+import functools
+from urllib.parse import urlparse
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # optional: faster WebSocket payload serialization
+    orjson = None
 
 from .config import (
     STUDENT_TABLE, POOLS_TABLE, PROMPTS_TABLE, EVENTS_TABLE, 
     EMAIL_BURST_SIZE, EMAIL_RECOVERY_SLEEP_SECS, DRYRUN_RECIPIENTS_TABLE, SEND_RECIPIENTS_TABLE,
-    OFFERING_TRANSACTIONS_TABLE,
+    OFFERING_TRANSACTIONS_TABLE, WEBSOCKET_MANAGEMENT_URL, SEND_LOG_TABLE, SEND_LOG_START,
     config
 )
 from .models import WorkOrder, WorkOrderUpdate
@@ -73,8 +86,157 @@ EVENTS_TABLE = config.events_table
 # Import table names from config
 STAGES_TABLE = os.getenv('DYNAMODB_TABLE_STAGES', 'stages')
 
+# GSI on the work orders table partitioned by `state`
+WORK_ORDERS_STATE_INDEX = os.getenv('WORK_ORDERS_STATE_INDEX', 'state-index')
+
+# Shared botocore config: keep-alive connections, a pool large enough for concurrent
+# fan-out, adaptive retries and a short connect timeout. The read timeout stays at the
+# botocore default because it must outlast SQS long polls.
+BOTO_CFG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+
+# Low-level (de)serializers for the hot paths that bypass the resource API
+_TS = TypeSerializer()
+_TD = TypeDeserializer()
+
+# Parallel scan configuration
+SCAN_SEGMENTS = int(os.getenv('SCAN_SEGMENTS', '4'))
+SCAN_SEGMENT_MIN_ITEMS = int(os.getenv('SCAN_SEGMENT_MIN_ITEMS', '1000'))
+
+# Worker threads used to post WebSocket updates to connections concurrently
+WEBSOCKET_FANOUT_WORKERS = 32
+
+# Work order locks expire after LOCK_TTL_SECS unless the holding agent refreshes them,
+# so locks left behind by a crashed agent heal on their own
+LOCK_TTL_SECS = int(os.getenv('LOCK_TTL_SECS', '900'))
+
+# Send log items outlive the 24-hour counting window by a day before TTL removes them
+SEND_LOG_RETENTION_SECS = 2 * 24 * 60 * 60
+
+# Worker threads used by unlock_all_work_orders
+UNLOCK_WORKERS = 16
+
+# SQS long-poll ceiling and batch size (the service maximums)
+SQS_MAX_WAIT_TIME_SECS = 20
+SQS_MAX_BATCH_SIZE = 10
+# Default visibility timeout applied by extend_sqs_visibility
+SQS_VISIBILITY_TIMEOUT_SECS = int(os.getenv('SQS_VISIBILITY_TIMEOUT_SECS', '300'))
+
 # Cache configuration
 CACHE_REFRESH_INTERVAL_SECS = int(os.getenv('CACHE_REFRESH_INTERVAL_SECS', '600'))  # 10 minutes default
+SLEEPING_STATE_TTL_SECS = int(os.getenv('SLEEPING_STATE_TTL_SECS', '10'))  # memo for has_sleeping_work_orders
+CONNECTION_IDS_TTL_SECS = int(os.getenv('CONNECTION_IDS_TTL_SECS', '5'))  # memo for WebSocket connection IDs
+ITEM_CACHE_TTL_SECS = int(os.getenv('ITEM_CACHE_TTL_SECS', '300'))  # memo for single-item reads (stages, events)
+ITEM_CACHE_MAX_ENTRIES = 4096
+STUDENT_CACHE_MAX_ENTRIES = 1024  # students are kept apart so they can't evict stages and events
+BATCH_GET_MAX_KEYS = 100  # DynamoDB BatchGetItem limit
+BATCH_GET_MAX_ATTEMPTS = 8  # requests per chunk before unprocessed keys are given up on
+BATCH_GET_BACKOFF_BASE_SECS = 0.05
+BATCH_GET_BACKOFF_MAX_SECS = 2.0
+
+def _parse_mgmt_api_url(websocket_api_url: str, region: str) -> str:
+    """Build the API Gateway Management API endpoint from a WebSocket API URL."""
+    # Remove any protocol prefix (wss:// or https://)
+    url = websocket_api_url.replace('wss://', '').replace('https://', '')
+    
+    # Split into parts
+    parts = url.split('.')
+    if len(parts) < 2:
+        raise ValueError(f"Invalid WebSocket URL format: {websocket_api_url}")
+    
+    # The first part should be the API ID
+    api_id = parts[0]
+    
+    # The last part should be the stage (split by / and take the last part)
+    stage = parts[-1].split('/')[-1]
+    
+    # Construct the Management API endpoint
+    return f"https://{api_id}.execute-api.{region}.amazonaws.com/{stage}"
+
+
+@functools.lru_cache(maxsize=8)
+def _make_apigw_client(websocket_api_url: str, region: str):
+    """
+    Create the API Gateway Management API client for a WebSocket URL.
+    Uses WEBSOCKET_MANAGEMENT_URL verbatim when set; otherwise the endpoint is derived
+    from the WebSocket URL. Cached so every AWSClient in the process shares one client
+    (and its connection pool).
+    """
+    return boto3.client(
+        'apigatewaymanagementapi',
+        endpoint_url=WEBSOCKET_MANAGEMENT_URL or _parse_mgmt_api_url(websocket_api_url, region),
+        region_name=region,
+        config=BOTO_CFG
+    )
+
+# Two-letter language code -> full language name
+_LANGUAGE_MAP = {
+    'EN': 'English',
+    'FR': 'French',
+    'SP': 'Spanish',
+    'DE': 'German',
+    'IT': 'Italian',
+    'PT': 'Portuguese',
+    'RU': 'Russian',
+    'ZH': 'Chinese',
+    'JA': 'Japanese',
+    'KO': 'Korean',
+    'AR': 'Arabic',
+    'HI': 'Hindi',
+    'TH': 'Thai',
+    'VI': 'Vietnamese',
+    'NL': 'Dutch',
+    'SV': 'Swedish',
+    'NO': 'Norwegian',
+    'DA': 'Danish',
+    'FI': 'Finnish',
+    'PL': 'Polish',
+    'CZ': 'Czech',
+    'HU': 'Hungarian',
+    'RO': 'Romanian',
+    'BG': 'Bulgarian',
+    'HR': 'Croatian',
+    'SR': 'Serbian',
+    'SK': 'Slovak',
+    'SL': 'Slovenian',
+    'ET': 'Estonian',
+    'LV': 'Latvian',
+    'LT': 'Lithuanian',
+    'MT': 'Maltese',
+    'EL': 'Greek',
+    'HE': 'Hebrew',
+    'TR': 'Turkish',
+    'UK': 'Ukrainian',
+    'CS': 'Czech'
+}
+
+def _convert_enums(obj):
+    """Recursively convert enums, models and datetimes into JSON-serializable values."""
+    if isinstance(obj, dict):
+        return {k: _convert_enums(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_convert_enums(item) for item in obj]
+    elif hasattr(obj, 'value'):  # Handle Enum types
+        return obj.value
+    elif hasattr(obj, 'dict'):  # Handle objects with dict() method (like Step, WorkOrder)
+        return _convert_enums(obj.dict())
+    elif hasattr(obj, 'to_dict'):  # Handle objects with to_dict() method
+        return _convert_enums(obj.to_dict())
+    elif hasattr(obj, 'isoformat'):  # Handle datetime objects
+        return obj.isoformat()
+    else:
+        return obj
+
+
+def _dumps_payload(message) -> bytes:
+    """Serialize a WebSocket message once to bytes (orjson when installed, else json)."""
+    if orjson is not None:
+        return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(message, default=str).encode('utf-8')
 
 class TableCacheManager:
     """Manages caching for DynamoDB table scans to reduce redundant full table scans."""
@@ -83,6 +245,10 @@ class TableCacheManager:
         self.cache = {}  # table_name -> {'data': [...], 'last_refresh': timestamp}
         self.last_sqs_invalidation = 0
         self.last_sleeping_refresh = time.time()  # Initialize to now to avoid huge interval on first use
+        self._sleeping_state = None  # (has_sleeping_work_orders, checked_at)
+        self._connection_ids = None  # (connection_ids, fetched_at)
+        self._items = {}  # (table_name, key) -> (item, fetched_at)
+        self._student_items = {}  # (STUDENT_TABLE, key) -> (student, fetched_at)
         self.logging_config = logging_config
     
     def log(self, level, message):
@@ -93,9 +259,17 @@ class TableCacheManager:
             # Fallback to always logging if no config provided
             print(message)
     
+    def debug_enabled(self) -> bool:
+        """True if debug messages would be output (always, when no logging config is given)."""
+        return not self.logging_config or self.logging_config.should_log('debug')
+    
     def invalidate_all_caches(self, reason: str):
         """Invalidate all table caches."""
         self.cache.clear()
+        self._sleeping_state = None
+        self._connection_ids = None
+        self._items.clear()
+        self._student_items.clear()
         self.last_sqs_invalidation = time.time()
         self.log('debug', f"[CACHE] Invalidated all caches: {reason}")
     
@@ -114,33 +288,98 @@ class TableCacheManager:
         
         # If no cache exists for this table, always refresh
         if table_name not in self.cache:
-            print(f"[CACHE] No cache exists for {table_name}, will refresh (no cache entry)")
+            self.log('debug', f"[CACHE] No cache exists for {table_name}, will refresh (no cache entry)")
             return True
         
         # If there are sleeping work orders, refresh every CACHE_REFRESH_INTERVAL_SECS
         if has_sleeping_work_orders:
             time_since_refresh = current_time - self.last_sleeping_refresh
             if time_since_refresh >= CACHE_REFRESH_INTERVAL_SECS:
-                print(f"[CACHE] Sleeping work orders detected, cache refresh interval reached ({time_since_refresh:.1f}s >= {CACHE_REFRESH_INTERVAL_SECS}s) for {table_name}")
+                self.log('debug', f"[CACHE] Sleeping work orders detected, cache refresh interval reached ({time_since_refresh:.1f}s >= {CACHE_REFRESH_INTERVAL_SECS}s) for {table_name}")
                 self.last_sleeping_refresh = current_time
                 return True
             else:
-                print(f"[CACHE] Using cached data for {table_name} (sleeping work orders, {time_since_refresh:.1f}s < {CACHE_REFRESH_INTERVAL_SECS}s)")
+                self.log('debug', f"[CACHE] Using cached data for {table_name} (sleeping work orders, {time_since_refresh:.1f}s < {CACHE_REFRESH_INTERVAL_SECS}s)")
                 return False
         
         # If no sleeping work orders, refresh on every call (immediate invalidation)
         if not has_sleeping_work_orders:
-            print(f"[CACHE] No sleeping work orders, refreshing cache for {table_name} (immediate invalidation)")
+            self.log('debug', f"[CACHE] No sleeping work orders, refreshing cache for {table_name} (immediate invalidation)")
             return True
         
         return False
     
+    def get_sleeping_state(self) -> Optional[bool]:
+        """Return the memoized sleeping-work-orders flag, or None if absent or older than SLEEPING_STATE_TTL_SECS."""
+        if self._sleeping_state is None:
+            return None
+        value, checked_at = self._sleeping_state
+        if time.time() - checked_at >= SLEEPING_STATE_TTL_SECS:
+            return None
+        return value
+    
+    def set_sleeping_state(self, value: bool):
+        """Memoize the result of a sleeping-work-orders check."""
+        self._sleeping_state = (value, time.time())
+    
+    def get_connection_ids(self) -> Optional[List[str]]:
+        """Return the memoized WebSocket connection IDs, or None if absent or older than CONNECTION_IDS_TTL_SECS."""
+        if self._connection_ids is None:
+            return None
+        connection_ids, fetched_at = self._connection_ids
+        if time.time() - fetched_at >= CONNECTION_IDS_TTL_SECS:
+            return None
+        return connection_ids
+    
+    def set_connection_ids(self, connection_ids: List[str]):
+        """Memoize the current WebSocket connection IDs."""
+        self._connection_ids = (connection_ids, time.time())
+    
+    def invalidate_connection_ids(self):
+        """Drop the memoized WebSocket connection IDs."""
+        self._connection_ids = None
+    
+    @staticmethod
+    def _item_cache_key(table_name: str, key: Dict) -> tuple:
+        return (table_name, tuple(sorted(key.items())))
+    
+    def _item_store(self, table_name: str) -> tuple:
+        """The (entries, max_entries) cache that holds items from a table."""
+        if table_name == STUDENT_TABLE:
+            return self._student_items, STUDENT_CACHE_MAX_ENTRIES
+        return self._items, ITEM_CACHE_MAX_ENTRIES
+    
+    def get_cached_item(self, table_name: str, key: Dict) -> Optional[Dict]:
+        """Return a memoized item, or None if absent or older than ITEM_CACHE_TTL_SECS."""
+        items, _ = self._item_store(table_name)
+        cache_key = self._item_cache_key(table_name, key)
+        entry = items.get(cache_key)
+        if entry is None:
+            return None
+        item, fetched_at = entry
+        if time.time() - fetched_at >= ITEM_CACHE_TTL_SECS:
+            del items[cache_key]
+            return None
+        return item
+    
+    def set_cached_item(self, table_name: str, key: Dict, item: Dict):
+        """Memoize an item read from a table, evicting the oldest entry when full."""
+        items, max_entries = self._item_store(table_name)
+        if len(items) >= max_entries:
+            items.pop(next(iter(items)))
+        items[self._item_cache_key(table_name, key)] = (item, time.time())
+    
+    def invalidate_item(self, table_name: str, key: Dict):
+        """Drop a memoized item after it has been written."""
+        items, _ = self._item_store(table_name)
+        items.pop(self._item_cache_key(table_name, key), None)
+    
     def get_cached_data(self, table_name: str) -> Optional[List[Dict]]:
         """Get cached data for a table if it exists and is valid."""
         if table_name in self.cache:
-            print(f"[CACHE] Returning cached data for {table_name} ({len(self.cache[table_name]['data'])} items)")
+            self.log('debug', f"[CACHE] Returning cached data for {table_name} ({len(self.cache[table_name]['data'])} items)")
             return self.cache[table_name]['data']
-        print(f"[CACHE] No cached data for {table_name}")
+        self.log('debug', f"[CACHE] No cached data for {table_name}")
         return None
     
     def set_cached_data(self, table_name: str, data: List[Dict]):
@@ -149,49 +388,50 @@ class TableCacheManager:
             'data': data,
             'last_refresh': time.time()
         }
-        print(f"[CACHE] Cached {len(data)} items for table {table_name}")
         self.log('debug', f"[CACHE] Cached {len(data)} items for table {table_name}")
 
 class AWSClient:
     def __init__(self, logging_config=None):
-        self.dynamodb = boto3.resource('dynamodb', region_name=config.aws_region)
-        self.sqs = boto3.client('sqs', region_name=config.aws_region)
+        self.dynamodb = boto3.resource('dynamodb', region_name=config.aws_region, config=BOTO_CFG)
+        # Low-level client for hot paths; shares the resource's connection pool
+        self.ddb = self.dynamodb.meta.client
+        self.sqs = boto3.client('sqs', region_name=config.aws_region, config=BOTO_CFG)
+        self.s3 = boto3.client('s3', region_name=config.aws_region, config=BOTO_CFG)
         self.logging_config = logging_config
         self.cache_manager = TableCacheManager(logging_config)
+        self._consecutive_empty_receives = 0
+        self._table_cache: Dict[str, object] = {}
+        self._last_scan_sizes: Dict[str, int] = {}
+        self._ws_pool = ThreadPoolExecutor(max_workers=WEBSOCKET_FANOUT_WORKERS)
+        # Runs each update's fan-out off the caller's thread (the agent's event loop); a single
+        # worker keeps updates in order
+        self._ws_dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ws-dispatch')
+        self._held_locks: Dict[str, str] = {}  # work order id -> agent id
+        self._lock_refresher = None
         
         if not WEBSOCKET_API_URL:
             raise ValueError("WEBSOCKET_API_URL environment variable is not set")
         
-        # Parse the WebSocket URL to get the API ID and stage
         try:
-            # Remove any protocol prefix (wss:// or https://)
-            url = WEBSOCKET_API_URL.replace('wss://', '').replace('https://', '')
-            
-            # Split into parts
-            parts = url.split('.')
-            if len(parts) < 2:
-                raise ValueError(f"Invalid WebSocket URL format: {WEBSOCKET_API_URL}")
-            
-            # The first part should be the API ID
-            api_id = parts[0]
-            
-            # The last part should be the stage (split by / and take the last part)
-            stage = parts[-1].split('/')[-1]
-            
-            # Construct the Management API endpoint
-            mgmt_api_url = f"https://{api_id}.execute-api.{config.aws_region}.amazonaws.com/{stage}"
-            
-            # Create the API Gateway Management API client
-            self.apigateway = boto3.client(
-                'apigatewaymanagementapi',
-                endpoint_url=mgmt_api_url,
-                region_name=config.aws_region
-            )
-            self.table = self.dynamodb.Table(DYNAMODB_TABLE)
+            self.apigateway = _make_apigw_client(WEBSOCKET_API_URL, config.aws_region)
+            self.table = self._get_table(DYNAMODB_TABLE)
             
         except Exception as e:
             print(f"[ERROR] Error parsing WebSocket URL: {str(e)}")
             raise
+        
+        # Table handles used on hot paths
+        self.connections_table = self._get_table(CONNECTIONS_TABLE)
+        self.events_table = self._get_table(EVENTS_TABLE)
+        self.student_table = self._get_table(STUDENT_TABLE)
+
+    def _get_table(self, table_name: str):
+        """Return a cached DynamoDB Table resource for the given table name."""
+        table = self._table_cache.get(table_name)
+        if table is None:
+            table = self.dynamodb.Table(table_name)
+            self._table_cache[table_name] = table
+        return table
 
     def log(self, level, message):
         """Log a message if the level is enabled."""
@@ -201,6 +441,10 @@ class AWSClient:
             # Fallback to always logging if no config provided
             print(message)
 
+    def debug_enabled(self) -> bool:
+        """True if debug messages would be output (always, when no logging config is given)."""
+        return not self.logging_config or self.logging_config.should_log('debug')
+
     def invalidate_cache_on_sqs_start(self):
         """Invalidate all caches when an SQS start message is received."""
         self.cache_manager.invalidate_all_caches("SQS start message received")
@@ -208,128 +452,89 @@ class AWSClient:
     def has_sleeping_work_orders(self) -> bool:
         """Check if there are any sleeping work orders."""
         try:
-            response = self.table.scan(
-                FilterExpression='#state = :sleeping',
-                ExpressionAttributeNames={'#state': 'state'},
-                ExpressionAttributeValues={':sleeping': 'Sleeping'},
+            response = self.table.query(
+                IndexName=WORK_ORDERS_STATE_INDEX,
+                KeyConditionExpression=Key('state').eq('Sleeping'),
+                Select='COUNT',
+                Limit=1,
             )
-            sleeping_items = response.get('Items', [])
-            sleeping_ids = [item.get('id', 'unknown') for item in sleeping_items]
-            print(f"[CACHE-DEBUG] has_sleeping_work_orders: found {len(sleeping_items)} sleeping work orders: {sleeping_ids}")
-            return len(sleeping_items) > 0
+            if self.debug_enabled():
+                self.log('debug', f"[CACHE] has_sleeping_work_orders: sleeping work orders present: {response['Count'] > 0}")
+            return response['Count'] > 0
         except Exception as e:
-            print(f"[CACHE-DEBUG] Error checking for sleeping work orders: {e}")
             self.log('debug', f"[CACHE] Error checking for sleeping work orders: {e}")
             return False
 
     def get_work_order(self, id: str) -> Optional[WorkOrder]:
         try:
-            response = self.table.get_item(Key={'id': id})
+            response = self.ddb.get_item(TableName=DYNAMODB_TABLE, Key={'id': _TS.serialize(id)})
             if 'Item' in response:
-                work_order = WorkOrder.from_dict(response['Item'])
+                item = {k: _TD.deserialize(v) for k, v in response['Item'].items()}
+                work_order = WorkOrder.from_dict(item)
                 return work_order
             return None
         except ClientError as e:
-            print(f"Error getting work order: {e}")
+            self.log('error', f"Error getting work order: {e}")
             return None
 
     def update_work_order(self, update: dict) -> bool:
         try:
-            # Get the current work order
-            current = self.get_work_order(update['id'])
-            if not current:
-                print(f"Work order not found: {update['id']}")
-                return False
-
             # Prepare the update expression and values
             update_expressions = []
             expression_attribute_names = {}
             expression_attribute_values = {}
             
-            # Handle each field in the updates
+            # Handle each field in the updates; the resource API serializes native values
+            # (including the steps list) itself
             for key, value in update['updates'].items():
-                if key == 'steps':
-                    # Handle steps specially - convert to DynamoDB format
-                    if value and isinstance(value[0], dict):
-                        # Convert regular format to DynamoDB format
-                        dynamodb_steps = []
-                        for step in value:
-                            dynamodb_step = {
-                                'name': {'S': step['name']},
-                                'status': {'S': step['status']},
-                                'message': {'S': step['message']},
-                                'isActive': {'BOOL': step['isActive']},
-                                'startTime': {'NULL': True} if step.get('startTime') is None else {'S': step['startTime']},
-                                'endTime': {'NULL': True} if step.get('endTime') is None else {'S': step['endTime']}
-                            }
-                            dynamodb_steps.append(dynamodb_step)
-                        value = dynamodb_steps
-                    
-                    update_expressions.append(f"#{key} = :{key}")
-                    expression_attribute_names[f"#{key}"] = key
-                    expression_attribute_values[f":{key}"] = value
-                else:
-                    # Handle other fields normally
-                    update_expressions.append(f"#{key} = :{key}")
-                    expression_attribute_names[f"#{key}"] = key
-                    expression_attribute_values[f":{key}"] = value
+                update_expressions.append(f"#{key} = :{key}")
+                expression_attribute_names[f"#{key}"] = key
+                expression_attribute_values[f":{key}"] = value
             
             # Always update the updatedAt timestamp
             update_expressions.append("#updatedAt = :updatedAt")
             expression_attribute_names["#updatedAt"] = "updatedAt"
             expression_attribute_values[":updatedAt"] = datetime.utcnow().isoformat()
 
-            # Update the work order in DynamoDB
-            self.table.update_item(
+            # Update the work order in DynamoDB and get the updated row back in the same call
+            response = self.table.update_item(
                 Key={'id': update['id']},
                 UpdateExpression=f"SET {', '.join(update_expressions)}",
+                ConditionExpression='attribute_exists(id)',
                 ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
+                ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues='ALL_NEW'
             )
 
-            # Get the updated work order for WebSocket notification
-            updated_work_order = self.get_work_order(update['id'])
-            if updated_work_order:
-                work_order_data = updated_work_order.dict()
+            # Build the WebSocket notification from the updated row
+            current_item = response.get('Attributes')
+            if current_item:
+                work_order_data = WorkOrder.from_dict(current_item).dict()
                 
                 # Ensure locked status is preserved and included in the update
-                # Get the current locked status from DynamoDB to make sure it's accurate
-                try:
-                    response = self.table.get_item(Key={'id': update['id']})
-                    if 'Item' in response:
-                        current_item = response['Item']
-                        # Extract locked status from DynamoDB format
-                        locked = current_item.get('locked', {}).get('BOOL', False) if isinstance(current_item.get('locked'), dict) else current_item.get('locked', False)
-                        locked_by = current_item.get('lockedBy', {}).get('S') if isinstance(current_item.get('lockedBy'), dict) else current_item.get('lockedBy')
-                        
-                        # Update the work order data with the current locked status
-                        work_order_data['locked'] = locked
-                        work_order_data['lockedBy'] = locked_by
-                        
-                        self.log('debug', f"[DEBUG] Current locked status from DynamoDB: locked={locked}, lockedBy={locked_by}")
-                except Exception as e:
-                    self.log('debug', f"[DEBUG] Error getting current locked status: {e}")
+                work_order_data['locked'] = current_item.get('locked', False)
+                work_order_data['lockedBy'] = current_item.get('lockedBy')
                 
                 self.log('debug', f"[DEBUG] Sending WebSocket update for work order {update['id']}")
                 self.log('debug', f"[DEBUG] Work order data: {work_order_data}")
                 self.log('debug', f"[DEBUG] Steps data: {work_order_data.get('steps', [])}")
                 self.log('debug', f"[DEBUG] Locked status in WebSocket update: {work_order_data.get('locked')}, lockedBy: {work_order_data.get('lockedBy')}")
-                self._send_websocket_update(update['id'], work_order_data)
+                self._ws_dispatcher.submit(self._send_websocket_update, update['id'], work_order_data)
             
             return True
         except ClientError as e:
-            print(f"Error updating work order: {e}")
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                self.log('warning', f"Work order not found: {update['id']}")
+                return False
+            self.log('error', f"Error updating work order: {e}")
             return False
 
     def _send_websocket_update(self, work_order_id: str, work_order_data: dict):
         """Send a WebSocket update with the complete work order data."""
         try:
             # Get all connection IDs from DynamoDB
-            response = self.dynamodb.Table(CONNECTIONS_TABLE).scan(
-                ProjectionExpression='connectionId'
-            )
-            
-            if not response.get('Items'):
+            connection_ids = self.get_active_websocket_connections()
+            if not connection_ids:
                 return
             
             # Create the message
@@ -338,206 +543,340 @@ class AWSClient:
                 'workOrder': work_order_data
             }
 
-            # Ensure all enum values are converted to strings
-            def convert_enums(obj):
-                if isinstance(obj, dict):
-                    return {k: convert_enums(v) for k, v in obj.items()}
-                elif isinstance(obj, list):
-                    return [convert_enums(item) for item in obj]
-                elif hasattr(obj, 'value'):  # Handle Enum types
-                    return obj.value
-                elif hasattr(obj, 'dict'):  # Handle objects with dict() method (like Step, WorkOrder)
-                    return convert_enums(obj.dict())
-                elif hasattr(obj, 'to_dict'):  # Handle objects with to_dict() method
-                    return convert_enums(obj.to_dict())
-                elif hasattr(obj, 'isoformat'):  # Handle datetime objects
-                    return obj.isoformat()
-                else:
-                    return obj
-
             # Convert the message
-            message = convert_enums(message)
+            message = _convert_enums(message)
 
-            # Send to all connections
-            for item in response['Items']:
-                connection_id = item['connectionId']
-                try:
-                    self.apigateway.post_to_connection(
-                        Data=json.dumps(message),
-                        ConnectionId=connection_id
-                    )
-                except Exception as e:
-                    # If connection is gone, remove it from DynamoDB
-                    if isinstance(e, self.apigateway.exceptions.GoneException):
-                        try:
-                            self.dynamodb.Table(CONNECTIONS_TABLE).delete_item(
-                                Key={'connectionId': connection_id}
-                            )
-                            print(f"[WEBSOCKET] Removed stale connection: {connection_id[:8]}...")
-                        except Exception as delete_error:
-                            print(f"[WEBSOCKET] Error removing stale connection: {str(delete_error)}")
-                    else:
-                        print(f"[WEBSOCKET] Error sending message to connection {connection_id[:8]}...: {str(e)}")
+            # Send to all connections concurrently; collect the ones that are gone
+            payload = _dumps_payload(message)
+            gone = [cid for cid in self._ws_pool.map(lambda cid: self._post_to_connection(cid, payload), connection_ids) if cid]
+            if gone:
+                self._delete_connections(gone)
 
         except Exception as e:
-            print(f"[WEBSOCKET] Error in _send_websocket_update: {str(e)}")
+            self.log('warning', f"[WEBSOCKET] Error in _send_websocket_update: {str(e)}")
+
+    def _post_to_connection(self, connection_id: str, payload: bytes) -> Optional[str]:
+        """Post a payload to one WebSocket connection. Returns the connection ID if it is gone."""
+        try:
+            self.apigateway.post_to_connection(
+                Data=payload,
+                ConnectionId=connection_id
+            )
+        except self.apigateway.exceptions.GoneException:
+            return connection_id
+        except Exception as e:
+            self.log('warning', f"[WEBSOCKET] Error sending message to connection {connection_id[:8]}...: {str(e)}")
+        return None
+
+    def _delete_connections(self, connection_ids: List[str]):
+        """Remove stale connections from DynamoDB in a single batch."""
+        try:
+            with self.connections_table.batch_writer() as batch:
+                for connection_id in connection_ids:
+                    batch.delete_item(Key={'connectionId': connection_id})
+            self.cache_manager.invalidate_connection_ids()
+            for connection_id in connection_ids:
+                self.log('websocket', f"[WEBSOCKET] Removed stale connection: {connection_id[:8]}...")
+        except Exception as delete_error:
+            self.log('warning', f"[WEBSOCKET] Error removing stale connections: {str(delete_error)}")
 
     def lock_work_order(self, id: str, agent_id: str) -> bool:
         """Lock a work order for processing by this agent."""
         try:
             # Try to update the work order with a lock
-            self.table.update_item(
-                Key={'id': id},
-                UpdateExpression='SET locked = :locked, lockedBy = :lockedBy',
-                ConditionExpression='attribute_not_exists(locked) OR locked = :false',
+            now = int(time.time())
+            self.ddb.update_item(
+                TableName=DYNAMODB_TABLE,
+                Key={'id': _TS.serialize(id)},
+                UpdateExpression='SET locked = :locked, lockedBy = :lockedBy, lockExpiresAt = :exp',
+                ConditionExpression='attribute_not_exists(locked) OR locked = :false OR lockExpiresAt < :now',
                 ExpressionAttributeValues={
-                    ':locked': True,
-                    ':lockedBy': agent_id,
-                    ':false': False
+                    ':locked': {'BOOL': True},
+                    ':lockedBy': _TS.serialize(agent_id),
+                    ':false': {'BOOL': False},
+                    ':exp': _TS.serialize(now + LOCK_TTL_SECS),
+                    ':now': _TS.serialize(now)
                 }
             )
+            self._held_locks[id] = agent_id
+            self._ensure_lock_refresher()
             return True
         except ClientError as e:
             if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
                 # Work order is already locked
                 return False
             else:
-                print(f"Error locking work order: {e}")
+                self.log('error', f"Error locking work order: {e}")
                 return False
 
     def unlock_work_order(self, id: str) -> bool:
         """Unlock a work order."""
         try:
-            self.table.update_item(
-                Key={'id': id},
-                UpdateExpression='SET locked = :locked, lockedBy = :empty',
+            self.ddb.update_item(
+                TableName=DYNAMODB_TABLE,
+                Key={'id': _TS.serialize(id)},
+                UpdateExpression='SET locked = :locked, lockedBy = :empty REMOVE lockExpiresAt',
                 ExpressionAttributeValues={
-                    ':locked': False,
-                    ':empty': ""
+                    ':locked': {'BOOL': False},
+                    ':empty': {'S': ""}
                 }
             )
+            self._held_locks.pop(id, None)
             return True
         except ClientError as e:
-            print(f"Error unlocking work order: {e}")
+            self.log('error', f"Error unlocking work order: {e}")
             return False
 
-    def receive_sqs_messages(self, max_messages: int = 1) -> List[Dict]:
-        """Receive messages from SQS queue."""
+    def refresh_work_order_lock(self, id: str, agent_id: str) -> bool:
+        """Push out the expiry of a lock this agent still holds."""
         try:
+            self.ddb.update_item(
+                TableName=DYNAMODB_TABLE,
+                Key={'id': _TS.serialize(id)},
+                UpdateExpression='SET lockExpiresAt = :exp',
+                ConditionExpression='locked = :true AND lockedBy = :lockedBy',
+                ExpressionAttributeValues={
+                    ':true': {'BOOL': True},
+                    ':lockedBy': _TS.serialize(agent_id),
+                    ':exp': _TS.serialize(int(time.time()) + LOCK_TTL_SECS)
+                }
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                # Lock was released or taken over; stop refreshing it
+                self._held_locks.pop(id, None)
+                return False
+            self.log('error', f"Error refreshing work order lock: {e}")
+            return False
+
+    def _ensure_lock_refresher(self):
+        """Start the background thread that refreshes held locks every LOCK_TTL_SECS / 3."""
+        if self._lock_refresher is not None:
+            return
+
+        def refresh_locks():
+            while True:
+                time.sleep(LOCK_TTL_SECS / 3)
+                for id, agent_id in list(self._held_locks.items()):
+                    self.refresh_work_order_lock(id, agent_id)
+
+        self._lock_refresher = threading.Thread(target=refresh_locks, name='work-order-lock-refresher', daemon=True)
+        self._lock_refresher.start()
+
+    def receive_sqs_messages(self, max_messages: int = SQS_MAX_BATCH_SIZE) -> List[Dict]:
+        """
+        Receive messages from SQS queue.
+        The long-poll wait grows by a second per consecutive empty receive (capped at the
+        SQS maximum of 20s) and resets as soon as a message arrives.
+        """
+        try:
+            wait_time = min(SQS_MAX_WAIT_TIME_SECS, 1 + self._consecutive_empty_receives)
             response = self.sqs.receive_message(
                 QueueUrl=SQS_QUEUE_URL,
                 MaxNumberOfMessages=max_messages,
-                WaitTimeSeconds=1
+                WaitTimeSeconds=wait_time,
+                AttributeNames=['All'],
+                MessageAttributeNames=['All']
             )
-            return response.get('Messages', [])
+            messages = response.get('Messages', [])
+            if messages:
+                self._consecutive_empty_receives = 0
+            else:
+                self._consecutive_empty_receives += 1
+            return messages
         except ClientError as e:
-            print(f"Error receiving SQS messages: {e}")
+            self.log('error', f"Error receiving SQS messages: {e}")
             return []
 
     def delete_sqs_message(self, receipt_handle: str) -> bool:
         """Delete a message from SQS queue."""
-        try:
-            self.sqs.delete_message(
-                QueueUrl=SQS_QUEUE_URL,
-                ReceiptHandle=receipt_handle
-            )
-            return True
-        except ClientError as e:
-            print(f"Error deleting SQS message: {e}")
-            return False
+        return self.delete_sqs_messages([receipt_handle])
+
+    def delete_sqs_messages(self, receipt_handles: List[str]) -> bool:
+        """Delete messages from SQS queue, up to SQS_MAX_BATCH_SIZE per request."""
+        success = True
+        for start in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            entries = [
+                {'Id': str(i), 'ReceiptHandle': h}
+                for i, h in enumerate(receipt_handles[start:start + SQS_MAX_BATCH_SIZE])
+            ]
+            try:
+                response = self.sqs.delete_message_batch(
+                    QueueUrl=SQS_QUEUE_URL,
+                    Entries=entries
+                )
+                for failure in response.get('Failed', []):
+                    self.log('error', f"Error deleting SQS message: {failure.get('Code')}: {failure.get('Message')}")
+                    success = False
+            except ClientError as e:
+                self.log('error', f"Error deleting SQS messages: {e}")
+                success = False
+        return success
+
+    def extend_sqs_visibility(self, receipt_handles: List[str], seconds: int = SQS_VISIBILITY_TIMEOUT_SECS) -> bool:
+        """Reset the visibility timeout of in-flight messages so they are not redelivered."""
+        success = True
+        for start in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            entries = [
+                {'Id': str(i), 'ReceiptHandle': h, 'VisibilityTimeout': seconds}
+                for i, h in enumerate(receipt_handles[start:start + SQS_MAX_BATCH_SIZE])
+            ]
+            try:
+                response = self.sqs.change_message_visibility_batch(
+                    QueueUrl=SQS_QUEUE_URL,
+                    Entries=entries
+                )
+                for failure in response.get('Failed', []):
+                    self.log('error', f"Error extending SQS message visibility: {failure.get('Code')}: {failure.get('Message')}")
+                    success = False
+            except ClientError as e:
+                self.log('error', f"Error extending SQS message visibility: {e}")
+                success = False
+        return success
+
+    def release_sqs_messages(self, receipt_handles: List[str]) -> bool:
+        """Make received-but-unprocessed messages visible to other receivers again right away."""
+        return self.extend_sqs_visibility(receipt_handles, 0)
 
     def unlock_all_work_orders(self) -> int:
         """Unlock all work orders that are currently locked."""
         try:
-            # Scan for locked work orders
-            response = self.table.scan(
-                FilterExpression='locked = :true',
-                ExpressionAttributeValues={':true': True}
-            )
+            # Scan for locked work orders, projecting only the key
+            scan_kw = {
+                'FilterExpression': 'locked = :true',
+                'ExpressionAttributeValues': {':true': True},
+                'ProjectionExpression': 'id'
+            }
+            ids = []
+            while True:
+                response = self.table.scan(**scan_kw)
+                ids.extend(item['id'] for item in response.get('Items', []))
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    break
+                scan_kw['ExclusiveStartKey'] = last_evaluated_key
             
-            unlocked_count = 0
-            for item in response.get('Items', []):
-                try:
-                    self.table.update_item(
-                        Key={'id': item['id']},
-                        UpdateExpression='SET locked = :false, lockedBy = :empty',
-                        ExpressionAttributeValues={
-                            ':false': False,
-                            ':empty': ""
-                        }
-                    )
-                    unlocked_count += 1
-                except Exception as e:
-                    print(f"Error unlocking work order {item['id']}: {e}")
+            if not ids:
+                return 0
             
-            return unlocked_count
+            # BatchWriteItem cannot update, so fan the update_item calls out instead
+            with ThreadPoolExecutor(max_workers=UNLOCK_WORKERS) as executor:
+                results = list(executor.map(self._unlock_item, ids))
+            return sum(results)
         except Exception as e:
-            print(f"Error unlocking all work orders: {e}")
+            self.log('error', f"Error unlocking all work orders: {e}")
             return 0
 
+    def _unlock_item(self, id: str) -> bool:
+        """Clear the lock on a single work order (used by unlock_all_work_orders)."""
+        try:
+            self.table.update_item(
+                Key={'id': id},
+                UpdateExpression='SET locked = :false, lockedBy = :empty REMOVE lockExpiresAt',
+                ExpressionAttributeValues={
+                    ':false': False,
+                    ':empty': ""
+                }
+            )
+            self._held_locks.pop(id, None)
+            return True
+        except Exception as e:
+            self.log('error', f"Error unlocking work order {id}: {e}")
+            return False
+
+    def _scan_segment(self, table_name: str, segment: int, total_segments: int) -> List[Dict]:
+        """Paginate one segment of a (possibly parallel) scan."""
+        table = self._get_table(table_name)
+        scan_kw: Dict = {}
+        if total_segments > 1:
+            scan_kw['Segment'] = segment
+            scan_kw['TotalSegments'] = total_segments
+        items = []
+        while True:
+            response = table.scan(**scan_kw)
+            items.extend(response.get('Items', []))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            scan_kw['ExclusiveStartKey'] = last_evaluated_key
+        return items
+
+    def _scan_all(self, table_name: str) -> List[Dict]:
+        """
+        Scan every item of a table, splitting into SCAN_SEGMENTS parallel segments.
+        Tables whose previous scan returned fewer than SCAN_SEGMENT_MIN_ITEMS items are
+        scanned serially, since the thread fan-out would cost more than it saves.
+        """
+        segments = SCAN_SEGMENTS
+        last_size = self._last_scan_sizes.get(table_name)
+        if segments <= 1 or (last_size is not None and last_size < SCAN_SEGMENT_MIN_ITEMS):
+            items = self._scan_segment(table_name, 0, 1)
+        else:
+            items = []
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                futures = [executor.submit(self._scan_segment, table_name, i, segments) for i in range(segments)]
+                for future in futures:
+                    items.extend(future.result())
+        self._last_scan_sizes[table_name] = len(items)
+        return items
+
     def scan_table(self, table_name: str) -> List[Dict]:
         """
         Scan an entire DynamoDB table and return all items.
         Now includes caching to reduce redundant scans, except for the work order table which is never cached.
         """
         try:
-            print(f"[CACHE-DEBUG] scan_table({table_name}) called")
+            debug = self.debug_enabled()
+            if debug:
+                self.log('debug', f"[CACHE] scan_table({table_name}) called")
             # Never cache the work order table
             work_order_table_names = {self.table.name, getattr(config, 'work_orders_table', None)}
             if table_name in work_order_table_names:
-                print(f"[CACHE] Work order table '{table_name}' detected, always performing fresh scan (never cached).")
-                table = self.dynamodb.Table(table_name)
-                items = []
-                last_evaluated_key = None
-                while True:
-                    if last_evaluated_key:
-                        response = table.scan(ExclusiveStartKey=last_evaluated_key)
-                    else:
-                        response = table.scan()
-                    items.extend(response.get('Items', []))
-                    last_evaluated_key = response.get('LastEvaluatedKey')
-                    if not last_evaluated_key:
-                        break
-                print(f"[CACHE] Fresh scan complete for work order table {table_name}, {len(items)} items loaded.")
+                if debug:
+                    self.log('debug', f"[CACHE] Work order table '{table_name}' detected, always performing fresh scan (never cached).")
+                items = self._scan_all(table_name)
+                if debug:
+                    self.log('debug', f"[CACHE] Fresh scan complete for work order table {table_name}, {len(items)} items loaded.")
                 return items
             # For all other tables, use cache logic
-            has_sleeping_work_orders = self.has_sleeping_work_orders()
-            if self.cache_manager.should_refresh_cache(table_name, has_sleeping_work_orders):
-                print(f"[CACHE] Performing fresh scan of table: {table_name}")
-                table = self.dynamodb.Table(table_name)
-                items = []
-                last_evaluated_key = None
-                while True:
-                    if last_evaluated_key:
-                        response = table.scan(ExclusiveStartKey=last_evaluated_key)
-                    else:
-                        response = table.scan()
-                    items.extend(response.get('Items', []))
-                    last_evaluated_key = response.get('LastEvaluatedKey')
-                    if not last_evaluated_key:
-                        break
-                self.cache_manager.set_cached_data(table_name, items)
-                print(f"[CACHE] Fresh scan complete for {table_name}, {len(items)} items loaded and cached.")
-            else:
-                print(f"[CACHE] scan_table({table_name}) filled from cache, {len(self.cache_manager.get_cached_data(table_name))} items.")
+            has_sleeping_work_orders = self.cache_manager.get_sleeping_state()
+            if has_sleeping_work_orders is None:
+                has_sleeping_work_orders = self.has_sleeping_work_orders()
+                self.cache_manager.set_sleeping_state(has_sleeping_work_orders)
+            items = None
+            if not self.cache_manager.should_refresh_cache(table_name, has_sleeping_work_orders):
                 items = self.cache_manager.get_cached_data(table_name)
                 if items is None:
-                    print(f"[CACHE] No cached data for {table_name}, falling back to fresh scan.")
-                    return self.scan_table(table_name)
-                print(f"[CACHE] Using cached data for {table_name}: {len(items)} items")
+                    # Cache was invalidated between the refresh check and the read
+                    if debug:
+                        self.log('debug', f"[CACHE] No cached data for {table_name}, falling back to fresh scan.")
+                elif debug:
+                    self.log('debug', f"[CACHE] Using cached data for {table_name}: {len(items)} items")
+            if items is None:
+                if debug:
+                    self.log('debug', f"[CACHE] Performing fresh scan of table: {table_name}")
+                items = self._scan_all(table_name)
+                self.cache_manager.set_cached_data(table_name, items)
+                if debug:
+                    self.log('debug', f"[CACHE] Fresh scan complete for {table_name}, {len(items)} items loaded and cached.")
             return items
         except Exception as e:
-            print(f"[CACHE-DEBUG] Error in scan_table({table_name}): {e}")
             self.log('debug', f"[CACHE] Error scanning table {table_name}: {str(e)}")
             raise Exception(f"Failed to scan table {table_name}: {str(e)}")
 
     def get_active_websocket_connections(self) -> List[str]:
         """Get all active WebSocket connection IDs."""
+        connection_ids = self.cache_manager.get_connection_ids()
+        if connection_ids is not None:
+            return connection_ids
         try:
-            response = self.dynamodb.Table(CONNECTIONS_TABLE).scan(
-                ProjectionExpression='connectionId'
-            )
-            return [item['connectionId'] for item in response.get('Items', [])]
+            paginator = self.dynamodb.meta.client.get_paginator('scan')
+            connection_ids = []
+            for page in paginator.paginate(TableName=CONNECTIONS_TABLE, ProjectionExpression='connectionId'):
+                connection_ids.extend(item['connectionId']['S'] for item in page.get('Items', []))
+            self.cache_manager.set_connection_ids(connection_ids)
+            return connection_ids
         except Exception as e:
             self.log('debug', f"[DEBUG] Error getting WebSocket connections: {str(e)}")
             return []
@@ -562,52 +901,57 @@ class AWSClient:
             return 0
         
         cleaned_count = 0
+        heartbeat = json.dumps({'type': 'heartbeat', 'timestamp': datetime.utcnow().isoformat()})
         for conn_id in connections:
             try:
                 # Send a test message to check if connection is alive
                 self.apigateway.post_to_connection(
-                    Data=json.dumps({'type': 'heartbeat', 'timestamp': datetime.utcnow().isoformat()}),
+                    Data=heartbeat,
                     ConnectionId=conn_id
                 )
             except Exception as e:
                 # If connection is gone, remove it from DynamoDB
                 if isinstance(e, self.apigateway.exceptions.GoneException):
                     try:
-                        self.dynamodb.Table(CONNECTIONS_TABLE).delete_item(
+                        self.connections_table.delete_item(
                             Key={'connectionId': conn_id}
                         )
-                        print(f"[WEBSOCKET] Removed stale connection: {conn_id[:8]}...")
+                        self.log('websocket', f"[WEBSOCKET] Removed stale connection: {conn_id[:8]}...")
                         cleaned_count += 1
                     except Exception as delete_error:
-                        print(f"[WEBSOCKET] Error removing stale connection: {str(delete_error)}")
+                        self.log('warning', f"[WEBSOCKET] Error removing stale connection: {str(delete_error)}")
         
         if cleaned_count > 0:
-            print(f"[WEBSOCKET] Cleaned up {cleaned_count} stale connections")
+            self.cache_manager.invalidate_connection_ids()
+            self.log('websocket', f"[WEBSOCKET] Cleaned up {cleaned_count} stale connections")
         
         return cleaned_count
 
     def get_event(self, event_code: str) -> Optional[Dict]:
         """Get an event record from the events table."""
+        key = {'aid': event_code}
+        item = self.cache_manager.get_cached_item(EVENTS_TABLE, key)
+        if item is not None:
+            return item
         try:
-            events_table = self.dynamodb.Table(EVENTS_TABLE)
-            response = events_table.get_item(Key={'aid': event_code})
+            response = self.events_table.get_item(Key=key)
             if 'Item' in response:
+                self.cache_manager.set_cached_item(EVENTS_TABLE, key, response['Item'])
                 return response['Item']
             return None
         except ClientError as e:
-            print(f"Error getting event: {e}")
+            self.log('error', f"Error getting event: {e}")
             return None
 
     def get_student(self, student_id: str) -> Optional[Dict]:
         """Get a student record from the student table."""
         try:
-            student_table = self.dynamodb.Table(STUDENT_TABLE)
-            response = student_table.get_item(Key={'id': student_id})
+            response = self.student_table.get_item(Key={'id': student_id})
             if 'Item' in response:
                 return response['Item']
             return None
         except ClientError as e:
-            print(f"Error getting student: {e}")
+            self.log('error', f"Error getting student: {e}")
             return None
 
     def get_s3_object_content(self, s3_url: str) -> Optional[str]:
@@ -615,34 +959,34 @@ class AWSClient:
         try:
             # Parse S3 URL to get bucket and key
             # URL format: https://bucket-name.s3.amazonaws.com/key
-            if not s3_url.startswith('https://'):
+            parsed = urlparse(s3_url)
+            if parsed.scheme != 'https':
                 raise ValueError("Invalid S3 URL format")
             
-            # Remove https:// prefix
-            url_parts = s3_url[8:].split('/')
-            if len(url_parts) < 3:
+            key = parsed.path.lstrip('/')
+            if '/' not in key:
                 raise ValueError("Invalid S3 URL format")
             
-            bucket_name = url_parts[0].split('.')[0]  # Remove .s3.amazonaws.com
-            key = '/'.join(url_parts[1:])
+            bucket_name = parsed.netloc.split('.')[0]  # Remove .s3.amazonaws.com
             
             # Get S3 object
-            s3 = boto3.client('s3', region_name=config.aws_region)
-            response = s3.get_object(Bucket=bucket_name, Key=key)
+            response = self.s3.get_object(Bucket=bucket_name, Key=key)
             
-            # Read content as string
-            content = response['Body'].read().decode('utf-8')
-            return content
+            # Read content as string, closing the body so the connection returns to the pool
+            body = response['Body']
+            try:
+                return body.read().decode('utf-8')
+            finally:
+                body.close()
             
         except Exception as e:
-            print(f"Error getting S3 object content: {e}")
+            self.log('error', f"Error getting S3 object content: {e}")
             return None
 
     def update_student_emails(self, student_id: str, emails: Dict) -> bool:
         """Update the emails field of a student record."""
         try:
-            student_table = self.dynamodb.Table(STUDENT_TABLE)
-            student_table.update_item(
+            self.student_table.update_item(
                 Key={'id': student_id},
                 UpdateExpression='SET #emails = :emails',
                 ExpressionAttributeNames={'#emails': 'emails'},
@@ -650,13 +994,13 @@ class AWSClient:
             )
             return True
         except ClientError as e:
-            print(f"Error updating student emails: {e}")
+            self.log('error', f"Error updating student emails: {e}")
             return False
 
     def get_offering_transactions(self) -> List[Dict]:
         """Get offering transactions that have succeeded but have no email receipt sent."""
         try:
-            table = self.dynamodb.Table(OFFERING_TRANSACTIONS_TABLE)
+            table = self._get_table(OFFERING_TRANSACTIONS_TABLE)
             # Scan the table. Might need pagination if table is large.
             transactions = []
             last_evaluated_key = None
@@ -676,7 +1020,7 @@ class AWSClient:
             
             return transactions
         except Exception as e:
-            print(f"Error getting offering transactions: {e}")
+            self.log('error', f"Error getting offering transactions: {e}")
             return []
 
     def get_single_offering_transaction(self, pid: Optional[str] = None) -> Optional[Dict]:
@@ -690,7 +1034,7 @@ class AWSClient:
         considered.
         """
         try:
-            table = self.dynamodb.Table(OFFERING_TRANSACTIONS_TABLE)
+            table = self._get_table(OFFERING_TRANSACTIONS_TABLE)
             last_key: Optional[Dict] = None
             while True:
                 scan_kw: Dict = {}
@@ -710,13 +1054,13 @@ class AWSClient:
                     break
             return None
         except Exception as e:
-            print(f"Error getting single offering transaction: {e}")
+            self.log('error', f"Error getting single offering transaction: {e}")
             return None
 
     def update_transaction_receipt_sent(self, payment_intent_id: str) -> bool:
         """Update the offering transaction to mark the email receipt as sent with ISO 8601 timestamp."""
         try:
-            table = self.dynamodb.Table(OFFERING_TRANSACTIONS_TABLE)
+            table = self._get_table(OFFERING_TRANSACTIONS_TABLE)
             table.update_item(
                 Key={'paymentIntentId': payment_intent_id},
                 UpdateExpression='SET emailReceiptSent = :timestamp',
@@ -724,7 +1068,7 @@ class AWSClient:
             )
             return True
         except ClientError as e:
-            print(f"Error updating transaction receipt sent: {e}")
+            self.log('error', f"Error updating transaction receipt sent: {e}")
             return False
 
     def clear_transaction_receipt_sent(self, payment_intent_id: str) -> bool:
@@ -736,7 +1080,7 @@ class AWSClient:
         so the resent email reflects the updated Dynamo item.
         """
         try:
-            table = self.dynamodb.Table(OFFERING_TRANSACTIONS_TABLE)
+            table = self._get_table(OFFERING_TRANSACTIONS_TABLE)
             table.update_item(
                 Key={'paymentIntentId': payment_intent_id},
                 # Legacy v1 marker is emailReceipt; _offering_tx_needs_receipt treats either as "already sent".
@@ -744,81 +1088,41 @@ class AWSClient:
             )
             return True
         except ClientError as e:
-            print(f"Error clearing transaction receipt sent markers: {e}")
+            self.log('error', f"Error clearing transaction receipt sent markers: {e}")
             return False
 
     def _get_full_language_name(self, language_code: str) -> str:
         """Convert two-letter language code to full language name."""
-        language_mapping = {
-            'EN': 'English',
-            'FR': 'French', 
-            'SP': 'Spanish',
-            'DE': 'German',
-            'IT': 'Italian',
-            'PT': 'Portuguese',
-            'RU': 'Russian',
-            'ZH': 'Chinese',
-            'JA': 'Japanese',
-            'KO': 'Korean',
-            'AR': 'Arabic',
-            'HI': 'Hindi',
-            'TH': 'Thai',
-            'VI': 'Vietnamese',
-            'NL': 'Dutch',
-            'SV': 'Swedish',
-            'NO': 'Norwegian',
-            'DA': 'Danish',
-            'FI': 'Finnish',
-            'PL': 'Polish',
-            'CZ': 'Czech',
-            'HU': 'Hungarian',
-            'RO': 'Romanian',
-            'BG': 'Bulgarian',
-            'HR': 'Croatian',
-            'SR': 'Serbian',
-            'SK': 'Slovak',
-            'SL': 'Slovenian',
-            'ET': 'Estonian',
-            'LV': 'Latvian',
-            'LT': 'Lithuanian',
-            'MT': 'Maltese',
-            'EL': 'Greek',
-            'HE': 'Hebrew',
-            'TR': 'Turkish',
-            'UK': 'Ukrainian',
-            'CS': 'Czech',
-            'SV': 'Swedish',
-            'NO': 'Norwegian',
-            'DA': 'Danish',
-            'FI': 'Finnish',
-            'PL': 'Polish',
-            'HU': 'Hungarian',
-            'RO': 'Romanian',
-            'BG': 'Bulgarian',
-            'HR': 'Croatian',
-            'SR': 'Serbian',
-            'SK': 'Slovak',
-            'SL': 'Slovenian',
-            'ET': 'Estonian',
-            'LV': 'Latvian',
-            'LT': 'Lithuanian',
-            'MT': 'Maltese',
-            'EL': 'Greek',
-            'HE': 'Hebrew',
-            'TR': 'Turkish',
-            'UK': 'Ukrainian'
-        }
-        return language_mapping.get(language_code.upper(), language_code)
+        return _LANGUAGE_MAP.get(language_code.upper(), language_code)
 
     def update_event_embedded_emails(self, event_code: str, sub_event: str, stage: str, language: str, s3_url: str) -> bool:
         """Update the embeddedEmails field in the events table."""
+        key = {'aid': event_code}
         try:
-            events_table = self.dynamodb.Table(EVENTS_TABLE)
+            # Set just the one nested entry; the common case needs no read of the (large) event
+            try:
+                self.events_table.update_item(
+                    Key=key,
+                    UpdateExpression='SET embeddedEmails.#sub.#stage.#lang = :url',
+                    ConditionExpression='attribute_exists(aid)',
+                    ExpressionAttributeNames={'#sub': sub_event, '#stage': stage, '#lang': language},
+                    ExpressionAttributeValues={':url': s3_url}
+                )
+                self.cache_manager.invalidate_item(EVENTS_TABLE, key)
+                return True
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'ConditionalCheckFailedException':
+                    self.log('warning', f"Event {event_code} not found")
+                    return False
+                if code != 'ValidationException':
+                    raise
+                # A parent map doesn't exist yet; fall through to rewriting the event
             
             # Get the current event record
-            response = events_table.get_item(Key={'aid': event_code})
+            response = self.events_table.get_item(Key=key)
             if 'Item' not in response:
-                print(f"Event {event_code} not found")
+                self.log('warning', f"Event {event_code} not found")
                 return False
             
             event = response['Item']
@@ -839,11 +1143,12 @@ class AWSClient:
             event['embeddedEmails'][sub_event][stage][language] = s3_url
             
             # Update the event record
-            events_table.put_item(Item=event)
+            self.events_table.put_item(Item=event)
+            self.cache_manager.invalidate_item(EVENTS_TABLE, key)
             
             return True
         except Exception as e:
-            print(f"Error updating event embedded emails: {e}")
+            self.log('error', f"Error updating event embedded emails: {e}")
             return False
 
     def check_for_stop_messages(self, work_order_id: str) -> bool:
@@ -853,22 +1158,39 @@ class AWSClient:
             response = self.sqs.receive_message(
                 QueueUrl=SQS_QUEUE_URL,
                 MaxNumberOfMessages=10,
-                WaitTimeSeconds=0  # Non-blocking
+                WaitTimeSeconds=0,  # Non-blocking
+                MessageAttributeNames=['workOrderId', 'action']
             )
             
             messages = response.get('Messages', [])
+            if not messages:
+                return False
+            
+            found = False
             for message in messages:
+                # Cheap pre-check on message attributes; only messages without them need a body parse
+                attrs = message.get('MessageAttributes')
+                if attrs:
+                    if (attrs.get('workOrderId', {}).get('StringValue') == work_order_id and
+                            attrs.get('action', {}).get('StringValue') == 'stop'):
+                        found = True
+                        break
+                    continue
                 try:
                     body = json.loads(message['Body'])
                     if (body.get('workOrderId') == work_order_id and 
                         body.get('action') == 'stop'):
-                        return True
+                        found = True
+                        break
                 except (json.JSONDecodeError, KeyError):
                     continue
             
-            return False
+            # This is only a peek: hand every message back to the main loop instead of leaving
+            # them hidden for the full visibility timeout
+            self.release_sqs_messages([m['ReceiptHandle'] for m in messages])
+            return found
         except Exception as e:
-            print(f"Error checking for stop messages: {e}")
+            self.log('error', f"Error checking for stop messages: {e}")
             return False
 
     def get_table_name(self, table_key: str) -> str:
@@ -883,111 +1205,163 @@ class AWSClient:
         return table_mapping.get(table_key, table_key)
 
     def get_item(self, table_name: str, key: Dict) -> Optional[Dict]:
-        """Get a single item from a DynamoDB table."""
+        """Get a single item from a DynamoDB table (memoized for ITEM_CACHE_TTL_SECS)."""
+        item = self.cache_manager.get_cached_item(table_name, key)
+        if item is not None:
+            return item
         try:
-            table = self.dynamodb.Table(table_name)
+            table = self._get_table(table_name)
             response = table.get_item(Key=key)
             if 'Item' in response:
+                self.cache_manager.set_cached_item(table_name, key, response['Item'])
                 return response['Item']
             return None
         except ClientError as e:
-            print(f"Error getting item from {table_name}: {e}")
+            self.log('error', f"Error getting item from {table_name}: {e}")
             return None
 
+    def batch_get(self, table_name: str, keys: List[Dict]) -> List[Dict]:
+        """
+        Get many items from one table with BatchGetItem, BATCH_GET_MAX_KEYS keys per request.
+        Unprocessed keys are retried with exponential backoff, up to BATCH_GET_MAX_ATTEMPTS requests
+        per chunk. Missing items are simply absent from the result; order is not preserved.
+        """
+        # BatchGetItem rejects duplicate keys within a request
+        unique_keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+        items: List[Dict] = []
+        for start in range(0, len(unique_keys), BATCH_GET_MAX_KEYS):
+            request = {table_name: {'Keys': unique_keys[start:start + BATCH_GET_MAX_KEYS]}}
+            for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(min(BATCH_GET_BACKOFF_BASE_SECS * (2 ** attempt), BATCH_GET_BACKOFF_MAX_SECS))
+                try:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                except ClientError as e:
+                    self.log('error', f"Error batch getting items from {table_name}: {e}")
+                    break
+                items.extend(response.get('Responses', {}).get(table_name, []))
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+            else:
+                unprocessed = len(request.get(table_name, {}).get('Keys', []))
+                self.log('warning', f"Giving up on {unprocessed} unprocessed keys from {table_name} after {BATCH_GET_MAX_ATTEMPTS} attempts")
+        # Seed the item cache so later get_item()/get_event() calls for these keys are free
+        if items:
+            key_names = list(unique_keys[0])
+            for item in items:
+                self.cache_manager.set_cached_item(table_name, {k: item[k] for k in key_names}, item)
+        return items
+
     def delete_dryrun_recipients(self, campaign_string: str):
         """Delete existing dry run recipient records for a campaign string before beginning a new dry run."""
         try:
-            table = self.dynamodb.Table(DRYRUN_RECIPIENTS_TABLE)
+            table = self._get_table(DRYRUN_RECIPIENTS_TABLE)
             
-            # Check if record exists
-            response = table.get_item(Key={'campaignString': campaign_string})
-            if 'Item' in response:
-                # Record exists, delete it
-                table.delete_item(Key={'campaignString': campaign_string})
-                print(f"Deleted existing dry run recipient record for campaign: {campaign_string}")
+            # Delete unconditionally; the returned old image tells us whether a record existed
+            response = table.delete_item(
+                Key={'campaignString': campaign_string},
+                ReturnValues='ALL_OLD'
+            )
+            if 'Attributes' in response:
+                self.log('debug', f"Deleted existing dry run recipient record for campaign: {campaign_string}")
             else:
                 # No existing record to delete
-                print(f"No existing dry run recipient record found for campaign: {campaign_string}")
+                self.log('debug', f"No existing dry run recipient record found for campaign: {campaign_string}")
         except Exception as e:
-            print(f"Error deleting dry run recipient records for campaign {campaign_string}: {e}")
+            self.log('error', f"Error deleting dry run recipient records for campaign {campaign_string}: {e}")
 
     def append_dryrun_recipient(self, campaign_string: str, entry: dict):
         """Append a recipient to the dryrun_recipients table."""
+        self.append_dryrun_recipients(campaign_string, [entry])
+
+    def append_dryrun_recipients(self, campaign_string: str, entries: List[dict]):
+        """Append recipients to the dryrun_recipients table in one update."""
+        if not entries:
+            return
         try:
-            table = self.dynamodb.Table(DRYRUN_RECIPIENTS_TABLE)
+            table = self._get_table(DRYRUN_RECIPIENTS_TABLE)
             
-            # Try to get existing record
+            # Append to the entries array in place (creating the record if needed)
             try:
-                response = table.get_item(Key={'campaignString': campaign_string})
-                if 'Item' in response:
-                    # Record exists, append to entries array
-                    existing_item = response['Item']
-                    entries = existing_item.get('entries', [])
-                    entries.append(entry)
-                    table.update_item(
-                        Key={'campaignString': campaign_string},
-                        UpdateExpression='SET entries = :entries',
-                        ExpressionAttributeValues={':entries': entries}
-                    )
-                else:
-                    # Record doesn't exist, create new record with entries array
-                    table.put_item(Item={
-                        'campaignString': campaign_string,
-                        'entries': [entry]
-                    })
+                table.update_item(
+                    Key={'campaignString': campaign_string},
+                    UpdateExpression='SET entries = list_append(if_not_exists(entries, :empty), :new)',
+                    ExpressionAttributeValues={':new': entries, ':empty': []}
+                )
             except ClientError as e:
                 if e.response['Error']['Code'] == 'ValidationException':
                     # Table might not exist or have different schema, fall back to old format
-                    table.put_item(Item={
-                        'campaignString': campaign_string,
-                        'recipient': entry,
-                        'timestamp': datetime.utcnow().isoformat()
-                    })
+                    self._put_legacy_recipients(table, campaign_string, entries)
                 else:
                     raise
         except Exception as e:
-            print(f"Error appending dryrun recipient: {e}")
+            self.log('error', f"Error appending dryrun recipient: {e}")
 
     def append_send_recipient(self, campaign_string: str, entry: dict, account: str = None):
         """Append a recipient to the send_recipients table."""
+        self.append_send_recipients(campaign_string, [entry], account)
+
+    def append_send_recipients(self, campaign_string: str, entries: List[dict], account: str = None):
+        """Append recipients to the send_recipients table in one update (and the send log in one batch)."""
+        if not entries:
+            return
         try:
-            table = self.dynamodb.Table(SEND_RECIPIENTS_TABLE)
+            table = self._get_table(SEND_RECIPIENTS_TABLE)
             
-            # Add account to entry if provided
+            # Add account to entries if provided
             if account:
-                entry['account'] = account
+                for entry in entries:
+                    entry['account'] = account
             
-            # Try to get existing record
+            # Append to the entries array in place (creating the record if needed).
+            # lastSendtime lets the 24-hour count skip campaigns with no recent sends.
+            update_expression = 'SET entries = list_append(if_not_exists(entries, :empty), :new)'
+            expression_values = {':new': entries, ':empty': []}
+            sendtimes = [entry['sendtime'] for entry in entries if entry.get('sendtime')]
+            if sendtimes:
+                update_expression += ', lastSendtime = :sendtime'
+                expression_values[':sendtime'] = max(sendtimes)
             try:
-                response = table.get_item(Key={'campaignString': campaign_string})
-                if 'Item' in response:
-                    # Record exists, append to entries array
-                    existing_item = response['Item']
-                    entries = existing_item.get('entries', [])
-                    entries.append(entry)
-                    table.update_item(
-                        Key={'campaignString': campaign_string},
-                        UpdateExpression='SET entries = :entries',
-                        ExpressionAttributeValues={':entries': entries}
-                    )
-                else:
-                    # Record doesn't exist, create new record with entries array
-                    table.put_item(Item={
-                        'campaignString': campaign_string,
-                        'entries': [entry]
-                    })
+                table.update_item(
+                    Key={'campaignString': campaign_string},
+                    UpdateExpression=update_expression,
+                    ExpressionAttributeValues=expression_values
+                )
             except ClientError as e:
                 if e.response['Error']['Code'] == 'ValidationException':
                     # Table might not exist or have different schema, fall back to old format
-                    table.put_item(Item={
-                        'campaignString': campaign_string,
-                        'recipient': entry,
-                        'timestamp': datetime.utcnow().isoformat()
-                    })
+                    self._put_legacy_recipients(table, campaign_string, entries)
                 else:
                     raise
+            
+            if SEND_LOG_TABLE and account and sendtimes:
+                self._append_send_logs(campaign_string, account, sendtimes)
         except Exception as e:
-            print(f"Error appending send recipient: {e}")
+            self.log('error', f"Error appending send recipient: {e}")
+
+    def _put_legacy_recipients(self, table, campaign_string: str, entries: List[dict]):
+        """Write recipients as one item each (the pre-entries-array schema)."""
+        for entry in entries:
+            table.put_item(Item={
+                'campaignString': campaign_string,
+                'recipient': entry,
+                'timestamp': datetime.utcnow().isoformat()
+            })
+
+    def _append_send_logs(self, campaign_string: str, account: str, sendtimes: List[str]):
+        """Record sent emails in the send log used for 24-hour limit counts (batched, 25 per request)."""
+        expires_at = int(time.time()) + SEND_LOG_RETENTION_SECS
+        with self._get_table(SEND_LOG_TABLE).batch_writer() as batch:
+            for sendtime in sendtimes:
+                batch.put_item(Item={
+                    'account': account,
+                    # sendtime sorts chronologically; the suffix keeps same-instant sends distinct
+                    'sendKey': f"{sendtime}#{uuid.uuid4().hex[:8]}",
+                    'sendtime': sendtime,
+                    'campaignString': campaign_string,
+                    'expiresAt': expires_at
+                })
     
     def count_emails_sent_by_account_in_last_24_hours(self, account: str) -> int:
         """
@@ -1000,50 +1374,102 @@ class AWSClient:
             int: Number of emails sent by this account in the last 24 hours
         """
         try:
-            table = self.dynamodb.Table(SEND_RECIPIENTS_TABLE)
-            
             # Calculate the timestamp 24 hours ago
             twenty_four_hours_ago = datetime.now(timezone.utc) - timedelta(hours=24)
             twenty_four_hours_ago_iso = twenty_four_hours_ago.isoformat()
             
-            # Scan the table for all campaign strings
-            count = 0
-            last_evaluated_key = None
+            if SEND_LOG_TABLE and self._send_log_covers(twenty_four_hours_ago):
+                return self._count_send_log(account, twenty_four_hours_ago_iso)
             
-            while True:
-                if last_evaluated_key:
-                    response = table.scan(ExclusiveStartKey=last_evaluated_key)
-                else:
-                    response = table.scan()
-                
-                items = response.get('Items', [])
-                
-                # For each campaign string, check entries for matching account and timestamp
-                for item in items:
-                    entries = item.get('entries', [])
-                    for entry in entries:
-                        # Check if this entry is for the target account
-                        entry_account = entry.get('account')
-                        if entry_account != account:
-                            continue
-                        
-                        # Check if the sendtime is within the last 24 hours
-                        sendtime_str = entry.get('sendtime')
-                        if sendtime_str:
-                            try:
-                                sendtime = datetime.fromisoformat(sendtime_str.replace('Z', '+00:00'))
-                                if sendtime >= twenty_four_hours_ago:
-                                    count += 1
-                            except Exception as e:
-                                print(f"[WARNING] Failed to parse sendtime '{sendtime_str}': {e}")
-                
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
+            # Without a send log covering the whole window, scan every campaign's entries in parallel segments
+            segments = max(1, SCAN_SEGMENTS)
+            if segments == 1:
+                return self._count_recent_sends_segment(account, twenty_four_hours_ago_iso, 0, 1)
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                futures = [
+                    executor.submit(self._count_recent_sends_segment, account, twenty_four_hours_ago_iso, i, segments)
+                    for i in range(segments)
+                ]
+                count = sum(future.result() for future in futures)
             
             return count
             
         except Exception as e:
-            print(f"[ERROR] Failed to count emails for account '{account}': {e}")
+            self.log('error', f"[ERROR] Failed to count emails for account '{account}': {e}")
             # Return 0 to be safe - don't block sends if we can't check the limit
-            return 0 
\ No newline at end of file
+            return 0 
+
+    def _count_recent_sends_segment(self, account: str, since_iso: str, segment: int, total_segments: int) -> int:
+        """Count send-recipient entries for an account since a time within one scan segment."""
+        table = self._get_table(SEND_RECIPIENTS_TABLE)
+        scan_kw: Dict = {
+            'ProjectionExpression': 'entries',
+            # Campaigns whose latest send is older than the window are dropped server-side;
+            # records written before lastSendtime existed are still returned
+            'FilterExpression': Attr('lastSendtime').not_exists() | Attr('lastSendtime').gte(since_iso)
+        }
+        if total_segments > 1:
+            scan_kw['Segment'] = segment
+            scan_kw['TotalSegments'] = total_segments
+        count = 0
+        for response in self._scan_pages_prefetched(table, scan_kw):
+            # For each campaign string, check entries for matching account and timestamp
+            for item in response.get('Items', []):
+                for entry in item.get('entries', []):
+                    if entry.get('account') != account:
+                        continue
+                    
+                    # sendtime is a UTC isoformat() string, so string order is chronological
+                    sendtime_str = entry.get('sendtime')
+                    if isinstance(sendtime_str, str) and sendtime_str >= since_iso:
+                        count += 1
+        return count
+
+    @staticmethod
+    def _scan_pages_prefetched(table, scan_kw: Dict):
+        """
+        Yield scan responses page by page, requesting the next page in the background while
+        the caller processes the current one (the next request only needs LastEvaluatedKey).
+        """
+        scan_kw = dict(scan_kw)
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            future = prefetch.submit(table.scan, **scan_kw)
+            while future is not None:
+                response = future.result()
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if last_evaluated_key:
+                    scan_kw['ExclusiveStartKey'] = last_evaluated_key
+                    future = prefetch.submit(table.scan, **scan_kw)
+                else:
+                    future = None
+                yield response
+
+    def _send_log_covers(self, since: datetime) -> bool:
+        """True if every send since `since` is in the send log, i.e. SEND_LOG_START is no later."""
+        if not SEND_LOG_START:
+            return False
+        try:
+            start = datetime.fromisoformat(SEND_LOG_START)
+        except ValueError:
+            self.log('warning', f"Ignoring SEND_LOG_START, not an ISO timestamp: {SEND_LOG_START}")
+            return False
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        return start <= since
+
+    def _count_send_log(self, account: str, since_iso: str) -> int:
+        """Count send log items for an account since a timestamp with a server-side COUNT query."""
+        table = self._get_table(SEND_LOG_TABLE)
+        query_kw = {
+            'KeyConditionExpression': Key('account').eq(account) & Key('sendKey').gte(since_iso),
+            'Select': 'COUNT'
+        }
+        count = 0
+        while True:
+            response = table.query(**query_kw)
+            count += response['Count']
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_kw['ExclusiveStartKey'] = last_evaluated_key
+        return count
@@ -1,5 +1,4 @@
 import os
-import boto3
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
@@ -16,8 +15,10 @@ else:
 
 # Configure logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# getLevelName maps a known name to its number; anything else falls back to INFO
+_log_level = logging.getLevelName(LOG_LEVEL.upper())
 logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
+    level=_log_level if isinstance(_log_level, int) else logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
@@ -33,23 +34,6 @@ EMAIL_FROM = os.getenv('EMAIL_FROM', 'noreply@example.com')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 AWS_PROFILE = os.getenv('AWS_PROFILE', 'default')
 
-# Get AWS credentials - try profile first, then fall back to IAM role
-try:
-    session = boto3.Session(profile_name=AWS_PROFILE)
-    credentials = session.get_credentials()
-    if credentials:
-        AWS_ACCESS_KEY_ID = credentials.access_key
-        AWS_SECRET_ACCESS_KEY = credentials.secret_key
-    else:
-        # No credentials in profile, will use IAM role or environment variables
-        AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-        AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-except Exception as e:
-    print(f"Warning: Could not load AWS credentials from profile '{AWS_PROFILE}': {e}")
-    print("Falling back to IAM role or environment variables")
-    AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-    AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-
 # DynamoDB configuration
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'email-work-orders')
 WORK_ORDERS_TABLE = os.getenv('WORK_ORDERS_TABLE')
@@ -62,12 +46,21 @@ EMAIL_ACCOUNT_CREDENTIALS_TABLE = os.getenv('EMAIL_ACCOUNT_CREDENTIALS_TABLE', '
 DRYRUN_RECIPIENTS_TABLE = os.getenv('DRYRUN_RECIPIENTS_TABLE')
 SEND_RECIPIENTS_TABLE = os.getenv('SEND_RECIPIENTS_TABLE')
 OFFERING_TRANSACTIONS_TABLE = os.getenv('OFFERING_TRANSACTIONS_TABLE', 'offering-transactions')
+# Optional: one item per sent email (account + sendKey) used for 24-hour send limit counts.
+# When unset the send recipients table is scanned instead.
+SEND_LOG_TABLE = os.getenv('SEND_LOG_TABLE')
+# ISO timestamp from which every send has been written to SEND_LOG_TABLE. Counts come from the
+# send log only once this is at least 24 hours old; until then (or when unset) the scan is used.
+SEND_LOG_START = os.getenv('SEND_LOG_START')
 
 # SQS configuration
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL')
 
 # WebSocket configuration
 WEBSOCKET_API_URL = os.getenv('WEBSOCKET_API_URL')
+# Optional: API Gateway Management API endpoint (https://{api-id}.execute-api.{region}.amazonaws.com/{stage}).
+# When unset it is derived from WEBSOCKET_API_URL.
+WEBSOCKET_MANAGEMENT_URL = os.getenv('WEBSOCKET_MANAGEMENT_URL')
 
 # S3 configuration
 S3_BUCKET = os.getenv('S3_BUCKET')
@@ -95,6 +88,8 @@ EMAIL_BURST_SIZE = int(os.getenv('EMAIL_BURST_SIZE', '10'))
 EMAIL_RECOVERY_SLEEP_SECS = int(os.getenv('EMAIL_RECOVERY_SLEEP_SECS', '60'))
 EMAIL_CONTINUOUS_SLEEP_SECS = int(os.getenv('EMAIL_CONTINUOUS_SLEEP_SECS', '600'))
 SMTP_24_HOUR_SEND_LIMIT = int(os.getenv('SMTP_24_HOUR_SEND_LIMIT', '1500'))
+# Number of students whose emails are sent concurrently (each worker holds its own SMTP session)
+SEND_WORKERS = max(1, int(os.getenv('SEND_WORKERS', '8')))
 
 # Cache configuration
 CACHE_REFRESH_INTERVAL_SECS = int(os.getenv('CACHE_REFRESH_INTERVAL_SECS', '600'))  # 10 minutes default
@@ -102,8 +97,8 @@ CACHE_REFRESH_INTERVAL_SECS = int(os.getenv('CACHE_REFRESH_INTERVAL_SECS', '600'
 # Email templates configuration
 TEMPLATES_DIR = os.getenv('TEMPLATES_DIR', str(Path(__file__).parent / 'templates'))
 
-# Required environment variables
-REQUIRED_ENV_VARS = [
+# Required environment variables (checked once, by validate_config below)
+REQUIRED_ENV_VARS = (
     'AWS_PROFILE',
     'SQS_QUEUE_URL',
     'WEBSOCKET_API_URL',
@@ -122,20 +117,13 @@ REQUIRED_ENV_VARS = [
     'PROMPTS_TABLE',
     'DRYRUN_RECIPIENTS_TABLE',
     'SEND_RECIPIENTS_TABLE'
-]
+)
 
 def validate_config():
     """Validate that all required environment variables are set"""
     missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
     if missing_vars:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-    
-    # Validate AWS credentials - be more flexible for IAM roles
-    if not AWS_ACCESS_KEY_ID or not AWS_SECRET_ACCESS_KEY:
-        print(f"Warning: AWS credentials not found in profile '{AWS_PROFILE}' or environment variables.")
-        print("This is expected when using IAM roles on EC2 instances.")
-        print("AWS SDK will automatically use instance metadata service for credentials.")
-        # Don't raise an error here - let boto3 handle credential resolution
 
 # Validate configuration on import
 validate_config()
@@ -144,44 +132,18 @@ validate_config()
 POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '5'))  # seconds
 STOP_CHECK_INTERVAL = int(os.getenv('STOP_CHECK_INTERVAL', '1'))  # seconds
 
-# Mailchimp Configuration
-MAILCHIMP_API_KEY = os.getenv('MAILCHIMP_API_KEY')
-MAILCHIMP_AUDIENCE = os.getenv('MAILCHIMP_AUDIENCE')
-MAILCHIMP_REPLY_TO = os.getenv('MAILCHIMP_REPLY_TO')
-MAILCHIMP_SERVER_PREFIX = os.getenv('MAILCHIMP_SERVER_PREFIX')
-
-# Validate required environment variables
-required_vars = [
-    # AWS Configuration
-    'WORK_ORDERS_TABLE',
-    'CONNECTIONS_TABLE',
-    'SQS_QUEUE_URL',
-    'WEBSOCKET_API_URL',
-    'S3_BUCKET',
-    # Mailchimp Configuration
-    'MAILCHIMP_API_KEY',
-    'MAILCHIMP_AUDIENCE',
-    'MAILCHIMP_REPLY_TO',
-    'MAILCHIMP_SERVER_PREFIX',
-    'DRYRUN_RECIPIENTS_TABLE',
-    'SEND_RECIPIENTS_TABLE'
-]
-
-missing_vars = [var for var in required_vars if not os.getenv(var)]
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
 class AppConfig(BaseModel):
     """
     Pydantic model for application configuration.
-    Loads settings from environment variables.
+    Built from the module-level settings above, which have already been read and validated.
     """
     aws_region: str = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
-    work_orders_table: str = os.environ.get("WORK_ORDERS_TABLE")
-    sqs_queue_url: str = os.environ.get("SQS_QUEUE_URL")
-    websocket_api_url: Optional[str] = os.environ.get("WEBSOCKET_API_URL")
-    connections_table: str = os.environ.get("CONNECTIONS_TABLE")
-    events_table: str = os.environ.get("EVENTS_TABLE", "events")
+    work_orders_table: str = WORK_ORDERS_TABLE
+    sqs_queue_url: str = SQS_QUEUE_URL
+    websocket_api_url: Optional[str] = WEBSOCKET_API_URL
+    connections_table: str = CONNECTIONS_TABLE
+    events_table: str = EVENTS_TABLE
     openai_api_key: Optional[str] = os.environ.get("OPENAI_API_KEY")
 
     class Config:
@@ -191,15 +153,6 @@ class AppConfig(BaseModel):
 # Create a single config instance to be used throughout the application.
 config = AppConfig()
 
-# Validate that required variables are loaded.
-required_attributes = ['work_orders_table', 'sqs_queue_url', 'connections_table']
-missing_vars = [attr for attr in required_attributes if not getattr(config, attr)]
-
-if missing_vars:
-    # We report the uppercase version of the attribute name to match the .env file convention.
-    missing_env_vars = [v.upper() for v in missing_vars]
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_env_vars)}")
-
 print("Configuration loaded successfully:")
 print(f"  - SQS Queue URL: {'*' * 10 if config.sqs_queue_url else 'Not set'}")
 print(f"  - Work Orders Table: {config.work_orders_table}")
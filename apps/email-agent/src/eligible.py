@@ -5,7 +5,8 @@
 @description Utility function to check student eligibility based on pool definitions.
 """
 
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 
 
 def _iter_installment_amounts_raw(installments: Any) -> float:
@@ -157,6 +158,434 @@ def subevent_has_offering_activity(sub_entry: Any) -> bool:
     return _sum_installment_payments_cents(inst) > 0
 
 
+# How often (in evaluations) a pooland attribute reconsiders which child to check first
+POOLAND_REORDER_INTERVAL = 64
+
+# Shared read-only default for missing student data, so predicates don't allocate a {} per miss
+_EMPTY = MappingProxyType({})
+
+
+class _Evaluation:
+    """Per-student state shared by the compiled predicates during one check_eligibility call."""
+    __slots__ = ('compiled', 'student', 'programs', 'aid', 'subevent', 'event', 'memo',
+                 'current_program', 'current_subevent_data')
+
+    def __init__(self, compiled, student_data, current_aid, current_subevent, event_context):
+        self.compiled = compiled
+        self.student = student_data
+        self.programs = student_data.get('programs', _EMPTY)
+        self.aid = current_aid
+        self.subevent = current_subevent
+        self.event = event_context
+        self.memo: Dict[str, bool] = {}
+        # The current event's program and subevent history, shared by every currentevent* attribute
+        self.current_program = self.programs.get(current_aid) or {}
+        self.current_subevent_data = (self.current_program.get('offeringHistory') or _EMPTY).get(current_subevent)
+
+    def check(self, pool_name: str) -> bool:
+        """Evaluate a pool for this student, at most once per evaluation."""
+        memo = self.memo
+        if pool_name not in memo:
+            predicate = self.compiled.get(pool_name)
+            if predicate is None:
+                # Remember the miss so it is reported once per pools list, not once per student
+                predicate = self.compiled[pool_name] = _warn_once(
+                    f"Eligibility check failed: Pool definition not found for name: {pool_name} in context AID: {self.aid}"
+                )
+            memo[pool_name] = predicate(self)
+        return memo[pool_name]
+
+
+def _warn_once(message: str) -> Callable[[_Evaluation], bool]:
+    """Predicate that is never eligible and prints its warning only the first time it runs."""
+    reported = []
+
+    def predicate(ev):
+        if not reported:
+            reported.append(True)
+            print(message)
+        return False
+    return predicate
+
+
+def _malformed(pool_name: str, attr_type: str, field: str, attr: Dict[str, Any]) -> Callable[[_Evaluation], bool]:
+    """Predicate that raises the same error the interpreter used to raise when the attribute is reached."""
+    message = f"Pool '{pool_name}' has a malformed '{attr_type}' type attribute missing required '{field}' field. Attribute data: {attr}"
+
+    def predicate(ev):
+        raise ValueError(message)
+    predicate.malformed = True
+    return predicate
+
+
+# Each compiler turns one attribute of its type into a predicate over an _Evaluation.
+# Signature: (pool_name, attr) -> predicate.
+
+def _compile_true(pool_name, attr):
+    return lambda ev: True
+
+
+def _compile_pool_ref(pool_name, attr):
+    if 'name' not in attr:
+        return _malformed(pool_name, 'pool', 'name', attr)
+    name = attr['name']
+    return lambda ev: ev.check(name)
+
+
+def _compile_pooldiff(pool_name, attr):
+    if 'inpool' not in attr:
+        return _malformed(pool_name, 'pooldiff', 'inpool', attr)
+    if 'outpool' not in attr:
+        return _malformed(pool_name, 'pooldiff', 'outpool', attr)
+    inpool, outpool = attr['inpool'], attr['outpool']
+    return lambda ev: ev.check(inpool) and not ev.check(outpool)
+
+
+def _compile_pooland(pool_name, attr):
+    if 'pool1' not in attr:
+        return _malformed(pool_name, 'pooland', 'pool1', attr)
+    if 'pool2' not in attr:
+        return _malformed(pool_name, 'pooland', 'pool2', attr)
+    # Children are evaluated in the order that has most often failed fast so far this run:
+    # every POOLAND_REORDER_INTERVAL calls, the child with the higher false rate goes first.
+    order = [attr['pool1'], attr['pool2']]
+    evaluated = dict.fromkeys(order, 0)
+    falses = dict.fromkeys(order, 0)
+    calls = [0]
+
+    def false_rate(name):
+        return falses[name] / evaluated[name] if evaluated[name] else 0.0
+
+    def pool_and(ev):
+        nonlocal order
+        result = True
+        for name in order:
+            evaluated[name] += 1
+            if not ev.check(name):
+                falses[name] += 1
+                result = False
+                break
+        calls[0] += 1
+        if calls[0] % POOLAND_REORDER_INTERVAL == 0 and false_rate(order[1]) > false_rate(order[0]):
+            # Rebind rather than reverse in place: another send thread may be iterating the old list
+            order = [order[1], order[0]]
+        return result
+    return pool_and
+
+
+def _compile_practice(pool_name, attr):
+    field = attr.get('field')
+    return lambda ev: bool(ev.student.get('practice', _EMPTY).get(field))
+
+
+def _compile_offering(pool_name, attr):
+    aid = attr.get('aid')
+    subevent = attr.get('subevent')
+    if subevent == 'any':
+        # Any offering in any subevent for this program
+        def offering_any(ev):
+            program = ev.programs.get(aid, _EMPTY)
+            offering_history = program.get('offeringHistory', _EMPTY)
+            return (any(subevent_has_offering_activity(entry) for entry in offering_history.values())
+                    and not bool(program.get('withdrawn')))
+        return offering_any
+
+    # Specific subevent (classic SKU or installments)
+    def offering(ev):
+        program = ev.programs.get(aid, _EMPTY)
+        subevent_data = program.get('offeringHistory', _EMPTY).get(subevent)
+        return subevent_has_offering_activity(subevent_data) and not bool(program.get('withdrawn'))
+    return offering
+
+
+def _compile_currenteventoffering(pool_name, attr):
+    def current_offering(ev):
+        return subevent_has_offering_activity(ev.current_subevent_data) and not bool(ev.current_program.get('withdrawn'))
+    return current_offering
+
+
+def _compile_currenteventtest(pool_name, attr):
+    return lambda ev: bool(ev.current_program.get('test'))
+
+
+def _compile_currenteventnotoffering(pool_name, attr):
+    return lambda ev: not subevent_has_offering_activity(ev.current_subevent_data)
+
+
+def _compile_currenteventminimumdue(pool_name, attr):
+    return lambda ev: _currentevent_installments_paid_lt_threshold(ev.current_program, ev.event, 'minimum')
+
+
+def _compile_currenteventbalancedue(pool_name, attr):
+    return lambda ev: _currentevent_installments_paid_lt_threshold(ev.current_program, ev.event, 'balance')
+
+
+def _compile_offeringandpools(pool_name, attr):
+    if 'aid' not in attr:
+        return _malformed(pool_name, 'offeringandpools', 'aid', attr)
+    if 'subevent' not in attr:
+        return _malformed(pool_name, 'offeringandpools', 'subevent', attr)
+    aid = attr.get('aid')
+    subevent = attr.get('subevent')
+    pools = attr.get('pools', [])
+
+    def offering_and_pools(ev):
+        offering_history = ev.programs.get(aid, _EMPTY).get('offeringHistory', _EMPTY)
+        if not subevent_has_offering_activity(offering_history.get(subevent)):
+            return False
+        return any(ev.check(p) for p in pools)
+    return offering_and_pools
+
+
+def _compile_program_flag(flag):
+    """Compiler for attributes that test one boolean on the program named by the attribute's aid."""
+    def compile_flag(pool_name, attr):
+        aid = attr.get('aid')
+        return lambda ev: bool(ev.programs.get(aid, _EMPTY).get(flag))
+    return compile_flag
+
+
+def _compile_current_program_flag(flag):
+    """Compiler for attributes that test one boolean on the current event's program."""
+    def compile_flag(pool_name, attr):
+        return lambda ev: bool(ev.current_program.get(flag))
+    return compile_flag
+
+
+def _compile_currenteventaccepted(pool_name, attr):
+    def current_accepted(ev):
+        program = ev.current_program
+        return bool(program.get('accepted')) and not bool(program.get('withdrawn'))
+    return current_accepted
+
+
+def _compile_currenteventnotjoin(pool_name, attr):
+    return lambda ev: not bool(ev.current_program.get('join'))
+
+
+def _has_prefixed_key(mapping: Dict[str, Any], prefix: Any, prefix_len: Optional[int], value_ok) -> bool:
+    """
+    True if any key of mapping starts with prefix and value_ok(value). prefix_len is len(prefix),
+    computed once at compile time; None means prefix isn't a string, in which case
+    str.startswith is used so malformed pools fail exactly as before.
+    """
+    if prefix_len is None:
+        return any(key.startswith(prefix) and value_ok(value) for key, value in mapping.items())
+    return any(key[:prefix_len] == prefix and value_ok(value) for key, value in mapping.items())
+
+
+def _prefix_len(prefix: Any) -> Optional[int]:
+    return len(prefix) if isinstance(prefix, str) else None
+
+
+def _compile_joinwhich(pool_name, attr):
+    aid = attr.get('aid')
+    retreat = attr.get('retreat')
+    retreat_len = _prefix_len(retreat)
+
+    def join_which(ev):
+        program = ev.programs.get(aid, _EMPTY)
+        if not (program.get('join') and not program.get('withdrawn') and program.get('whichRetreats')):
+            return False
+        return _has_prefixed_key(program['whichRetreats'], retreat, retreat_len, bool)
+    join_which.malformed = retreat_len is None
+    return join_which
+
+
+def _compile_offeringwhich(pool_name, attr):
+    aid = attr.get('aid')
+    retreat = attr.get('retreat')
+    subevent = attr.get('subevent')
+    retreat_len = _prefix_len(retreat)
+    subevent_len = _prefix_len(subevent)
+
+    def offering_which(ev):
+        program = ev.programs.get(aid, _EMPTY)
+        if not (program.get('join') and not program.get('withdrawn') and program.get('whichRetreats')):
+            return False
+        # First check: verify the retreat is in whichRetreats and is truthy
+        if not _has_prefixed_key(program['whichRetreats'], retreat, retreat_len, bool):
+            return False
+
+        # Second check: verify offering exists for the subevent (independent of whichRetreats)
+        offering_history = program.get('offeringHistory')
+        if not offering_history:
+            return False
+        return _has_prefixed_key(offering_history, subevent, subevent_len, subevent_has_offering_activity)
+    offering_which.malformed = retreat_len is None or subevent_len is None
+    return offering_which
+
+
+def _compile_specified_aid_bool(pool_name, attr):
+    aid = attr.get('aid')
+    bool_name = attr.get('boolName')
+    if aid is None:
+        return _malformed(pool_name, 'specifiedAIDBool', 'aid', attr)
+    if bool_name is None:
+        return _malformed(pool_name, 'specifiedAIDBool', 'boolName', attr)
+    return lambda ev: bool(ev.programs.get(aid, _EMPTY).get(bool_name))
+
+
+# Attribute type -> compiler. Adding a new attribute type means adding one entry here.
+ATTRIBUTE_COMPILERS: Dict[str, Callable[[str, Dict[str, Any]], Callable[[_Evaluation], bool]]] = {
+    'true': _compile_true,
+    'pool': _compile_pool_ref,
+    'pooldiff': _compile_pooldiff,
+    'pooland': _compile_pooland,
+    'practice': _compile_practice,
+    'offering': _compile_offering,
+    'currenteventoffering': _compile_currenteventoffering,
+    'currenteventtest': _compile_currenteventtest,
+    'currenteventnotoffering': _compile_currenteventnotoffering,
+    'currenteventminimumdue': _compile_currenteventminimumdue,
+    'currenteventbalancedue': _compile_currenteventbalancedue,
+    'offeringandpools': _compile_offeringandpools,
+    'oath': _compile_program_flag('oath'),
+    'attended': _compile_program_flag('attended'),
+    'join': _compile_program_flag('join'),
+    'currenteventjoin': _compile_current_program_flag('join'),
+    'currenteventmanualinclude': _compile_current_program_flag('manualInclude'),
+    'currenteventaccepted': _compile_currenteventaccepted,
+    'currenteventnotjoin': _compile_currenteventnotjoin,
+    'joinwhich': _compile_joinwhich,
+    'offeringwhich': _compile_offeringwhich,
+    'eligible': _compile_current_program_flag('eligible'),
+    'specifiedAIDBool': _compile_specified_aid_bool,
+}
+
+
+# Relative evaluation cost per attribute type, used to order a pool's attributes.
+# Flag lookups are cheapest; attributes that recurse into other pools are the most expensive.
+ATTRIBUTE_COSTS: Dict[str, int] = {
+    'true': 0,
+    'practice': 1, 'oath': 1, 'attended': 1, 'join': 1, 'eligible': 1, 'specifiedAIDBool': 1,
+    'currenteventjoin': 1, 'currenteventnotjoin': 1, 'currenteventmanualinclude': 1,
+    'currenteventaccepted': 1, 'currenteventtest': 1,
+    'offering': 2, 'currenteventoffering': 2, 'currenteventnotoffering': 2,
+    'joinwhich': 2, 'offeringwhich': 2,
+    'currenteventminimumdue': 3, 'currenteventbalancedue': 3,
+    'pool': 4,
+    'pooldiff': 5, 'pooland': 5, 'offeringandpools': 5,
+}
+ATTRIBUTE_COST_DEFAULT = 1
+
+
+def _compile_attribute(pool_name: str, attr: Dict[str, Any]) -> Callable[[_Evaluation], bool]:
+    """Translate one pool attribute into a predicate over an _Evaluation."""
+    attr_type = attr.get('type')
+    compiler = ATTRIBUTE_COMPILERS.get(attr_type)
+    if compiler is None:
+        return _warn_once(f"UNKNOWN POOL ATTRIBUTE TYPE encountered: {pool_name} {attr_type}")
+    return compiler(pool_name, attr)
+
+
+def _compile_pool(pool_name: str, attributes: List[Tuple[Callable[[_Evaluation], bool], Dict[str, Any]]],
+                  keep_order: bool) -> Callable[[_Evaluation], bool]:
+    """A pool is eligible if any of its attributes is."""
+    if not attributes:
+        return _warn_once(f"Eligibility check warning: Pool has no attributes defined: {pool_name}")
+
+    if not keep_order:
+        # Attributes are OR-ed and side-effect free, so evaluate the cheap ones first; the stable
+        # sort keeps the configured order within a cost class.
+        attributes = sorted(attributes, key=lambda pair: ATTRIBUTE_COSTS.get(pair[1].get('type'), ATTRIBUTE_COST_DEFAULT))
+    predicates = tuple(attr_predicate for attr_predicate, _ in attributes)
+
+    def predicate(ev):
+        for attr_predicate in predicates:
+            if attr_predicate(ev):
+                return True
+        return False
+    return predicate
+
+
+def _pool_references(attr: Dict[str, Any]) -> List[str]:
+    """Names of the pools an attribute refers to (pool, pooldiff, pooland, offeringandpools)."""
+    attr_type = attr.get('type')
+    if attr_type == 'pool':
+        refs = [attr.get('name')]
+    elif attr_type == 'pooldiff':
+        refs = [attr.get('inpool'), attr.get('outpool')]
+    elif attr_type == 'pooland':
+        refs = [attr.get('pool1'), attr.get('pool2')]
+    elif attr_type == 'offeringandpools':
+        refs = attr.get('pools') or []
+    else:
+        return []
+    return [ref for ref in refs if isinstance(ref, str)]
+
+
+def _pools_keeping_order(attributes: Dict[str, List[Tuple[Callable[[_Evaluation], bool], Dict[str, Any]]]]) -> Set[str]:
+    """
+    Names of the pools whose attributes must be evaluated in configured order: pools with a
+    malformed attribute, pools on a reference cycle, and pools that refer to either. Whether
+    those raise depends on which attribute is reached first, so reordering would change results.
+    """
+    keep: Dict[str, Optional[bool]] = {}
+
+    def visit(name):
+        if name in keep:
+            # None means the pool is still being visited, i.e. it is on a reference cycle
+            return keep[name] is not False
+        keep[name] = None
+        result = False
+        for attr_predicate, attr in attributes[name]:
+            if getattr(attr_predicate, 'malformed', False):
+                result = True
+            for ref in _pool_references(attr):
+                if ref in attributes and visit(ref):
+                    result = True
+        keep[name] = result
+        return result
+
+    return {name for name in attributes if visit(name)}
+
+
+def compile_pools(all_pools_data: List[Dict[str, Any]]) -> Dict[str, Callable[[_Evaluation], bool]]:
+    """
+    Compile pool definitions into predicates keyed by pool name.
+
+    Attribute types are dispatched and required fields validated here, once, instead of on
+    every (student, pool) evaluation. Malformed attributes compile to predicates that raise
+    the usual ValueError when reached. The first definition of a duplicated name wins.
+    """
+    attributes = {}
+    for pool in all_pools_data:
+        name = pool.get('name')
+        if name not in attributes:
+            attributes[name] = [(_compile_attribute(name, attr), attr) for attr in pool.get('attributes') or []]
+    keep_order = _pools_keeping_order(attributes)
+    return {name: _compile_pool(name, pool_attributes, name in keep_order)
+            for name, pool_attributes in attributes.items()}
+
+
+# Pools list and its compiled predicates from the most recent call; the pools list comes
+# from the table cache and is shared by every student in a run.
+_compiled_pools = (None, None)
+
+# Evaluation (and its pool results) for the most recently checked student. The step loops check
+# one student at a time, often several pools per student (the pool itself, the stage filter,
+# #if oathed in the template), so results are reused until a different student comes along.
+# The evaluation holds a reference to the student dict, so identity checks against it are safe.
+_last_evaluation: Optional[_Evaluation] = None
+
+
+def clear_eligibility_cache():
+    """Forget memoized pool results (e.g. after student data has been changed in place)."""
+    global _last_evaluation
+    _last_evaluation = None
+
+
+def _get_compiled_pools(all_pools_data: List[Dict[str, Any]]) -> Dict[str, Callable[[_Evaluation], bool]]:
+    global _compiled_pools
+    pools, compiled = _compiled_pools
+    if pools is not all_pools_data:
+        compiled = compile_pools(all_pools_data)
+        _compiled_pools = (all_pools_data, compiled)
+        clear_eligibility_cache()
+    return compiled
+
+
 def check_eligibility(
     pool_name: str,
     student_data: Dict[str, Any],
@@ -167,7 +596,8 @@ def check_eligibility(
 ) -> bool:
     """
     Checks if a student is eligible for content based on pool definitions.
-    Recursive function to handle nested pool logic.
+    Pool results are memoized for the current student, so nested pool references and
+    repeated checks of the same student are evaluated once.
 
     Args:
         pool_name: The name of the eligibility pool to check.
@@ -184,186 +614,10 @@ def check_eligibility(
         print(f"Eligibility check error: Expected all_pools_data to be a list, but received: {type(all_pools_data)} {all_pools_data}")
         return False
 
-    pool = next((p for p in all_pools_data if p.get('name') == pool_name), None)
-    if not pool:
-        print(f"Eligibility check failed: Pool definition not found for name: {pool_name} in context AID: {current_aid}")
-        return False
-
-    if not pool.get('attributes') or len(pool['attributes']) == 0:
-        print(f"Eligibility check warning: Pool has no attributes defined: {pool_name}")
-        return False
-
-    # Check each attribute rule within the pool
-    for attr in pool['attributes']:
-        is_eligible = False
-
-        attr_type = attr.get('type')
-        if attr_type == 'true':
-            is_eligible = True
-        elif attr_type == 'pool':
-            # Validate that 'name' field exists
-            if 'name' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'pool' type attribute missing required 'name' field. Attribute data: {attr}")
-            is_eligible = check_eligibility(attr['name'], student_data, current_aid, all_pools_data, current_subevent, event_context)
-        elif attr_type == 'pooldiff':
-            # Validate required fields
-            if 'inpool' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'pooldiff' type attribute missing required 'inpool' field. Attribute data: {attr}")
-            if 'outpool' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'pooldiff' type attribute missing required 'outpool' field. Attribute data: {attr}")
-            is_eligible = (check_eligibility(attr['inpool'], student_data, current_aid, all_pools_data, current_subevent, event_context) and
-                          not check_eligibility(attr['outpool'], student_data, current_aid, all_pools_data, current_subevent, event_context))
-        elif attr_type == 'pooland':
-            # Validate required fields
-            if 'pool1' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'pooland' type attribute missing required 'pool1' field. Attribute data: {attr}")
-            if 'pool2' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'pooland' type attribute missing required 'pool2' field. Attribute data: {attr}")
-            is_eligible = (check_eligibility(attr['pool1'], student_data, current_aid, all_pools_data, current_subevent, event_context) and
-                          check_eligibility(attr['pool2'], student_data, current_aid, all_pools_data, current_subevent, event_context))
-        elif attr_type == 'practice':
-            field = attr.get('field')
-            is_eligible = bool(student_data.get('practice', {}).get(field))
-        elif attr_type == 'offering':
-            aid = attr.get('aid')
-            subevent = attr.get('subevent')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            offering_history = program.get('offeringHistory', {})
-            if subevent == 'any':
-                # Check if student has any offering in any subevent for this program
-                is_eligible = False
-                for subevent_key in offering_history.keys():
-                    subevent_data = offering_history.get(subevent_key, {})
-                    if subevent_has_offering_activity(subevent_data):
-                        is_eligible = True
-                        break
-                is_eligible = is_eligible and not bool(program.get('withdrawn'))
-            else:
-                # Check specific subevent (classic SKU or installments)
-                subevent_data = offering_history.get(subevent, {})
-                is_eligible = subevent_has_offering_activity(subevent_data) and not bool(program.get('withdrawn'))
-        elif attr_type == 'currenteventoffering':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            offering_history = program.get('offeringHistory', {})
-            subevent_data = offering_history.get(current_subevent, {})
-            is_eligible = subevent_has_offering_activity(subevent_data) and not bool(program.get('withdrawn'))
-        elif attr_type == 'currenteventtest':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = program.get('test', {})
-        elif attr_type == 'currenteventnotoffering':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            offering_history = program.get('offeringHistory', {})
-            subevent_data = offering_history.get(current_subevent, {})
-            is_eligible = not subevent_has_offering_activity(subevent_data)
-        elif attr_type == 'currenteventminimumdue':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = _currentevent_installments_paid_lt_threshold(program, event_context, 'minimum')
-        elif attr_type == 'currenteventbalancedue':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = _currentevent_installments_paid_lt_threshold(program, event_context, 'balance')
-        elif attr_type == 'offeringandpools':
-            # Validate required fields
-            if 'aid' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'offeringandpools' type attribute missing required 'aid' field. Attribute data: {attr}")
-            if 'subevent' not in attr:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'offeringandpools' type attribute missing required 'subevent' field. Attribute data: {attr}")
-            aid = attr.get('aid')
-            subevent = attr.get('subevent')
-            pools = attr.get('pools', [])
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            offering_history = program.get('offeringHistory', {})
-            if subevent_has_offering_activity(offering_history.get(subevent)):
-                is_eligible = any(check_eligibility(p, student_data, current_aid, all_pools_data, current_subevent, event_context) for p in pools)
-        elif attr_type == 'oath':
-            aid = attr.get('aid')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            is_eligible = bool(program.get('oath'))
-        elif attr_type == 'attended':
-            aid = attr.get('aid')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            is_eligible = bool(program.get('attended'))
-        elif attr_type == 'join':
-            aid = attr.get('aid')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            is_eligible = bool(program.get('join'))   
-        elif attr_type == 'currenteventjoin':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = bool(program.get('join'))   
-        elif attr_type == 'currenteventmanualinclude':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = bool(program.get('manualInclude'))
-        elif attr_type == 'currenteventaccepted':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = bool(program.get('accepted')) and not bool(program.get('withdrawn')) 
-        elif attr_type == 'currenteventnotjoin':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = not bool(program.get('join'))
-        elif attr_type == 'joinwhich':
-            aid = attr.get('aid')
-            retreat = attr.get('retreat')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            if (program.get('join') and 
-                not program.get('withdrawn') and 
-                program.get('whichRetreats')):
-                which_retreats = program['whichRetreats']
-                keys = list(which_retreats.keys())
-                is_eligible = any(key.startswith(retreat) and which_retreats[key] for key in keys)
-        elif attr_type == 'offeringwhich':
-            aid = attr.get('aid')
-            retreat = attr.get('retreat')
-            subevent = attr.get('subevent')
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            if (program.get('join') and 
-                not program.get('withdrawn') and 
-                program.get('whichRetreats')):
-                # First check: verify the retreat is in whichRetreats and is truthy
-                which_retreats = program['whichRetreats']
-                retreat_keys = list(which_retreats.keys())
-                has_retreat = any(key.startswith(retreat) and which_retreats[key] for key in retreat_keys)
-                
-                # Second check: verify offering exists for the subevent (independent of whichRetreats)
-                if has_retreat and program.get('offeringHistory'):
-                    offering_history = program['offeringHistory']
-                    offering_keys = list(offering_history.keys())
-                    is_eligible = any(
-                        key.startswith(subevent) and subevent_has_offering_activity(offering_history[key])
-                        for key in offering_keys
-                    )
-        elif attr_type == 'eligible':
-            programs = student_data.get('programs', {})
-            program = programs.get(current_aid, {})
-            is_eligible = bool(program.get('eligible'))
-        elif attr_type == 'specifiedAIDBool':
-            aid = attr.get('aid')
-            bool_name = attr.get('boolName')
-            if aid is None:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'specifiedAIDBool' type attribute missing required 'aid' field. Attribute data: {attr}")
-            if bool_name is None:
-                raise ValueError(f"Pool '{pool_name}' has a malformed 'specifiedAIDBool' type attribute missing required 'boolName' field. Attribute data: {attr}")
-            programs = student_data.get('programs', {})
-            program = programs.get(aid, {})
-            is_eligible = bool(program.get(bool_name))
-        else:
-            print(f"UNKNOWN POOL ATTRIBUTE TYPE encountered: {pool_name} {attr_type}")
-            is_eligible = False
-
-        if is_eligible:
-            return True
-
-    return False 
\ No newline at end of file
+    global _last_evaluation
+    compiled = _get_compiled_pools(all_pools_data)
+    ev = _last_evaluation
+    if (ev is None or ev.student is not student_data or ev.compiled is not compiled
+            or ev.aid != current_aid or ev.subevent != current_subevent or ev.event is not event_context):
+        ev = _last_evaluation = _Evaluation(compiled, student_data, current_aid, current_subevent, event_context)
+    return ev.check(pool_name)
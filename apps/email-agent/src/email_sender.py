@@ -8,6 +8,7 @@ import re
 import time
 import sys
 import os
+import threading
 import hmac
 import html as html_escape
 from decimal import Decimal, InvalidOperation
@@ -26,9 +27,146 @@ from .config import (
 from .prompts import prompt_lookup
 from .eligible import check_eligibility, apply_installments_limit_fee_selected, _installments_paid_cents
 from .steps.shared import code_to_full_language
+from .aws_client import BOTO_CFG
 
-# Cache for email account credentials to avoid repeated DynamoDB calls
+# Cache for email account credentials to avoid repeated DynamoDB calls, keyed by resolved account name
 _credentials_cache = {}
+# Guards cache misses and insertions when students are sent from several threads
+_credentials_lock = threading.Lock()
+
+# DynamoDB resource and table handle for credential lookups, created on first use
+_credentials_dynamodb = None
+_credentials_table = None
+
+
+def _get_credentials_table():
+    """Return the shared email-account-credentials Table, creating it on first use."""
+    global _credentials_dynamodb, _credentials_table
+    if _credentials_table is None:
+        _credentials_dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION, config=BOTO_CFG)
+        _credentials_table = _credentials_dynamodb.Table(EMAIL_ACCOUNT_CREDENTIALS_TABLE)
+    return _credentials_table
+
+
+# Accounts that send from a per-region account, and the countries served by the -americas one
+_REGIONAL_ACCOUNTS = frozenset({'foundations', 'gmb'})
+_AMERICAS_COUNTRIES = frozenset({"United States", "Canada", "Mexico", "Chile", "Brazil", "Columbia"})
+
+
+def _regional_account(account: str, country: str) -> str:
+    """Account conversion logic for foundations and gmb, which send from a per-region account."""
+    if account in _REGIONAL_ACCOUNTS:
+        return account + ('-americas' if country in _AMERICAS_COUNTRIES else '-europe')
+    return account
+
+
+def prime_credentials_cache(account: str):
+    """
+    Load the credentials for an account and its regional variants in one BatchGetItem, so the
+    first sends of a work order don't each wait on a DynamoDB lookup. Failures are ignored;
+    lookup_email_account_credentials() falls back to a get_item per account.
+    """
+    candidates = [a for a in (account, account + '-americas', account + '-europe') if a not in _credentials_cache]
+    if not candidates:
+        return
+    _get_credentials_table()
+    try:
+        request = {EMAIL_ACCOUNT_CREDENTIALS_TABLE: {'Keys': [{'account': a} for a in candidates]}}
+        while request:
+            response = _credentials_dynamodb.batch_get_item(RequestItems=request)
+            with _credentials_lock:
+                for data in response.get('Responses', {}).get(EMAIL_ACCOUNT_CREDENTIALS_TABLE, []):
+                    _credentials_cache[data['account']] = (data['smtp_username'], data['smtp_password'])
+            request = response.get('UnprocessedKeys') or {}
+    except (ClientError, KeyError) as e:
+        print(f"Warning: Could not prime email credentials for account {account}: {e}")
+
+
+# Seconds a pooled SMTP connection may sit unused before it is health-checked with NOOP
+SMTP_IDLE_CHECK_SECS = 60
+
+
+class SmtpPool:
+    """
+    Keeps one logged-in SMTP connection per sending username open across a work order, so each
+    email costs a sendmail() instead of a connect + STARTTLS + AUTH.
+    """
+
+    def __init__(self):
+        self._connections = {}
+
+    def get(self, smtp_username: str, smtp_password: str) -> smtplib.SMTP:
+        """Return an open, authenticated connection for the username, reconnecting if it went stale."""
+        entry = self._connections.get(smtp_username)
+        if entry is not None:
+            mail, last_used = entry
+            if time.monotonic() - last_used < SMTP_IDLE_CHECK_SECS:
+                return mail
+            try:
+                if mail.noop()[0] == 250:
+                    return mail
+            except smtplib.SMTPException:
+                pass
+            self.reset(smtp_username)
+        mail = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+        mail.starttls()
+        mail.login(smtp_username, smtp_password)
+        self._connections[smtp_username] = (mail, time.monotonic())
+        return mail
+
+    def touch(self, smtp_username: str):
+        """Record that the username's connection was just used successfully."""
+        entry = self._connections.get(smtp_username)
+        if entry is not None:
+            self._connections[smtp_username] = (entry[0], time.monotonic())
+
+    def reset(self, smtp_username: str):
+        """Drop the username's connection; the next get() opens a fresh one."""
+        entry = self._connections.pop(smtp_username, None)
+        if entry is not None:
+            try:
+                entry[0].quit()
+            except Exception:
+                entry[0].close()
+
+    def close_all(self):
+        for smtp_username in list(self._connections):
+            self.reset(smtp_username)
+
+
+# SMTP connections are not safe to share between threads, so each sending thread gets its own pool
+_smtp_local = threading.local()
+_smtp_pools: List[SmtpPool] = []
+_smtp_pools_lock = threading.Lock()
+
+
+def _get_smtp_pool() -> SmtpPool:
+    """Return the calling thread's SmtpPool, registering it so close_smtp_connections() can reach it."""
+    pool = getattr(_smtp_local, 'pool', None)
+    if pool is None:
+        pool = _smtp_local.pool = SmtpPool()
+        with _smtp_pools_lock:
+            _smtp_pools.append(pool)
+    return pool
+
+
+def close_smtp_connections():
+    """Close every thread's pooled SMTP connections; called when a work order's send step finishes."""
+    with _smtp_pools_lock:
+        pools = list(_smtp_pools)
+        _smtp_pools.clear()
+    for pool in pools:
+        pool.close_all()
+    _smtp_local.pool = None
+
+
+def _nested_get(mapping, *keys, default=None):
+    """Walk nested dicts by keys; default if a key is missing or a level isn't a dict."""
+    for key in keys:
+        if not isinstance(mapping, dict) or key not in mapping:
+            return default
+        mapping = mapping[key]
+    return mapping
 
 
 def _retreat_net_offering_dollars(wrc_row: Dict) -> float:
@@ -79,15 +217,15 @@ def _installments_fee_limited_thresholds_cents(program: Dict, event: Dict) -> Tu
     return min_cents, bal_cents
 
 
+# (symbol, abbrev) per event currency; anything not listed is shown as USD
+_CURRENCY_PARTS = {'EUR': ('€', 'EUR')}
+_DEFAULT_CURRENCY_PARTS = ('$', 'USD')
+
+
 def _macro_currency_parts(event: Dict) -> Tuple[str, str]:
     """(symbol, abbrev) matching ||balance|| conventions."""
-    try:
-        currency = event['config']['currency']
-    except Exception:
-        currency = 'USD'
-    if currency != 'EUR':
-        return '$', 'USD'
-    return '€', 'EUR'
+    currency = _nested_get(event, 'config', 'currency', default='USD')
+    return _CURRENCY_PARTS.get(currency, _DEFAULT_CURRENCY_PARTS)
 
 
 def _sum_installment_payments_received(installments: Dict) -> float:
@@ -158,6 +296,248 @@ def _rewrite_student_dashboard_footer_link(html: str, pid: str, auth_hash: str)
     )
 
 
+# Comment stripping pattern, compiled once
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+# Template html after the student-independent rewrites, keyed by (html, language); each value also
+# holds the event and prompts it was built from (see _prepared_template)
+_prepared_templates: Dict[Tuple[str, str], Tuple[Dict, List[Dict], str]] = {}
+_PREPARED_TEMPLATES_MAX = 32
+
+
+def _prepare_template(html: str, language: str, event: Dict, prompts_array: List[Dict]) -> str:
+    """
+    Apply the rewrites that depend only on the template, language, event and prompts:
+    prompt directives (#salutation, ||title||, #reglink, #tangralink, #offeringsection),
+    preview/subject text, comment stripping and the meta charset fixup.
+    """
+    # If #salutation directive in html, replace it with the langauge specific salutation
+    # replacing the ||name|| field in the prompts with the person's name
+    if "#salutation" in html:
+        full_language = code_to_full_language(language)
+        salutation_text = prompt_lookup(prompts_array, 'salutation', full_language, event['aid'])
+        if not salutation_text:
+            raise Exception(f"Can't use #salutation. No prompt found for prompt: salutation, {full_language}")
+        # name will get replaced with the person's name below
+        html = html.replace("#salutation", salutation_text)
+
+    # If ||title|| directive in html, replace it with the localized title prompt
+    # Uses event['aid'] for correct title resolution in both normal and transactionReceipt modes.
+    if "||title||" in html:
+        full_language = code_to_full_language(language)
+        title_text = prompt_lookup(prompts_array, 'title', full_language, event['aid'])
+        html = html.replace("||title||", title_text)
+
+    # If #reglink directive in html, replace it with the langauge specific reg link language
+    # ||pid|| will get replaced with the participant's pid below
+    # ||name|| will get replaced with the person's name below
+    # ||aid|| will get replaced with the event's aid below
+    if "#reglink" in html:
+        full_language = code_to_full_language(language)
+        reglinkv2 = (event.get('config') or {}).get('reglinkv2')
+        prompt_key = 'reglinkv2' if reglinkv2 else 'reglink'
+        registration_link_text = prompt_lookup(prompts_array, prompt_key, full_language, event['aid'])
+        if not registration_link_text:
+            raise Exception(f"Can't use #reglink. No prompt found for prompt: {prompt_key}, {full_language}")
+        html = html.replace("#reglink", registration_link_text)
+
+    # If #tangralink directive in html, replace it with the langauge specific reg link language
+    # ||pid|| will get replaced with the participant's pid below
+    # ||name|| will get replaced with the person's name below
+    # ||taid|| will get replaced with the event's tangra link aid below
+    if "#tangralink" in html:
+        tangra = (event.get('config') or {}).get('tangra')
+        if tangra is None or (isinstance(tangra, str) and not tangra.strip()):
+            raise Exception("Can't use #tangralink. No tangra field found in the event config.")
+        full_language = code_to_full_language(language)
+        tangra_link_text = prompt_lookup(prompts_array, 'tangralink', full_language, event['aid'])
+        if not tangra_link_text:
+            raise Exception(f"Can't use #tangralink. No prompt found for prompt: tangralink, {full_language}")
+        html = html.replace("#tangralink", tangra_link_text)
+
+    # If #offeringsection <subevent> directive in html, replace it with the langauge specific offering section language
+    # placeholder pid will get replaced with the participant's pid below
+    # ||pid|| will get replaced with the participant's pid below
+    # ||name|| will get replaced with the person's name below
+    # ||aid|| will get replaced with the event's aid below
+    if "#offeringsection" in html:
+        subevent = html.split("#offeringsection")[1].split(" ")[0]
+        full_language = code_to_full_language(language)
+        offering_section_text = prompt_lookup(prompts_array, 'offeringsection', full_language, event['aid'])
+        if not offering_section_text:
+            raise Exception(f"Can't use #offeringsection. No prompt found for prompt: offeringsection, {full_language}")
+        # Add the subevent to the offering section #if offering <subevent>
+        offering_section_text = offering_section_text.replace("<subevent>", subevent)
+        # remove the subevent from the original html
+        html = html.replace(f"{subevent}", "")
+        # Replace the #offeringsection directive with the offering section text
+        html = html.replace("#offeringsection", offering_section_text)
+
+    # Swap out the title and preview
+    preview = DEFAULT_PREVIEW.replace('"', '')
+    html = html.replace("*|MC_PREVIEW_TEXT|*", preview)
+    html = html.replace("*|MC:SUBJECT|*", preview)
+        
+    # Get rid of the comments
+    html = _HTML_COMMENT_RE.sub("", html)
+
+    # Add magic metadata if it doesn't already exist
+    if '<meta http-equiv="Content-Type" content="text/html charset=UTF-8" />' not in html:
+        html = html.replace('<meta charset="UTF-8">', '<meta http-equiv="Content-Type" content="text/html charset=UTF-8" />')
+
+    return html
+
+
+def _prepared_template(html: str, language: str, event: Dict, prompts_array: List[Dict]) -> str:
+    """_prepare_template, memoized so a work order's template is prepared once rather than per student."""
+    key = (html, language)
+    cached = _prepared_templates.get(key)
+    if cached is not None and cached[0] is event and cached[1] is prompts_array:
+        return cached[2]
+    prepared = _prepare_template(html, language, event, prompts_array)
+    if len(_prepared_templates) >= _PREPARED_TEMPLATES_MAX:
+        _prepared_templates.clear()
+    # The cached entry holds the event and prompts, so the identity checks above stay valid
+    _prepared_templates[key] = (event, prompts_array, prepared)
+    return prepared
+
+
+# Parsed #if/#else/#endif structure per template html (see _compile_conditionals)
+_conditionals_cache: Dict[str, List[tuple]] = {}
+_CONDITIONALS_CACHE_MAX = 32
+
+_IF_CONDITIONS = ('oathed', 'offering', 'retreats')
+# Separates the arguments of an #if directive, which end at the first tag
+_IF_ARGS_SPLIT_RE = re.compile("[ <]")
+
+
+def _compile_conditionals(html: str) -> List[tuple]:
+    """
+    Split template html into ('line', text) and ('if', largs, [(inverted, text), ...]) segments.
+    inverted is True for lines after an odd number of #else, so a block line is kept when
+    the condition differs from it. Raises on malformed directives, as the old per-line filter did.
+    """
+    segments = _conditionals_cache.get(html)
+    if segments is not None:
+        return segments
+
+    segments = []
+    block = None
+    inverted = False
+    for line in html.splitlines():
+        # Most lines carry no directive; one scan for '#' settles them
+        if '#' not in line:
+            if block is None:
+                segments.append(('line', line))
+            else:
+                block.append((inverted, line))
+        elif block is None:
+            # Look for an #if statement and change state, throwing out the line
+            index = line.find('#if')
+            if index != -1:
+                largs = _IF_ARGS_SPLIT_RE.split(line[index+4:])
+                if largs[0] not in _IF_CONDITIONS:
+                    raise Exception(f"Unknown #if condition: {largs[0]}")
+                block = []
+                inverted = False
+                segments.append(('if', largs, block))
+            elif '#endif' in line:
+                raise Exception("Non-prefaced #endif")
+            elif '#else' in line:
+                raise Exception("Non-prefaced #else")
+            else:
+                segments.append(('line', line))
+        else:
+            # Currently in an #if; check for #else and #endif
+            if '#endif' in line:
+                block = None
+            elif '#else' in line:
+                inverted = not inverted
+            else:
+                block.append((inverted, line))
+
+    if block is not None:
+        raise Exception("EOF in #if condition")
+
+    if len(_conditionals_cache) >= _CONDITIONALS_CACHE_MAX:
+        _conditionals_cache.clear()
+    _conditionals_cache[html] = segments
+    return segments
+
+
+def _if_condition(largs: List[str], student: Dict, event: Dict, pools_array: List[Dict]):
+    """Evaluate one #if directive (oathed / offering <subevent> / retreats <prefix> [<prefix>]) for a student."""
+    if largs[0] == 'oathed':
+        return check_eligibility('oath', student, event['aid'], pools_array, event.get('subevent'), event)
+
+    program = _nested_get(student, 'programs', event.get('aid'))
+
+    if largs[0] == 'offering':
+        installments = _nested_get(event, 'config', 'offeringPresentation') == 'installments'
+        
+        if not installments:
+            if len(largs) < 2:
+                return False
+            return _nested_get(program, 'offeringHistory', largs[1], default=False)
+
+        oh = _nested_get(program, 'offeringHistory', 'retreat', 'installments', default=False)
+        if not oh:
+            return False
+        total_received = _sum_installment_payments_received(oh)
+
+        wr = _nested_get(program, 'whichRetreats', default=False)
+        if not wr:
+            print(f"NO WR: {student.get('first')}, {student.get('last')}, {student.get('id')}")
+            return False
+
+        which_retreats_config = _nested_get(event, 'config', 'whichRetreatsConfig')
+        if which_retreats_config is None:
+            raise Exception("Can't use #if offering with installments in a non-multiple retreats event.")
+
+        selected_ordered = [k for k, v in wr.items() if v]
+        limited_keys = apply_installments_limit_fee_selected(
+            selected_ordered,
+            program,
+            event['config'],
+        )
+        total_required = 0.0
+        for key in limited_keys:
+            total_required += _retreat_net_offering_dollars(which_retreats_config.get(key))
+
+        return total_required <= total_received
+
+    # retreats: true if any selected retreat starts with the first prefix, else the second
+    which_retreats = _nested_get(program, 'whichRetreats')
+    if not isinstance(which_retreats, dict):
+        return False
+    for prefix in largs[1:3]:
+        if any((key.startswith(prefix) and selected) for key, selected in which_retreats.items()):
+            return True
+    return False
+
+
+# Per-student placeholders, in the order send_email used to apply them with one replace() each
+_STUDENT_TOKENS = ('||name||', '#retreats', '||retreats||', '||balance||', '#depositdue', '#balancedue', '123456789', '||pid||')
+_STUDENT_TOKEN_RE = re.compile('|'.join(map(re.escape, _STUDENT_TOKENS)))
+
+
+def _substitute_student_tokens(html: str, values: Dict[str, str]) -> str:
+    """
+    Replace the tokens in values (a subset of _STUDENT_TOKENS) in a single pass over html.
+    A value is first given the tokens that come after it in _STUDENT_TOKENS, because the
+    sequential replace() calls used to substitute those inside earlier-inserted text too.
+    """
+    resolved = {}
+    for i, token in enumerate(_STUDENT_TOKENS):
+        if token in values:
+            value = values[token]
+            for later in _STUDENT_TOKENS[i + 1:]:
+                if later in values:
+                    value = value.replace(later, values[later])
+            resolved[token] = value
+    return _STUDENT_TOKEN_RE.sub(lambda m: resolved.get(m.group(0), m.group(0)), html)
+
+
 def lookup_email_account_credentials(account: str, country: str) -> tuple[str, str]:
     """
     Look up email account credentials from DynamoDB with caching.
@@ -172,38 +552,34 @@ def lookup_email_account_credentials(account: str, country: str) -> tuple[str, s
     Raises:
         Exception: If account is not found
     """
-    # Create cache key from account and country
-    cache_key = f"{account}:{country}"
+    account = _regional_account(account, country)
     
     # Check cache first
-    if cache_key in _credentials_cache:
-        return _credentials_cache[cache_key]
-    
-    # Account conversion logic for foundations and gmb
-    if account in ['foundations', 'gmb']:
-        if country in ["United States", "Canada", "Mexico", "Chile", "Brazil", "Columbia"]:
-            account = account + '-americas'
-        else:
-            account = account + '-europe'
-    
-    # Read from DynamoDB
-    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-    table = dynamodb.Table(EMAIL_ACCOUNT_CREDENTIALS_TABLE)
+    credentials = _credentials_cache.get(account)
+    if credentials is not None:
+        return credentials
     
-    try:
-        response = table.get_item(Key={'account': account})
-        if 'Item' not in response:
-            raise Exception(f"email credential lookup can't find account {account}")
+    # One thread reads a missing account from DynamoDB; the others wait for its result
+    with _credentials_lock:
+        if account in _credentials_cache:
+            return _credentials_cache[account]
         
-        data = response['Item']
-        credentials = (data['smtp_username'], data['smtp_password'])
+        table = _get_credentials_table()
         
-        # Cache the result
-        _credentials_cache[cache_key] = credentials
-        
-        return credentials
-    except ClientError as e:
-        raise Exception(f"email credential lookup can't find account {account}: {str(e)}")
+        try:
+            response = table.get_item(Key={'account': account})
+            if 'Item' not in response:
+                raise Exception(f"email credential lookup can't find account {account}")
+            
+            data = response['Item']
+            credentials = (data['smtp_username'], data['smtp_password'])
+            
+            # Cache the result
+            _credentials_cache[account] = credentials
+            
+            return credentials
+        except ClientError as e:
+            raise Exception(f"email credential lookup can't find account {account}: {str(e)}")
 
 
 def send_email(html: str, subject: str, language: str, account: str, student: Dict, 
@@ -234,14 +610,10 @@ def send_email(html: str, subject: str, language: str, account: str, student: Di
     student_country = student.get('country', 'United States')  # Default to US if not specified
     smtp_username, smtp_password = lookup_email_account_credentials(account, student_country)
     
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    
     # Get student email
     email_to = student.get('email')
     if not email_to:
         raise Exception("Student email not found")
-    msg['To'] = email_to
 
     # Transaction Receipt adjustments
     if transaction_data:
@@ -353,147 +725,97 @@ def send_email(html: str, subject: str, language: str, account: str, student: Di
             html = html.replace("||cardbrand||", html_escape.escape(str(brand_raw)))
             html = html.replace("||cardlast4||", html_escape.escape(str(last4_raw)))
 
-    # If #salutation directive in html, replace it with the langauge specific salutation
-    # replacing the ||name|| field in the prompts with the person's name
-    if "#salutation" in html:
-        full_language = code_to_full_language(language)
-        salutation_text = prompt_lookup(prompts_array, 'salutation', full_language, event['aid'])
-        if not salutation_text:
-            raise Exception(f"Can't use #salutation. No prompt found for prompt: salutation, {full_language}")
-        # name will get replaced with the person's name below
-        html = html.replace("#salutation", salutation_text)
-
-    # If ||title|| directive in html, replace it with the localized title prompt
-    # Uses event['aid'] for correct title resolution in both normal and transactionReceipt modes.
-    if "||title||" in html:
-        full_language = code_to_full_language(language)
-        title_text = prompt_lookup(prompts_array, 'title', full_language, event['aid'])
-        html = html.replace("||title||", title_text)
-
-    # If #reglink directive in html, replace it with the langauge specific reg link language
-    # ||pid|| will get replaced with the participant's pid below
-    # ||name|| will get replaced with the person's name below
-    # ||aid|| will get replaced with the event's aid below
-    if "#reglink" in html:
-        full_language = code_to_full_language(language)
-        reglinkv2 = (event.get('config') or {}).get('reglinkv2')
-        prompt_key = 'reglinkv2' if reglinkv2 else 'reglink'
-        registration_link_text = prompt_lookup(prompts_array, prompt_key, full_language, event['aid'])
-        if not registration_link_text:
-            raise Exception(f"Can't use #reglink. No prompt found for prompt: {prompt_key}, {full_language}")
-        html = html.replace("#reglink", registration_link_text)
-
-    # If #tangralink directive in html, replace it with the langauge specific reg link language
-    # ||pid|| will get replaced with the participant's pid below
-    # ||name|| will get replaced with the person's name below
-    # ||taid|| will get replaced with the event's tangra link aid below
-    if "#tangralink" in html:
-        tangra = (event.get('config') or {}).get('tangra')
-        if tangra is None or (isinstance(tangra, str) and not tangra.strip()):
-            raise Exception("Can't use #tangralink. No tangra field found in the event config.")
-        full_language = code_to_full_language(language)
-        tangra_link_text = prompt_lookup(prompts_array, 'tangralink', full_language, event['aid'])
-        if not tangra_link_text:
-            raise Exception(f"Can't use #tangralink. No prompt found for prompt: tangralink, {full_language}")
-        html = html.replace("#tangralink", tangra_link_text)
+    # Student-independent rewrites; receipts are prepared per transaction since their html differs
+    if transaction_data:
+        html = _prepare_template(html, language, event, prompts_array)
+    else:
+        html = _prepared_template(html, language, event, prompts_array)
 
-    # If #offeringsection <subevent> directive in html, replace it with the langauge specific offering section language
-    # placeholder pid will get replaced with the participant's pid below
-    # ||pid|| will get replaced with the participant's pid below
-    # ||name|| will get replaced with the person's name below
-    # ||aid|| will get replaced with the event's aid below
-    if "#offeringsection" in html:
-        subevent = html.split("#offeringsection")[1].split(" ")[0]
-        full_language = code_to_full_language(language)
-        offering_section_text = prompt_lookup(prompts_array, 'offeringsection', full_language, event['aid'])
-        if not offering_section_text:
-            raise Exception(f"Can't use #offeringsection. No prompt found for prompt: offeringsection, {full_language}")
-        # Add the subevent to the offering section #if offering <subevent>
-        offering_section_text = offering_section_text.replace("<subevent>", subevent)
-        # remove the subevent from the original html
-        html = html.replace(f"{subevent}", "")
-        # Replace the #offeringsection directive with the offering section text
-        html = html.replace("#offeringsection", offering_section_text)
+    # Use provided credentials
+    coord_email = smtp_username
+        
+    coord_email_href = f'<u><a href="mailto:{coord_email}" target="_blank" style="mso-line-height-rule: exactly;-ms-text-size-adjust: 100%;-webkit-text-size-adjust: 100%;color: #FFFFFF;font-weight: normal;text-decoration: underline;"><span style="color:#0000FF">{coord_email}</span></a></u>'
+    html = html.replace("||coord-email||", coord_email_href)
 
-    # Replace any ||name|| fields with the person's name
-    html = html.replace("||name||", f"{student.get('first', '')} {student.get('last', '')}")
+    # Filter the HTML via any #if/#else/#endif statements. The directive structure depends only on
+    # the template, so it is parsed once per template; per student only the conditions are evaluated.
+    # Per-student substitutions below run after filtering, on the lines that were kept.
+    kept_lines = []
+    for segment in _compile_conditionals(html):
+        if segment[0] == 'line':
+            kept_lines.append(segment[1])
+        else:
+            _, largs, block = segment
+            condition = bool(_if_condition(largs, student, event, pools_array))
+            kept_lines.extend(line for inverted, line in block if condition != inverted)
+    # Leading blank lines are dropped, as the line-by-line filter always did
+    html = '\n'.join(kept_lines).lstrip('\n')
+
+    # Per-student values for _STUDENT_TOKENS, substituted together in one pass below.
+    # ||name|| is the person's name; the others are computed only when the template uses them.
+    name = f"{student.get('first', '')} {student.get('last', '')}"
+    substitutions = {"||name||": name}
+    
+    def uses(*tokens):
+        # Tokens inside already-computed values count too; sequential replace() would have seen them
+        return any(token in html or any(token in value for value in substitutions.values()) for token in tokens)
 
     # Replace #retreats / ||retreats|| with the contents of the whichRetreats field for this aid
-    if ("#retreats" in html) or ("||retreats||" in html):
-        try:
-            which_retreats_config = event['config']['whichRetreatsConfig']
-        except:
+    if uses("#retreats", "||retreats||"):
+        which_retreats_config = _nested_get(event, 'config', 'whichRetreatsConfig')
+        if which_retreats_config is None:
             raise Exception("Can't use #retreats/||retreats||. No whichRetreatsConfig object found for event.")
         
-        retreats_html = "<ul>"
-        keys = list(student['programs'][event['aid']]['whichRetreats'].keys())
-        keys.sort()
-        at_least_one = False
+        which_retreats = student['programs'][event['aid']]['whichRetreats']
+        # Convert language code to full language name for prompt_lookup
+        full_language = code_to_full_language(language)
+        items = []
         
-        for key in keys:
-            if student['programs'][event['aid']]['whichRetreats'][key]:
-                # Convert language code to full language name for prompt_lookup
-                full_language = code_to_full_language(language)
+        for key in sorted(which_retreats):
+            if which_retreats[key]:
                 prompt_text = prompt_lookup(prompts_array, which_retreats_config[key]['prompt'], full_language, event['aid'])
                 if not prompt_text:
                     raise Exception(f"Can't use #retreats/||retreats||. No prompt found for: {which_retreats_config[key]['prompt']}, {full_language}")
-                at_least_one = True
-                retreats_html += f'<li><b>{prompt_text}</b></li>'
+                items.append(f'<li><b>{prompt_text}</b></li>')
         
-        retreats_html += "</ul>"
-        if not at_least_one:
+        if not items:
             raise Exception(f"#retreats/||retreats|| failed at least one rule: {student.get('first')}, {student.get('last')}, {student.get('id')}")
-        html = html.replace("#retreats", retreats_html)
-        html = html.replace("||retreats||", retreats_html)
+        retreats_html = "<ul>" + "".join(items) + "</ul>"
+        substitutions["#retreats"] = retreats_html
+        substitutions["||retreats||"] = retreats_html
 
     # Replace ||balance|| with the balance due, only supports installments
-    if "||balance||" in html:
-        try:
-            which_retreats_config = event['config']['whichRetreatsConfig']
-        except:
+    if uses("||balance||"):
+        which_retreats_config = _nested_get(event, 'config', 'whichRetreatsConfig')
+        if which_retreats_config is None:
             raise Exception("Can't use ||balance|| in a non-multiple retreats event.")
         
         total = 0
-        keys = list(student['programs'][event['aid']]['whichRetreats'].keys())
-        for key in keys:
-            if student['programs'][event['aid']]['whichRetreats'][key]:
+        program = student['programs'][event['aid']]
+        for key, selected in program['whichRetreats'].items():
+            if selected:
                 total += _retreat_net_offering_dollars(which_retreats_config[key])
         
         received = 0.0
-        try:
-            some = student['programs'][event['aid']]['offeringHistory']['retreat']['installments']
-        except:
-            some = False
+        some = _nested_get(program, 'offeringHistory', 'retreat', 'installments', default=False)
         
         if some and isinstance(some, dict):
             received = _sum_installment_payments_received(some)
         
-        try:
-            currency = event['config']['currency']
-        except:
-            currency = 'USD'
-        
-        if currency != 'EUR':
-            currency_symbol = '$'
-            currency_abbrev = 'USD'
-        else:
-            currency_symbol = '€'
-            currency_abbrev = 'EUR'
-        
+        currency_symbol, currency_abbrev = _macro_currency_parts(event)
         balance = f"{currency_symbol}{total - received} {currency_abbrev}"
-        html = html.replace("||balance||", balance)
+        substitutions["||balance||"] = balance
 
     # #depositdue / #balancedue — fee-limited minimum or net balance remaining vs paid (installments only)
-    if '#depositdue' in html or '#balancedue' in html:
+    if uses('#depositdue', '#balancedue'):
         cfg = event.get('config') or {}
         if str(cfg.get('offeringPresentation') or '').lower() != 'installments':
             raise Exception(
                 "Can't use #depositdue or #balancedue unless config.offeringPresentation is 'installments'."
             )
-        try:
-            prog = student['programs'][event['aid']]
-        except Exception as e:
-            raise Exception("Can't use #depositdue or #balancedue: missing student programs for event aid.") from e
+        prog = _nested_get(student, 'programs', event.get('aid'))
+        if prog is None:
+            raise Exception("Can't use #depositdue or #balancedue: missing student programs for event aid.")
         min_cents, bal_cents = _installments_fee_limited_thresholds_cents(prog, event)
         paid_cents = _installments_paid_cents(prog.get('offeringHistory'), bool(cfg.get('reglinkv2')))
         deposit_remaining = max(0, min_cents - paid_cents)
@@ -501,32 +823,13 @@ def send_email(html: str, subject: str, language: str, account: str, student: Di
         currency_symbol, currency_abbrev = _macro_currency_parts(event)
         dep_str = f"{currency_symbol}{deposit_remaining / 100.0:.2f} {currency_abbrev}"
         bal_str = f"{currency_symbol}{balance_remaining / 100.0:.2f} {currency_abbrev}"
-        html = html.replace('#depositdue', dep_str)
-        html = html.replace('#balancedue', bal_str)
-
-    # Swap out the title and preview
-    preview = DEFAULT_PREVIEW.replace('"', '')
-    html = html.replace("*|MC_PREVIEW_TEXT|*", preview)
-    html = html.replace("*|MC:SUBJECT|*", preview)
-        
-    # Get rid of the comments
-    html = re.sub("(<!--.*?-->)", "", html, flags=re.DOTALL)
-
-    # Add magic metadata if it doesn't already exist
-    if not html.count('<meta http-equiv="Content-Type" content="text/html charset=UTF-8" />'):
-        html = html.replace('<meta charset="UTF-8">', '<meta http-equiv="Content-Type" content="text/html charset=UTF-8" />')
-
-    # Use provided credentials
-    coord_email = smtp_username
-        
-    coord_email_href = f'<u><a href="mailto:{coord_email}" target="_blank" style="mso-line-height-rule: exactly;-ms-text-size-adjust: 100%;-webkit-text-size-adjust: 100%;color: #FFFFFF;font-weight: normal;text-decoration: underline;"><span style="color:#0000FF">{coord_email}</span></a></u>'
-    html = html.replace("||coord-email||", coord_email_href)
-
-    msg['From'] = f"{DEFAULT_FROM_NAME}<{coord_email}>"
+        substitutions['#depositdue'] = dep_str
+        substitutions['#balancedue'] = bal_str
 
     # Replace placeholder pid with student ID
-    html = html.replace("123456789", student.get('id', ''))
-    html = html.replace("||pid||", student.get('id', ''))
+    substitutions["123456789"] = student.get('id', '')
+    substitutions["||pid||"] = student.get('id', '')
+    html = _substitute_student_tokens(html, substitutions)
 
     # Rewrite legacy student dashboard link in email footers to new app + auth hash
     if "student.slsupport.link" in html:
@@ -556,137 +859,45 @@ def send_email(html: str, subject: str, language: str, account: str, student: Di
             raise Exception("Can't use ||taid||. No tangra field found in the event config.")
         html = html.replace("||taid||", str(tangra).strip())
 
-    # Filter the HTML via any #if/#else/#endif statements
-    in_if = False
-    filtered_html = ''
-    for line in html.splitlines():
-        if not in_if:
-            # Look for an #if statement and change state, throwing out the line
-            if '#if' in line:
-                in_if = True
-                index = line.index('#if')
-                largs = re.split("[ <]", line[index+4:])
-                if largs[0] == 'oathed':
-                    condition = check_eligibility('oath', student, event['aid'], pools_array, event.get('subevent'), event)
-                elif largs[0] == 'offering':
-                    try:
-                        installments = event['config']['offeringPresentation'] == 'installments'
-                    except:
-                        installments = False
-                    
-                    if installments:
-                        try:
-                            oh = student['programs'][event['aid']]['offeringHistory']['retreat']['installments']
-                        except:
-                            oh = False
-
-                        if not oh:
-                            condition = False
-                        else:
-                            total_received = _sum_installment_payments_received(oh)
-
-                            try:
-                                wr = student['programs'][event['aid']]['whichRetreats']
-                            except:
-                                wr = False
-
-                            if not wr:
-                                print(f"NO WR: {student.get('first')}, {student.get('last')}, {student.get('id')}")
-                                condition = False
-                            else:
-                                try:
-                                    which_retreats_config = event['config']['whichRetreatsConfig']
-                                except Exception:
-                                    raise Exception("Can't use #if offering with installments in a non-multiple retreats event.")
-
-                                prog = student['programs'][event['aid']]
-                                selected_ordered = [k for k, v in wr.items() if v]
-                                limited_keys = apply_installments_limit_fee_selected(
-                                    selected_ordered,
-                                    prog,
-                                    event['config'],
-                                )
-                                total_required = 0.0
-                                for key in limited_keys:
-                                    total_required += _retreat_net_offering_dollars(which_retreats_config.get(key))
-
-                                condition = total_required <= total_received
-                    else:
-                        try:
-                            condition = student['programs'][event['aid']]['offeringHistory'][largs[1]]
-                        except:
-                            condition = False
-                elif largs[0] == 'retreats':
-                    try:
-                        condition = any((key.startswith(largs[1]) and student['programs'][event['aid']]['whichRetreats'][key]) for key in student['programs'][event['aid']]['whichRetreats'])
-                    except:
-                        condition = False
-                    if not condition:
-                        try:
-                            condition = any((key.startswith(largs[2]) and student['programs'][event['aid']]['whichRetreats'][key]) for key in student['programs'][event['aid']]['whichRetreats'])
-                        except:
-                            condition = False
-                else:
-                    raise Exception(f"Unknown #if condition: {largs[0]}")
-
-                # Eat line
-                continue
-            elif '#endif' in line:
-                raise Exception("Non-prefaced #endif")
-            elif '#else' in line:
-                raise Exception("Non-prefaced #else")
-            else:
-                # Pass it
-                if len(filtered_html) != 0:
-                    filtered_html += '\n'
-                filtered_html += line
-        else:
-            # Currently inIf
-            # Check for #else and #endif
-            if '#endif' in line:
-                in_if = False
-                continue
-            elif '#else' in line:
-                condition = not condition
-                continue
-            else:
-                if condition:
-                    # Pass it
-                    if len(filtered_html) != 0:
-                        filtered_html += '\n'
-                    filtered_html += line
-    
-    if in_if:
-        raise Exception("EOF in #if condition")
-
-    html = filtered_html
             
     if dryrun:
-        try:
-            written_lang = student.get('writtenLangPref', 'English')
-        except:
-            written_lang = 'English'
+        written_lang = student.get('writtenLangPref', 'English')
         print(f"DRYRUN: {student.get('email')}, {student.get('country')}, {smtp_username}, {coord_email}, {written_lang}")
         return True
     
-    part1 = MIMEText(preview, 'plain')
+    # The MIME message is only needed for a real send
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['To'] = email_to
+    msg['From'] = f"{DEFAULT_FROM_NAME}<{coord_email}>"
+    
+    part1 = MIMEText(DEFAULT_PREVIEW.replace('"', ''), 'plain')
     part2 = MIMEText(html, 'html')
 
     msg.attach(part1)
     msg.attach(part2)
 
+    message = msg.as_string()
+    smtp_pool = _get_smtp_pool()
     attempts = 0
+    reconnected = False
     while attempts < 5:
         try:
-            mail = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            mail.starttls()
-            mail.login(smtp_username, smtp_password)
-            mail.sendmail(coord_email, email_to, msg.as_string())
-            mail.quit()
+            mail = smtp_pool.get(smtp_username, smtp_password)
+            mail.sendmail(coord_email, email_to, message)
+            smtp_pool.touch(smtp_username)
             return True
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle pooled connection; reconnect once and resend
+            smtp_pool.reset(smtp_username)
+            if reconnected:
+                raise Exception(f"mail.sendmail() FAILS: {sys.exc_info()[0]}")
+            reconnected = True
+            continue
         except smtplib.SMTPResponseException as e:
             error_code = e.smtp_code
             error_message = e.smtp_error
+            smtp_pool.reset(smtp_username)
             if error_code == 421:
                 print("Waiting for a minute...")
                 time.sleep(60)
@@ -696,6 +907,7 @@ def send_email(html: str, subject: str, language: str, account: str, student: Di
             else:
                 raise Exception(f"mail.sendmail() FAILS: {error_code}, {error_message}")
         except Exception as e:
+            smtp_pool.reset(smtp_username)
             raise Exception(f"mail.sendmail() FAILS: {sys.exc_info()[0]}")
     
     return False 
\ No newline at end of file
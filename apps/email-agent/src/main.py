@@ -3,9 +3,15 @@ import signal
 import os
 import boto3
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
 from .agent import EmailAgent
 from .config import POLL_INTERVAL, STOP_CHECK_INTERVAL, DYNAMODB_TABLE, config
-from .aws_client import AWSClient, SQS_QUEUE_URL
+from .aws_client import AWSClient, SQS_QUEUE_URL, BOTO_CFG, UNLOCK_WORKERS
+
+# Log levels that can be switched on, and those that are always output
+_LOG_LEVELS = ('progress', 'steps', 'workorder', 'debug', 'websocket', 'warning')
+_ALWAYS_LOGGED = frozenset(('error', 'warning'))
 
 class LoggingConfig:
     """Configuration class for controlling log levels."""
@@ -24,32 +30,60 @@ class LoggingConfig:
             for level in log_levels:
                 if hasattr(self, level):
                     setattr(self, level, True)
+        
+        # Resolve the flags once; should_log/log run for every message, so they only test membership
+        self._enabled = frozenset(level for level in _LOG_LEVELS if getattr(self, level))
+        self._printed = self._enabled | _ALWAYS_LOGGED
     
     def should_log(self, level):
         """Check if a specific log level should be output."""
-        return getattr(self, level, False)
+        return level in self._enabled
     
     def log(self, level, message):
         """Log a message if the level is enabled."""
-        if self.should_log(level) or level in ['error', 'warning']:
+        if level in self._printed:
             print(message)
 
 def force_unlock_all_work_orders():
     """Force-unlocks all work orders that are in a locked state."""
-    dynamodb = boto3.resource('dynamodb', region_name=config.aws_region)
+    dynamodb = boto3.resource('dynamodb', region_name=config.aws_region, config=BOTO_CFG)
     table = dynamodb.Table(config.work_orders_table)
+    # Strongly consistent so rows locked just before startup are seen and recovered
     scan_kwargs = {
         'FilterExpression': 'locked = :true',
-        'ExpressionAttributeValues': {':true': True}
+        'ExpressionAttributeValues': {':true': True},
+        'ProjectionExpression': 'id',
+        'ConsistentRead': True
     }
-    response = table.scan(**scan_kwargs)
-    for item in response.get('Items', []):
-        table.update_item(
-            Key={'id': item['id']},
-            UpdateExpression="SET locked = :false, lockedBy = :empty",
-            ExpressionAttributeValues={':false': False, ':empty': ""}
-        )
-    print(f"Force-unlocked {len(response.get('Items', []))} work orders.")
+    ids = []
+    while True:
+        response = table.scan(**scan_kwargs)
+        ids.extend(item['id'] for item in response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+    def unlock(id):
+        # Conditional so a row re-locked (or unlocked) since the scan is left alone
+        try:
+            table.update_item(
+                Key={'id': id},
+                UpdateExpression="SET locked = :false, lockedBy = :empty",
+                ConditionExpression="locked = :true",
+                ExpressionAttributeValues={':false': False, ':empty': "", ':true': True}
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    unlocked = 0
+    if ids:
+        with ThreadPoolExecutor(max_workers=UNLOCK_WORKERS) as executor:
+            unlocked = sum(executor.map(unlock, ids))
+    print(f"Force-unlocked {unlocked} work orders.")
 
 async def main():
     # Parse command line arguments
@@ -14,11 +14,32 @@ class StepStatus(str, Enum):
     EXCEPTION = 'exception'  # New status for agent crashes
     SLEEPING = 'sleeping'  # Add sleeping state
 
+def _extract_value(field_data):
+    """Unwrap a DynamoDB-format step field ({'S': ...}, {'BOOL': ...}, {'NULL': True}); plain values pass through."""
+    if isinstance(field_data, dict):
+        if 'S' in field_data:
+            return field_data['S']
+        elif 'BOOL' in field_data:
+            return field_data['BOOL']
+        elif 'NULL' in field_data:
+            return None
+        else:
+            return str(field_data)
+    else:
+        return field_data
+
 class Step:
     """Represents a step in a work order"""
+    # Steps are rebuilt for every work order read and update; slots keep them small and cheap to create
+    __slots__ = ('name', 'status', 'message', 'isActive', 'startTime', 'endTime')
+
     def __init__(self, name: str, status: StepStatus = StepStatus.READY, message: str = "", isActive: bool = False, startTime: Optional[str] = None, endTime: Optional[str] = None):
         self.name = name
-        if isinstance(status, dict):
+        # Callers and from_dict already pass a StepStatus; take it as is before trying to parse
+        # (StepStatus is a str, so it would otherwise be looked up again by value)
+        if isinstance(status, StepStatus):
+            self.status = status
+        elif isinstance(status, dict):
             if 'S' in status:
                 status_value = status['S']
                 self.status = StepStatus(status_value)
@@ -26,8 +47,6 @@ class Step:
                 self.status = StepStatus.READY
         elif isinstance(status, str):
             self.status = StepStatus(status)
-        elif isinstance(status, StepStatus):
-            self.status = status
         else:
             self.status = StepStatus.READY
         
@@ -69,27 +88,13 @@ class Step:
     @classmethod
     def from_dict(cls, data: Dict) -> 'Step':
         """Create from either regular JSON or DynamoDB format"""
-        # Helper function to safely extract values
-        def extract_value(field_data, field_name):
-            if isinstance(field_data, dict):
-                if 'S' in field_data:
-                    return field_data['S']
-                elif 'BOOL' in field_data:
-                    return field_data['BOOL']
-                elif 'NULL' in field_data:
-                    return None
-                else:
-                    return str(field_data)
-            else:
-                return field_data
-        
         # Extract each field safely
-        name = extract_value(data.get('name'), 'name')
-        status = extract_value(data.get('status'), 'status')
-        message = extract_value(data.get('message'), 'message')
-        isActive = extract_value(data.get('isActive'), 'isActive')
-        startTime = extract_value(data.get('startTime'), 'startTime')
-        endTime = extract_value(data.get('endTime'), 'endTime')
+        name = _extract_value(data.get('name'))
+        status = _extract_value(data.get('status'))
+        message = _extract_value(data.get('message'))
+        isActive = _extract_value(data.get('isActive'))
+        startTime = _extract_value(data.get('startTime'))
+        endTime = _extract_value(data.get('endTime'))
         
         # Convert status to StepStatus enum
         if isinstance(status, str):
@@ -128,6 +133,15 @@ class WorkOrderStatus(str, Enum):
 
 class WorkOrder:
     """Represents a work order for email processing"""
+    # Fixed field set (everything assigned in __init__); no per-instance __dict__
+    __slots__ = (
+        'id', 'email', 'steps', 'status', 'stopRequested', 'locked', 'locked_by', 'locked_at',
+        'created_at', 'updated_at', 'eventCode', 'stage', 'subEvent', 'account', 'subjects',
+        'languages', 'createdBy', 'replyTo', 'fromName', 'zoomLink', 'inPerson', 'config',
+        'testers', 'sendContinuously', 'sendUntil', 'sendInterval', 's3HTMLPaths',
+        'regLinkPresent', 'salutationByName', 'revision', 'transactionReceipt'
+    )
+
     def __init__(self, id: str, email: str, steps: List[Step], status: WorkOrderStatus = WorkOrderStatus.PENDING):
         self.id = id
         self.email = email
@@ -260,10 +274,11 @@ class WorkOrder:
 
         try:
             # Handle both DynamoDB and regular JSON formats
-            if isinstance(data.get('id'), dict) and 'S' in data['id']:
+            id_value = data.get('id')
+            if isinstance(id_value, dict) and 'S' in id_value:
                 # DynamoDB format
                 work_order = cls(
-                    id=data['id']['S'],
+                    id=id_value['S'],
                     email=data.get('email', {}).get('S', ''),
                     steps=steps,
                     status=WorkOrderStatus(data.get('status', {}).get('S', 'pending'))
@@ -332,7 +347,8 @@ class WorkOrder:
                 work_order.sendInterval = int(data.get('sendInterval', {}).get('N', os.getenv('EMAIL_CONTINUOUS_SLEEP_SECS', '600')))
                 work_order.regLinkPresent = data.get('regLinkPresent', {}).get('BOOL', True)
                 work_order.salutationByName = data.get('salutationByName', {}).get('BOOL', True)
-                work_order.revision = data.get('revision', {}).get('S') if isinstance(data.get('revision'), dict) and 'S' in data.get('revision', {}) else data.get('revision')
+                revision = data.get('revision')
+                work_order.revision = revision['S'] if isinstance(revision, dict) and 'S' in revision else revision
                 work_order.transactionReceipt = data.get('transactionReceipt', {}).get('BOOL', False)
                     
                 return work_order
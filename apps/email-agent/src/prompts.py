@@ -3,7 +3,26 @@ Prompt utilities for email-agent.
 Provides functions for looking up and formatting localized prompt strings.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+
+# Index of the last prompts array seen, keyed on its identity: (prompts_array, {(prompt, language): (position, text)})
+_prompt_index = (None, None)
+
+
+def _get_prompt_index(prompts_array: List[Dict]) -> Dict[Tuple[str, str], Tuple[int, str]]:
+    """
+    Map (prompt, language) to the position and text of its first entry in prompts_array. Built once
+    per prompts array (the agent's table cache hands out the same list for a work order).
+    """
+    global _prompt_index
+    indexed, index = _prompt_index
+    if indexed is not prompts_array:
+        index = {}
+        for position, p in enumerate(prompts_array):
+            index.setdefault((p.get('prompt'), p.get('language')), (position, p.get('text', '')))
+        _prompt_index = (prompts_array, index)
+    return index
 
 
 def prompt_lookup(prompts_array: List[Dict], prompt_key: str, language: str, aid: str) -> str:
@@ -24,17 +43,21 @@ def prompt_lookup(prompts_array: List[Dict], prompt_key: str, language: str, aid
     if not prompts_array or len(prompts_array) == 0:
         return f"{aid}-{prompt_key}-{language}-promptsUndefined"
 
+    index = _get_prompt_index(prompts_array)
     full_aid_prompt_key = f"{aid}-{prompt_key}"
     default_prompt_key = f"default-{prompt_key}"
 
     # AID-specific prompt
-    for p in prompts_array:
-        if p.get('prompt') == full_aid_prompt_key and p.get('language') == language:
-            return p.get('text', '')
-
-    # Default prompt (language-specific or universal)
-    for p in prompts_array:
-        if p.get('prompt') == default_prompt_key and (p.get('language') == language or p.get('language') == 'universal'):
-            return p.get('text', '')
+    found = index.get((full_aid_prompt_key, language))
+    if found is not None:
+        return found[1]
+
+    # Default prompt (language-specific or universal), whichever comes first in the array
+    found = index.get((default_prompt_key, language))
+    universal = index.get((default_prompt_key, 'universal'))
+    if found is None or (universal is not None and universal[0] < found[0]):
+        found = universal
+    if found is not None:
+        return found[1]
 
     return f"{aid}-{prompt_key}-{language}-unknown" 
\ No newline at end of file
@@ -5,7 +5,7 @@ import re
 import boto3
 from typing import Dict, Any, Optional
 from ..models import WorkOrder, Step
-from ..aws_client import AWSClient
+from ..aws_client import AWSClient, BOTO_CFG
 
 class PrepareStep:
     """Handles the preparation step for email campaigns.
@@ -515,8 +515,11 @@ class PrepareStep:
 
     def _upload_to_s3(self, key: str, html: str):
         """Upload HTML content to S3."""
-        # Use boto3 client directly with region from config
-        s3 = boto3.client('s3', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+        # Reuse the shared client (and its connection pool) when available
+        if self.aws_client:
+            s3 = self.aws_client.s3
+        else:
+            s3 = boto3.client('s3', region_name=os.getenv('AWS_REGION', 'us-east-1'), config=BOTO_CFG)
         s3.put_object(Bucket=self.s3_bucket, Key=key, Body=html, ContentType='text/html')
 
     def _get_stage_record(self, stage: str) -> Dict:
@@ -5,13 +5,15 @@ Provides shared functionality for scanning students and sending emails.
 
 import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime, timezone
 from ..models import WorkOrder, Step, StepStatus
 from ..aws_client import AWSClient
-from ..email_sender import send_email
+from ..email_sender import send_email, prime_credentials_cache, close_smtp_connections
 from ..eligible import check_eligibility
-from ..config import STUDENT_TABLE, POOLS_TABLE, PROMPTS_TABLE, EVENTS_TABLE, EMAIL_BURST_SIZE, EMAIL_RECOVERY_SLEEP_SECS, SMTP_24_HOUR_SEND_LIMIT
+from ..config import STUDENT_TABLE, POOLS_TABLE, PROMPTS_TABLE, EVENTS_TABLE, EMAIL_BURST_SIZE, EMAIL_RECOVERY_SLEEP_SECS, SMTP_24_HOUR_SEND_LIMIT, SEND_WORKERS
 from .shared import passes_stage_filter, build_campaign_string, code_to_full_language, get_stage_prefix, find_eligible_students
 
 
@@ -52,10 +54,15 @@ class SendBaseStep:
         Returns:
             True if successful, False otherwise
         """
+        send_executor = None
         try:
             # Update initial progress message
             await self._update_progress(work_order, f"Starting {self.step_name.lower()} process...", step.name)
             
+            # Fetch the sending account's SMTP credentials (all regional variants) up front
+            if work_order.account:
+                prime_credentials_cache(work_order.account)
+            
             # For actual sends (not dry-runs), check the 24-hour send limit for this account
             if not self.dryrun and work_order.account:
                 await self._update_progress(work_order, f"Checking 24-hour send limit for account '{work_order.account}'...", step.name)
@@ -84,6 +91,13 @@ class SendBaseStep:
                 await self._update_progress(work_order, f"Found {len(transactions)} transactions to process", step.name)
                 
                 event_cache: Dict[str, Dict] = {}
+                # Load every event referenced by the transactions in one BatchGetItem round trip
+                event_codes = {
+                    t.get('eventCode') or t.get('event_code') for t in transactions
+                } - {None, ''}
+                if event_codes:
+                    for event in self.aws_client.batch_get(EVENTS_TABLE, [{'aid': code} for code in event_codes]):
+                        event_cache[event['aid']] = event
                 # Receipt mode bypasses the normal student scan eligibility flow, so we preload students
                 # (from the agent's scan_table cache) for recipient name + pid resolution.
                 students_data = self.aws_client.scan_table(STUDENT_TABLE) if hasattr(self.aws_client, 'scan_table') else []
@@ -266,6 +280,7 @@ class SendBaseStep:
             
             # Process each language in the work order
             total_emails_sent = 0
+            send_executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix='email-send')
             
             for lang in work_order.languages.keys():
                 if not work_order.languages[lang]:
@@ -307,8 +322,19 @@ class SendBaseStep:
                 
                 await self._update_progress(work_order, f"Sending {total_emails_for_lang} emails for {lang}...", step.name)
                 
-                for i, student in enumerate(eligible_students):
-                    # Check for stop request before processing each student
+                html_content, subject = self._get_html_and_subject(work_order, lang, stage_record)
+                loop = asyncio.get_running_loop()
+                
+                # Students are sent in chunks of up to SEND_WORKERS concurrent SMTP sends. A chunk never
+                # spans a burst boundary, and the stop/limit checks run before each chunk.
+                i = 0
+                while i < total_emails_for_lang:
+                    chunk_end = min(i + SEND_WORKERS, total_emails_for_lang)
+                    if not self.dryrun:
+                        chunk_end = min(chunk_end, (i // EMAIL_BURST_SIZE + 1) * EMAIL_BURST_SIZE)
+                    chunk = eligible_students[i:chunk_end]
+                    
+                    # Check for stop request before processing each chunk
                     latest_work_order = self.aws_client.get_work_order(work_order.id)
                     if latest_work_order and getattr(latest_work_order, 'stopRequested', False):
                         await self._update_progress(work_order, "Step interrupted by stop request.", step.name)
@@ -317,7 +343,7 @@ class SendBaseStep:
                         return False
                     
                     # Also check for new stop messages in SQS (every 5 students)
-                    if i % 5 == 0:
+                    if any(j % 5 == 0 for j in range(i, chunk_end)):
                         if self.aws_client.check_for_stop_messages(work_order.id):
                             await self._update_progress(work_order, "Step interrupted by stop request.", step.name)
                             step.status = StepStatus.INTERRUPTED
@@ -325,7 +351,7 @@ class SendBaseStep:
                             return False
                     
                     # Periodic send limit check (every 10 emails for non-dry-runs)
-                    if not self.dryrun and work_order.account and i > 0 and i % 10 == 0:
+                    if not self.dryrun and work_order.account and any(j > 0 and j % 10 == 0 for j in range(i, chunk_end)):
                         emails_sent_in_last_24h = self.aws_client.count_emails_sent_by_account_in_last_24_hours(work_order.account)
                         if emails_sent_in_last_24h >= SMTP_24_HOUR_SEND_LIMIT:
                             error_message = f"24-hour send limit reached during sending for account '{work_order.account}'. Sent {emails_sent_in_last_24h}/{SMTP_24_HOUR_SEND_LIMIT} emails in the last 24 hours. Stopping to avoid exceeding limit."
@@ -334,36 +360,49 @@ class SendBaseStep:
                             # Mark this as reaching the limit but still successful for the emails sent so far
                             raise Exception(error_message)
                     
-                    try:
-                        success = await self._send_student_email(
-                            student, lang, work_order, event_data, pools_data, prompts_data, campaign_string, stage_record
-                        )
-                        if success:
-                            emails_sent += 1
-                            total_emails_sent += 1
-                            # Append to send_recipients table
-                            entry = {
-                                "name": f"{student.get('first', '')} {student.get('last', '')}".strip(),
-                                "email": student.get("email"),
-                                "sendtime": datetime.now(timezone.utc).isoformat()
-                            }
-                            if self.dryrun:
-                                self.aws_client.append_dryrun_recipient(campaign_string, entry)
-                            else:
-                                self.aws_client.append_send_recipient(campaign_string, entry, work_order.account)
-                    except Exception as e:
+                    # SMTP sends run on the worker threads; DynamoDB bookkeeping stays on this thread
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(send_executor, partial(
+                            self._send_prepared_email, student, lang, work_order, html_content, subject,
+                            event_data, pools_data, prompts_data
+                        ))
+                        for student in chunk
+                    ), return_exceptions=True)
+                    
+                    first_error = None
+                    entries = []
+                    for student, result in zip(chunk, results):
+                        if isinstance(result, Exception):
+                            first_error = first_error or result
+                            continue
+                        emails_sent += 1
+                        total_emails_sent += 1
+                        if not self.dryrun:
+                            self._record_student_email(student, campaign_string)
+                        entries.append({
+                            "name": f"{student.get('first', '')} {student.get('last', '')}".strip(),
+                            "email": student.get("email"),
+                            "sendtime": datetime.now(timezone.utc).isoformat()
+                        })
+                    # Append the chunk's recipients to the recipients table in one write
+                    if self.dryrun:
+                        self.aws_client.append_dryrun_recipients(campaign_string, entries)
+                    else:
+                        self.aws_client.append_send_recipients(campaign_string, entries, work_order.account)
+                    if first_error is not None:
                         # Email failure is terminal - stop processing and report error
-                        error_message = f"Email sending failed for {lang}: {str(e)}"
+                        error_message = f"Email sending failed for {lang}: {str(first_error)}"
                         await self._update_progress(work_order, error_message, step.name)
                         raise Exception(error_message)
                     
                     # Progress update
-                    if (i + 1) % 10 == 0:
-                        await self._update_progress(work_order, f"Processed {i + 1}/{len(eligible_students)} students for {lang}, sent {emails_sent} emails", step.name)
+                    if chunk_end // 10 > i // 10:
+                        await self._update_progress(work_order, f"Processed {chunk_end}/{len(eligible_students)} students for {lang}, sent {emails_sent} emails", step.name)
+                    i = chunk_end
                     
                     # Burst control (only for Send-Once and Send-Continuously)
                     if not self.dryrun:
-                        if (i + 1) % EMAIL_BURST_SIZE == 0 and i + 1 < len(eligible_students):
+                        if i % EMAIL_BURST_SIZE == 0 and i < len(eligible_students):
                             self.log('progress', f"[BURST] Starting burst control sleep for {EMAIL_RECOVERY_SLEEP_SECS} seconds...")
                             await self._update_progress(work_order, f"Burst limit reached for {lang}, sleeping for {EMAIL_RECOVERY_SLEEP_SECS} seconds...", step.name)
                             try:
@@ -395,6 +434,10 @@ class SendBaseStep:
             self.log('error', f"[ERROR] [{self.step_name}Step] Error in {self.step_name.lower()} process: {error_message}")
             await self._update_progress(work_order, f"Error: {error_message}", step.name)
             raise Exception(error_message)
+        finally:
+            if send_executor is not None:
+                send_executor.shutdown(wait=True)
+            close_smtp_connections()
 
     def _get_stage_record(self, stage: str) -> Dict:
         """Get the stage record from DynamoDB stages table"""
@@ -441,6 +484,15 @@ class SendBaseStep:
         Returns:
             True if successful, raises Exception if failed
         """
+        html_content, subject = self._get_html_and_subject(work_order, language, stage_record)
+        self._send_prepared_email(student, language, work_order, html_content, subject,
+                                  event_data, pools_data, prompts_data, transaction_data)
+        if not self.dryrun and transaction_data is None:
+            self._record_student_email(student, campaign_string)
+        return True
+
+    def _get_html_and_subject(self, work_order: WorkOrder, language: str, stage_record: Dict) -> Tuple[str, str]:
+        """Fetch a language's HTML from S3 and build its subject line, including any stage prefix."""
         try:
             # Get HTML content from S3
             if language not in work_order.s3HTMLPaths:
@@ -450,16 +502,28 @@ class SendBaseStep:
             html_content = self.aws_client.get_s3_object_content(s3_url)
             if not html_content:
                 raise Exception(f"Failed to retrieve HTML content from S3 for language {language}, URL: {s3_url}")
-            
-            # Get subject for this language
-            subject = work_order.subjects.get(language, f"Email for {language}")
-            
-            # Apply stage-specific prefix if defined
-            prefix = get_stage_prefix(stage_record, language)
-            if prefix:
-                subject = f"{prefix}{subject}"
+        except Exception as e:
+            error_msg = f"Error preparing email in {language}: {str(e)}"
+            self.log('error', f"[ERROR] {error_msg}")
+            raise Exception(error_msg)
+        
+        # Get subject for this language
+        subject = work_order.subjects.get(language, f"Email for {language}")
+        
+        # Apply stage-specific prefix if defined
+        prefix = get_stage_prefix(stage_record, language)
+        if prefix:
+            subject = f"{prefix}{subject}"
+        return html_content, subject
 
-            # Send the email
+    def _send_prepared_email(self, student: Dict, language: str, work_order: WorkOrder, html_content: str,
+                             subject: str, event_data: Dict, pools_data: List[Dict], prompts_data: List[Dict],
+                             transaction_data: Dict = None) -> bool:
+        """
+        Render and send one student's email. Makes no DynamoDB writes, so it is safe to run on the
+        send worker threads.
+        """
+        try:
             success = send_email(
                 html=html_content,
                 subject=subject,
@@ -476,14 +540,6 @@ class SendBaseStep:
             if not success:
                 raise Exception(f"send_email() returned False for student {student.get('email')} in language {language}")
             
-            if not self.dryrun and transaction_data is None:
-                # Record the campaign string in the student's emails field with ISO 8601 timestamp
-                emails = student.get('emails', {})
-                emails[campaign_string] = datetime.utcnow().isoformat()
-                
-                # Update the student record in DynamoDB
-                self.aws_client.update_student_emails(student['id'], emails)
-            
             return True
             
         except Exception as e:
@@ -491,6 +547,14 @@ class SendBaseStep:
             self.log('error', f"[ERROR] {error_msg}")
             raise Exception(error_msg)
 
+    def _record_student_email(self, student: Dict, campaign_string: str):
+        """Record the campaign string in the student's emails field with ISO 8601 timestamp."""
+        emails = student.get('emails', {})
+        emails[campaign_string] = datetime.utcnow().isoformat()
+        
+        # Update the student record in DynamoDB
+        self.aws_client.update_student_emails(student['id'], emails)
+
     async def _update_progress(self, work_order: WorkOrder, message: str, step_name: str = None):
         """Update the work order progress message."""
         # Use the provided step_name or fall back to self.actual_step_name for backward compatibility
@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Tuple
 
 from ..models import WorkOrder, Step, StepStatus
 from ..aws_client import AWSClient, pick_receipt_transaction_for_test
-from ..email_sender import send_email
+from ..email_sender import send_email, close_smtp_connections
 from ..config import STUDENT_TABLE, POOLS_TABLE, PROMPTS_TABLE, EVENTS_TABLE
 
 
@@ -64,8 +64,12 @@ class TestStep:
             
             # Get testers' student data (keep work-order id for receipt txn matching)
             testers_with_ids: List[Tuple[str, Dict[str, Any]]] = []
+            testers_by_id = {
+                s.get('id'): s
+                for s in self.aws_client.batch_get(STUDENT_TABLE, [{'id': t} for t in work_order.testers])
+            }
             for tester_id in work_order.testers:
-                student_data = self.aws_client.get_student(tester_id)
+                student_data = testers_by_id.get(tester_id)
                 if not student_data:
                     raise Exception(f"Tester {tester_id} not found in student table")
                 testers_with_ids.append((tester_id, student_data))
@@ -228,6 +232,8 @@ class TestStep:
             self.log('error', f"[ERROR] [TestStep] Error in test process: {error_message}")
             await self._update_progress(work_order, f"Error: {error_message}")
             raise Exception(error_message)
+        finally:
+            close_smtp_connections()
 
     async def _update_progress(self, work_order: WorkOrder, message: str):
         """Update the work order progress message."""
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for AWSClient.batch_get.
+Verifies that unprocessed keys are retried a bounded number of times with exponential backoff,
+and that students are cached apart from other items.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add the agent directory to the path so the src package imports resolve
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src import aws_client as aws_client_module
+from src.aws_client import (
+    AWSClient, TableCacheManager, BATCH_GET_MAX_ATTEMPTS, ITEM_CACHE_MAX_ENTRIES, STUDENT_CACHE_MAX_ENTRIES
+)
+from src.config import STUDENT_TABLE, EVENTS_TABLE
+
+
+def _make_client():
+    """Build an AWSClient without touching AWS (skips __init__)."""
+    client = AWSClient.__new__(AWSClient)
+    client.logging_config = Mock()
+    client.dynamodb = Mock()
+    client.cache_manager = TableCacheManager(client.logging_config)
+    return client
+
+
+def test_unprocessed_keys_are_retried_with_backoff():
+    """Unprocessed keys are requested again after growing delays until they are returned."""
+    print("Testing batch_get retry of unprocessed keys...")
+    client = _make_client()
+    keys = [{'aid': 'a'}, {'aid': 'b'}]
+    client.dynamodb.batch_get_item.side_effect = [
+        {'Responses': {EVENTS_TABLE: [{'aid': 'a'}]}, 'UnprocessedKeys': {EVENTS_TABLE: {'Keys': [{'aid': 'b'}]}}},
+        {'Responses': {EVENTS_TABLE: []}, 'UnprocessedKeys': {EVENTS_TABLE: {'Keys': [{'aid': 'b'}]}}},
+        {'Responses': {EVENTS_TABLE: [{'aid': 'b'}]}, 'UnprocessedKeys': {}},
+    ]
+
+    with patch.object(aws_client_module.time, 'sleep') as sleep:
+        items = client.batch_get(EVENTS_TABLE, keys)
+
+    assert sorted(item['aid'] for item in items) == ['a', 'b']
+    assert client.dynamodb.batch_get_item.call_count == 3
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert len(delays) == 2 and delays[1] > delays[0], delays
+    print("✅ Unprocessed keys retried with increasing backoff")
+
+
+def test_unprocessed_keys_retry_is_bounded():
+    """A table that keeps returning unprocessed keys is given up on after BATCH_GET_MAX_ATTEMPTS."""
+    print("Testing batch_get retry cap...")
+    client = _make_client()
+    client.dynamodb.batch_get_item.return_value = {
+        'Responses': {EVENTS_TABLE: []}, 'UnprocessedKeys': {EVENTS_TABLE: {'Keys': [{'aid': 'a'}]}}
+    }
+
+    with patch.object(aws_client_module.time, 'sleep') as sleep:
+        items = client.batch_get(EVENTS_TABLE, [{'aid': 'a'}])
+
+    assert items == []
+    assert client.dynamodb.batch_get_item.call_count == BATCH_GET_MAX_ATTEMPTS
+    assert sleep.call_count == BATCH_GET_MAX_ATTEMPTS - 1
+    assert any(call.args[0] == 'warning' for call in client.logging_config.log.call_args_list)
+    print(f"✅ Gave up after {BATCH_GET_MAX_ATTEMPTS} attempts")
+
+
+def test_students_are_cached_apart_from_items():
+    """Students fetched by batch_get don't evict cached events."""
+    print("Testing separate student cache...")
+    client = _make_client()
+    cache = client.cache_manager
+    cache.set_cached_item(EVENTS_TABLE, {'aid': 'event'}, {'aid': 'event'})
+
+    students = [{'id': str(i)} for i in range(max(ITEM_CACHE_MAX_ENTRIES, STUDENT_CACHE_MAX_ENTRIES) + 1)]
+    client.dynamodb.batch_get_item.side_effect = lambda RequestItems: {
+        'Responses': {STUDENT_TABLE: RequestItems[STUDENT_TABLE]['Keys']}, 'UnprocessedKeys': {}
+    }
+    client.batch_get(STUDENT_TABLE, students)
+
+    assert cache.get_cached_item(EVENTS_TABLE, {'aid': 'event'}) == {'aid': 'event'}
+    assert cache.get_cached_item(STUDENT_TABLE, {'id': students[-1]['id']}) == students[-1]
+    assert len(cache._student_items) == STUDENT_CACHE_MAX_ENTRIES
+    assert len(cache._items) == 1
+
+    cache.invalidate_item(STUDENT_TABLE, {'id': students[-1]['id']})
+    assert cache.get_cached_item(STUDENT_TABLE, {'id': students[-1]['id']}) is None
+    print("✅ Students cached separately and bounded by STUDENT_CACHE_MAX_ENTRIES")
+
+
+def main():
+    """Run all batch_get tests."""
+    print("Running batch_get tests...\n")
+
+    try:
+        test_unprocessed_keys_are_retried_with_backoff()
+        test_unprocessed_keys_retry_is_bounded()
+        test_students_are_cached_apart_from_items()
+
+        print("\n🎉 All batch_get tests passed!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -103,15 +103,15 @@ def test_aws_client_cache_integration():
         assert aws_client.cache_manager.last_sqs_invalidation > 0
         
         # Test sleeping work orders check
-        # Mock the table scan response
-        with patch.object(aws_client.table, 'scan') as mock_scan:
+        # Mock the state-index query response
+        with patch.object(aws_client.table, 'query') as mock_query:
             # Test with sleeping work orders
-            mock_scan.return_value = {'Items': [{'id': 'test'}]}
+            mock_query.return_value = {'Count': 1}
             has_sleeping = aws_client.has_sleeping_work_orders()
             assert has_sleeping == True
             
             # Test without sleeping work orders
-            mock_scan.return_value = {'Items': []}
+            mock_query.return_value = {'Count': 0}
             has_sleeping = aws_client.has_sleeping_work_orders()
             assert has_sleeping == False
         
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that ordering pool attributes by cost doesn't change eligibility results.
+Randomized pools (including malformed attributes and pool references) are checked against the
+same pools evaluated in their configured attribute order.
+"""
+
+import copy
+import io
+import os
+import random
+import sys
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+# Add the src directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import eligible
+from eligible import check_eligibility
+
+POOL_NAMES = [f'p{i}' for i in range(8)]
+ATTRIBUTE_TYPES = list(eligible.ATTRIBUTE_COMPILERS) + ['unknown']
+
+EVENT = {
+    'config': {
+        'offeringPresentation': 'installments',
+        'whichRetreatsConfig': {
+            'r1': {'offeringMinimum': 1, 'offeringTotal': 10},
+            'r2': {'offeringMinimum': 2, 'offeringTotal': 5},
+        },
+    }
+}
+
+
+def random_attribute(rng, index):
+    """An attribute of a random type; pool references only point further down the list, so there are no cycles."""
+    attr_type = rng.choice(ATTRIBUTE_TYPES)
+    attr = {'type': attr_type}
+    later = POOL_NAMES[index + 1:] or ['missing']
+    if attr_type == 'pool':
+        attr['name'] = rng.choice(later + ['missing'])
+    elif attr_type == 'pooldiff':
+        attr['inpool'], attr['outpool'] = rng.choice(later), rng.choice(later)
+    elif attr_type == 'pooland':
+        attr['pool1'], attr['pool2'] = rng.choice(later), rng.choice(later)
+    elif attr_type == 'practice':
+        attr['field'] = rng.choice(['a', 'b'])
+    if attr_type in ('offering', 'offeringandpools', 'oath', 'attended', 'join', 'joinwhich', 'offeringwhich', 'specifiedAIDBool'):
+        attr['aid'] = rng.choice(['x', 'y'])
+    if attr_type in ('offering', 'offeringandpools', 'offeringwhich'):
+        attr['subevent'] = rng.choice(['s1', 's2', 'any'])
+    if attr_type == 'offeringandpools':
+        attr['pools'] = rng.sample(later, min(2, len(later)))
+    if attr_type in ('joinwhich', 'offeringwhich'):
+        attr['retreat'] = rng.choice(['r1', 'r'])
+    if attr_type == 'specifiedAIDBool':
+        attr['boolName'] = rng.choice(['oath', 'join'])
+    if rng.random() < 0.1:
+        # Drop a field to make the attribute malformed
+        attr.pop(rng.choice(list(attr)), None)
+    return attr
+
+
+def random_student(rng):
+    programs = {}
+    for aid in ['x', 'y']:
+        if rng.random() < 0.3:
+            continue
+        program = {key: rng.random() < 0.5 for key in ['join', 'oath', 'attended', 'withdrawn', 'accepted', 'manualInclude', 'eligible', 'test']}
+        program['whichRetreats'] = {'r1': rng.random() < 0.5, 'r2': rng.random() < 0.5}
+        program['offeringHistory'] = {
+            subevent: ({'offeringSKU': 'a'} if rng.random() < 0.5 else {'installments': {'a': {'offeringAmount': rng.choice([0, 5])}}})
+            for subevent in ['s1', 's2'] if rng.random() < 0.6
+        }
+        programs[aid] = program
+    return {'programs': programs, 'practice': {'a': rng.random() < 0.5}}
+
+
+def evaluate(pools, student):
+    """check_eligibility for p0, with a raised error returned as (type, message)."""
+    try:
+        with redirect_stdout(io.StringIO()):
+            return check_eligibility('p0', student, 'x', pools, 's1', EVENT)
+    except Exception as e:
+        return (type(e).__name__, str(e))
+
+
+def configured_order(pools, student):
+    """check_eligibility with every attribute type at the same cost, i.e. in configured order."""
+    with patch.object(eligible, 'ATTRIBUTE_COSTS', {}):
+        # A copy of the pools list so it is compiled again under the patched costs
+        return evaluate(copy.deepcopy(pools), student)
+
+
+def test_ordering_matches_configured_order():
+    """Test that randomized pools give the same result, or the same error, in either order."""
+    print("Testing attribute ordering against configured order...")
+    rng = random.Random(1)
+    checked = 0
+    for _ in range(2000):
+        pools = [{'name': name, 'attributes': [random_attribute(rng, index) for _ in range(rng.randint(0, 3))]}
+                 for index, name in enumerate(POOL_NAMES)]
+        for _ in range(3):
+            student = random_student(rng)
+            expected = configured_order(pools, student)
+            actual = evaluate(pools, student)
+            assert actual == expected, f"{actual} != {expected} for pools {pools} and student {student}"
+            checked += 1
+    print(f"✅ {checked} randomized checks matched configured order")
+
+
+def test_malformed_attribute_still_raises():
+    """Test that a malformed attribute ahead of a cheap match is still reached first."""
+    print("Testing malformed attribute ahead of a match...")
+    pools = [{'name': 'p0', 'attributes': [{'type': 'pool'}, {'type': 'true'}]}]
+    result = evaluate(pools, {'programs': {}})
+    assert result[0] == 'ValueError', result
+    print("✅ Malformed attribute raises before the 'true' attribute matches")
+
+
+def test_reference_to_malformed_pool_still_raises():
+    """Test that a pool referring to a malformed pool keeps its configured order."""
+    print("Testing reference to a malformed pool...")
+    pools = [
+        {'name': 'p0', 'attributes': [{'type': 'pool', 'name': 'p1'}, {'type': 'true'}]},
+        {'name': 'p1', 'attributes': [{'type': 'specifiedAIDBool', 'aid': 'x'}]},
+    ]
+    result = evaluate(pools, {'programs': {}})
+    assert result[0] == 'ValueError', result
+    print("✅ Reference to a malformed pool raises before the 'true' attribute matches")
+
+
+def test_well_formed_pool_is_reordered():
+    """Test that a well-formed pool evaluates its cheap attributes first."""
+    print("Testing reordering of a well-formed pool...")
+    pools = [
+        {'name': 'p0', 'attributes': [{'type': 'pool', 'name': 'p1'}, {'type': 'true'}]},
+        {'name': 'p1', 'attributes': [{'type': 'oath', 'aid': 'x'}]},
+    ]
+    with redirect_stdout(io.StringIO()):
+        compiled = eligible.compile_pools(pools)
+    ev = eligible._Evaluation(compiled, {'programs': {}}, 'x', 's1', None)
+    assert compiled['p0'](ev) is True
+    assert 'p1' not in ev.memo, "the referenced pool should not be evaluated once 'true' matches"
+    print("✅ 'true' is evaluated before the pool reference")
+
+
+def main():
+    """Run all eligibility tests."""
+    print("Running eligibility ordering tests...\n")
+
+    try:
+        test_ordering_matches_configured_order()
+        test_malformed_attribute_still_raises()
+        test_reference_to_malformed_pool_still_raises()
+        test_well_formed_pool_is_reordered()
+
+        print("\n🎉 All eligibility tests passed!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the 24-hour send count.
+Verifies that the send log is only used once it covers the whole 24-hour window
+(SEND_LOG_START at least 24 hours ago), and that the send recipients scan is used until then.
+"""
+
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from unittest.mock import Mock, patch
+
+# Add the agent directory to the path so the src package imports resolve
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src import aws_client as aws_client_module
+from src.aws_client import AWSClient
+
+
+def _make_client():
+    """Build an AWSClient without touching AWS (skips __init__), with both count paths mocked."""
+    client = AWSClient.__new__(AWSClient)
+    client.logging_config = Mock()
+    client._count_send_log = Mock(return_value=3)
+    client._count_recent_sends_segment = Mock(return_value=5)
+    return client
+
+
+def _count(send_log_start):
+    client = _make_client()
+    with patch.object(aws_client_module, 'SEND_LOG_TABLE', 'send-log'), \
+            patch.object(aws_client_module, 'SEND_LOG_START', send_log_start), \
+            patch.object(aws_client_module, 'SCAN_SEGMENTS', 1):
+        count = client.count_emails_sent_by_account_in_last_24_hours('connect')
+    return client, count
+
+
+def test_scan_without_send_log_start():
+    """Without SEND_LOG_START the send log isn't trusted and the scan is used."""
+    print("Testing count without SEND_LOG_START...")
+    client, count = _count(None)
+    assert count == 5
+    client._count_send_log.assert_not_called()
+    print("✅ Scan used when SEND_LOG_START is unset")
+
+
+def test_scan_while_send_log_is_new():
+    """A send log started less than 24 hours ago misses earlier sends, so the scan is used."""
+    print("Testing count during the first 24 hours of the send log...")
+    start = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    client, count = _count(start)
+    assert count == 5
+    client._count_send_log.assert_not_called()
+    print("✅ Scan used until the send log covers 24 hours")
+
+
+def test_send_log_once_it_covers_the_window():
+    """A send log started more than 24 hours ago is queried instead of scanning."""
+    print("Testing count once the send log covers 24 hours...")
+    start = (datetime.now(timezone.utc) - timedelta(hours=25)).replace(tzinfo=None).isoformat()
+    client, count = _count(start)
+    assert count == 3
+    client._count_recent_sends_segment.assert_not_called()
+    print("✅ Send log queried once it covers 24 hours")
+
+
+def test_invalid_send_log_start_falls_back_to_scan():
+    """An unparseable SEND_LOG_START is reported and the scan is used."""
+    print("Testing count with an invalid SEND_LOG_START...")
+    client, count = _count('yesterday')
+    assert count == 5
+    assert any(call.args[0] == 'warning' for call in client.logging_config.log.call_args_list)
+    print("✅ Invalid SEND_LOG_START falls back to the scan")
+
+
+def main():
+    """Run all send log tests."""
+    print("Running send log tests...\n")
+
+    try:
+        test_scan_without_send_log_start()
+        test_scan_while_send_log_is_new()
+        test_send_log_once_it_covers_the_window()
+        test_invalid_send_log_start_falls_back_to_scan()
+
+        print("\n🎉 All send log tests passed!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for SQS batch handling in the email agent.
+Verifies that messages received after a start request in the same batch are handed
+back to the queue before the start runs, so a stop for that work order stays visible.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, Mock
+
+# Add the agent directory to the path so the src package imports resolve
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.agent import EmailAgent
+
+
+def _message(receipt, work_order_id, action):
+    return {
+        'ReceiptHandle': receipt,
+        'Body': json.dumps({'workOrderId': work_order_id, 'stepName': 'Send', 'action': action})
+    }
+
+
+def _make_agent():
+    """Build an EmailAgent without touching AWS (skips __init__)."""
+    agent = EmailAgent.__new__(EmailAgent)
+    agent.logging_config = Mock()
+    agent.aws_client = Mock()
+    agent.aws_client.get_work_order.return_value = Mock()
+    agent.aws_client.delete_sqs_messages.return_value = True
+    agent.aws_client.release_sqs_messages.return_value = True
+    agent._handle_stop_request = AsyncMock()
+    return agent
+
+
+def test_stop_after_start_in_one_batch():
+    """A stop queued behind a start is released before the start runs, not held or handled."""
+    print("Testing stop message after start message in one batch...")
+    agent = _make_agent()
+    released_before_start = []
+
+    async def handle_start(work_order_id, work_order, step_name):
+        # Record what had been handed back to the queue by the time the start runs
+        released_before_start.extend(
+            handle for call in agent.aws_client.release_sqs_messages.call_args_list for handle in call.args[0]
+        )
+        return True
+
+    agent._handle_start_request = AsyncMock(side_effect=handle_start)
+    messages = [_message('r-start', 'wo-1', 'start'), _message('r-stop', 'wo-1', 'stop')]
+
+    asyncio.run(agent._process_sqs_messages(messages))
+
+    agent._handle_start_request.assert_awaited_once()
+    assert released_before_start == ['r-stop']
+    # The stop is left for check_for_stop_messages (or a later poll), not consumed here
+    agent._handle_stop_request.assert_not_awaited()
+    deleted = [handle for call in agent.aws_client.delete_sqs_messages.call_args_list for handle in call.args[0]]
+    assert deleted == ['r-start']
+    print("✓ Stop after start test passed")
+
+
+def test_failed_start_does_not_process_released_messages():
+    """If the start raises, messages already handed back are not processed from the stale batch."""
+    print("Testing failed start with released messages...")
+    agent = _make_agent()
+    agent._handle_start_request = AsyncMock(side_effect=RuntimeError("boom"))
+    messages = [_message('r-start', 'wo-1', 'start'), _message('r-stop', 'wo-2', 'stop')]
+
+    asyncio.run(agent._process_sqs_messages(messages))
+
+    agent.aws_client.release_sqs_messages.assert_called_once_with(['r-stop'])
+    agent._handle_stop_request.assert_not_awaited()
+    print("✓ Failed start test passed")
+
+
+def test_stop_before_start_is_handled():
+    """Messages ahead of the start in the batch are still handled and deleted."""
+    print("Testing stop message before start message in one batch...")
+    agent = _make_agent()
+    agent._handle_start_request = AsyncMock(return_value=True)
+    messages = [_message('r-stop', 'wo-2', 'stop'), _message('r-start', 'wo-1', 'start')]
+
+    asyncio.run(agent._process_sqs_messages(messages))
+
+    agent._handle_stop_request.assert_awaited_once()
+    agent.aws_client.release_sqs_messages.assert_not_called()
+    deleted = [handle for call in agent.aws_client.delete_sqs_messages.call_args_list for handle in call.args[0]]
+    assert deleted == ['r-stop', 'r-start']
+    print("✓ Stop before start test passed")
+
+
+def main():
+    """Run all SQS batch tests."""
+    print("Running SQS batch handling tests...\n")
+
+    try:
+        test_stop_after_start_in_one_batch()
+        test_failed_start_does_not_process_released_messages()
+        test_stop_before_start_is_handled()
+        print("\n🎉 All SQS batch tests passed!")
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,14 +1,29 @@
 const { DynamoDBClient } = require('@aws-sdk/client-dynamodb');
-const { DynamoDBDocumentClient, PutCommand, DeleteCommand, GetCommand, ScanCommand } = require('@aws-sdk/lib-dynamodb');
+const { DynamoDBDocumentClient, PutCommand, DeleteCommand, GetCommand, ScanCommand, BatchWriteCommand } = require('@aws-sdk/lib-dynamodb');
 const { SQSClient } = require('@aws-sdk/client-sqs');
 const { ApiGatewayManagementApiClient, PostToConnectionCommand } = require('@aws-sdk/client-apigatewaymanagementapi');
 const jwt = require('jsonwebtoken');
 const crypto = require('crypto');
+const https = require('https');
+
+// [DEBUG] messages, including full event and message dumps, are only built and logged when
+// LOG_LEVEL=DEBUG; errors are always logged
+const DEBUG_LOGGING = (process.env.LOG_LEVEL || 'INFO').toUpperCase() === 'DEBUG';
+
+// Shared client settings: one keep-alive agent so warm invocations reuse TLS connections, with
+// enough sockets for the concurrent broadcast fan-out, and adaptive retries for throttling.
+// noDelay keeps Nagle from holding back the small PostToConnection bodies on older runtimes.
+const httpsAgent = new https.Agent({ keepAlive: true, maxSockets: 64, noDelay: true });
+const AWS_CLIENT_CONFIG = {
+    requestHandler: { httpsAgent },
+    maxAttempts: 3,
+    retryMode: 'adaptive'
+};
 
 // Initialize AWS v3 clients
-const dynamoClient = new DynamoDBClient({});
+const dynamoClient = new DynamoDBClient(AWS_CLIENT_CONFIG);
 const dynamodb = DynamoDBDocumentClient.from(dynamoClient);
-const sqs = new SQSClient({});
+const sqs = new SQSClient(AWS_CLIENT_CONFIG);
 
 // Get environment variables
 const WORK_ORDERS_TABLE = process.env.WORK_ORDERS_TABLE;
@@ -26,13 +41,13 @@ if (WEBSOCKET_API_URL) {
     const domain = parts[0];
     const stage = parts[1] || '';
     MGMT_API_URL = stage ? `https://${domain}/${stage}` : `https://${domain}`;
-    console.log(`[DEBUG] Management API URL: ${MGMT_API_URL}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Management API URL: ${MGMT_API_URL}`);
 } else {
     console.log("[ERROR] WEBSOCKET_API_URL environment variable is not set");
 }
 
 // Initialize API Gateway Management API v3 client
-const apigwmgmt = MGMT_API_URL ? new ApiGatewayManagementApiClient({ endpoint: MGMT_API_URL }) : null;
+const apigwmgmt = MGMT_API_URL ? new ApiGatewayManagementApiClient({ ...AWS_CLIENT_CONFIG, endpoint: MGMT_API_URL }) : null;
 
 /**
  * Verify JWT token and return decoded payload
@@ -44,7 +59,7 @@ function verifyToken(token) {
         // Get RSA public key from environment variable
         const rsaPublicKeyB64 = process.env.API_RSA_PUBLIC;
         if (!rsaPublicKeyB64) {
-            console.log("[DEBUG] API_RSA_PUBLIC environment variable not set");
+            if (DEBUG_LOGGING) console.log("[DEBUG] API_RSA_PUBLIC environment variable not set");
             return null;
         }
 
@@ -54,13 +69,13 @@ function verifyToken(token) {
         // Get JWT issuer from environment variable
         const jwtIssuer = process.env.JWT_ISSUER_NAME;
         if (!jwtIssuer) {
-            console.log("[DEBUG] JWT_ISSUER_NAME environment variable not set");
+            if (DEBUG_LOGGING) console.log("[DEBUG] JWT_ISSUER_NAME environment variable not set");
             return null;
         }
 
-        console.log("[DEBUG] Attempting to decode token with RS256 algorithm");
-        console.log(`[DEBUG] Public key length: ${publicKey.length} characters`);
-        console.log(`[DEBUG] JWT issuer: ${jwtIssuer}`);
+        if (DEBUG_LOGGING) console.log("[DEBUG] Attempting to decode token with RS256 algorithm");
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Public key length: ${publicKey.length} characters`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] JWT issuer: ${jwtIssuer}`);
 
         // Decode and verify token using RS256
         const decoded = jwt.verify(token, publicKey, {
@@ -75,19 +90,19 @@ function verifyToken(token) {
             : tokenIssuer;
 
         if (cleanedTokenIssuer !== jwtIssuer) {
-            console.log(`[DEBUG] Token issuer mismatch: expected=${jwtIssuer}, got=${decoded.issuer} (cleaned: ${cleanedTokenIssuer})`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Token issuer mismatch: expected=${jwtIssuer}, got=${decoded.issuer} (cleaned: ${cleanedTokenIssuer})`);
             return null;
         }
 
-        console.log("[DEBUG] Token decoded successfully");
+        if (DEBUG_LOGGING) console.log("[DEBUG] Token decoded successfully");
 
         // Check if token is expired
         if (decoded.exp && decoded.exp < Date.now() / 1000) {
-            console.log(`[DEBUG] Token expired: exp=${decoded.exp}, current_time=${Date.now() / 1000}`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Token expired: exp=${decoded.exp}, current_time=${Date.now() / 1000}`);
             return null;
         }
 
-        console.log("[DEBUG] Token verification successful");
+        if (DEBUG_LOGGING) console.log("[DEBUG] Token verification successful");
         return decoded;
     } catch (error) {
         console.log(`[DEBUG] Token verification error: ${error.message}`);
@@ -111,6 +126,53 @@ function extractTokenFromUrl(url) {
     }
 }
 
+// Connection IDs per table type, reused across warm invocations for CONNECTION_CACHE_TTL_MS.
+// A container only sees its own $connect/$disconnect events, so the TTL bounds how stale the list can get.
+const CONNECTION_CACHE_TTL_MS = 10 * 1000;
+const connectionIdCache = {};
+
+// Parallel scan segments used to read a connections table
+const CONNECTION_SCAN_SEGMENTS = 4;
+
+/**
+ * Read every connectionId in one parallel-scan segment, following LastEvaluatedKey past 1 MB pages
+ * @param {string} connectionsTable - The connections table name
+ * @param {number} segment - This segment's index
+ * @returns {Promise<Array>} - Connection IDs in the segment
+ */
+async function scanConnectionSegment(connectionsTable, segment) {
+    const ids = [];
+    let exclusiveStartKey;
+    do {
+        const response = await dynamodb.send(new ScanCommand({
+            TableName: connectionsTable,
+            ProjectionExpression: 'connectionId',
+            Segment: segment,
+            TotalSegments: CONNECTION_SCAN_SEGMENTS,
+            ExclusiveStartKey: exclusiveStartKey
+        }));
+        for (const item of response.Items || []) {
+            ids.push(item.connectionId);
+        }
+        exclusiveStartKey = response.LastEvaluatedKey;
+    } while (exclusiveStartKey);
+    return ids;
+}
+
+/**
+ * Forget the cached connection IDs for a table type, or for all table types
+ * @param {string} [tableType] - 'work-orders' or 'students'; omit to clear both
+ */
+function invalidateConnectionIds(tableType) {
+    if (tableType) {
+        delete connectionIdCache[tableType];
+    } else {
+        for (const key of Object.keys(connectionIdCache)) {
+            delete connectionIdCache[key];
+        }
+    }
+}
+
 /**
  * Get all active WebSocket connection IDs for a specific table type
  * @param {string} tableType - 'work-orders' or 'students'
@@ -119,12 +181,18 @@ function extractTokenFromUrl(url) {
 async function getConnectionIds(tableType) {
     const connectionsTable = tableType === 'students' ? STUDENT_CONNECTIONS_TABLE : WORK_ORDER_CONNECTIONS_TABLE;
 
+    const cached = connectionIdCache[tableType];
+    if (cached && Date.now() - cached.fetchedAt < CONNECTION_CACHE_TTL_MS) {
+        return cached.ids;
+    }
+
     try {
-        const response = await dynamodb.send(new ScanCommand({
-            TableName: connectionsTable,
-            ProjectionExpression: 'connectionId'
-        }));
-        return (response.Items || []).map(item => item.connectionId);
+        const segments = await Promise.all(
+            Array.from({ length: CONNECTION_SCAN_SEGMENTS }, (_, segment) => scanConnectionSegment(connectionsTable, segment))
+        );
+        const ids = segments.flat();
+        connectionIdCache[tableType] = { ids, fetchedAt: Date.now() };
+        return ids;
     } catch (error) {
         console.log(`[DEBUG] Error getting connection IDs for ${tableType}: ${error.message}`);
         return [];
@@ -138,7 +206,7 @@ async function getConnectionIds(tableType) {
  * @returns {Promise<Object>} - Response object
  */
 exports.handler = async (event, context) => {
-    console.log(`[DEBUG] Received event: ${JSON.stringify(event)}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Received event: ${JSON.stringify(event)}`);
 
     // Handle WebSocket events
     const routeKey = event.requestContext?.routeKey;
@@ -162,22 +230,22 @@ exports.handler = async (event, context) => {
  */
 async function handleConnect(event) {
     const connectionId = event.requestContext.connectionId;
-    console.log(`[DEBUG] New WebSocket connection: ${connectionId}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] New WebSocket connection: ${connectionId}`);
 
     // Extract token from query parameters
     const queryParams = event.queryStringParameters || {};
     const token = queryParams.token;
-    console.log(`[DEBUG] Extracted token: ${token ? token.substring(0, 50) + '...' : 'None'}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Extracted token: ${token ? token.substring(0, 50) + '...' : 'None'}`);
 
     if (!token) {
-        console.log(`[DEBUG] No token provided for connection ${connectionId}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] No token provided for connection ${connectionId}`);
         return { statusCode: 401, body: 'No token provided' };
     }
 
     // Verify token
     const decodedToken = verifyToken(token);
     if (!decodedToken) {
-        console.log(`[DEBUG] Invalid token for connection ${connectionId}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Invalid token for connection ${connectionId}`);
         return { statusCode: 401, body: 'Invalid or expired token' };
     }
 
@@ -200,7 +268,8 @@ async function handleConnect(event) {
             }
         }));
 
-        console.log(`[DEBUG] Connection ${connectionId} authenticated for user ${decodedToken.pid}`);
+        invalidateConnectionIds(tableType);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Connection ${connectionId} authenticated for user ${decodedToken.pid}`);
         return { statusCode: 200 };
     } catch (error) {
         console.log(`[DEBUG] Error storing connection: ${error.message}`);
@@ -215,7 +284,7 @@ async function handleConnect(event) {
  */
 async function handleDisconnect(event) {
     const connectionId = event.requestContext.connectionId;
-    console.log(`[DEBUG] WebSocket disconnection: ${connectionId}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] WebSocket disconnection: ${connectionId}`);
 
     try {
         // Try to remove from both tables (connection might be in either)
@@ -229,6 +298,7 @@ async function handleDisconnect(event) {
                 Key: { connectionId: connectionId }
             }))
         ]);
+        invalidateConnectionIds();
         return { statusCode: 200 };
     } catch (error) {
         console.log(`[DEBUG] Error removing connection: ${error.message}`);
@@ -243,13 +313,13 @@ async function handleDisconnect(event) {
  */
 async function handleDefault(event) {
     const connectionId = event.requestContext.connectionId;
-    console.log(`[DEBUG] Received message from connection ${connectionId}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Received message from connection ${connectionId}`);
 
     // Parse the message body first to check if it's a ping
     let body;
     try {
         body = JSON.parse(event.body || '{}');
-        console.log(`[DEBUG] Message body: ${JSON.stringify(body)}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Message body: ${JSON.stringify(body)}`);
     } catch (error) {
         console.log(`[ERROR] Error parsing message body: ${error.message}`);
         return { statusCode: 400, body: 'Invalid JSON' };
@@ -257,7 +327,7 @@ async function handleDefault(event) {
 
     // Handle ping messages immediately (no token validation required)
     if (body.type === 'ping') {
-        console.log(`[DEBUG] Received ping from ${connectionId}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Received ping from ${connectionId}`);
         if (!apigwmgmt) {
             console.log("[ERROR] apigwmgmt client is not initialized");
             return { statusCode: 500, body: 'WebSocket API URL not configured' };
@@ -267,14 +337,14 @@ async function handleDefault(event) {
             type: 'connectionId',
             connectionId: connectionId
         };
-        console.log(`[DEBUG] Sending response: ${JSON.stringify(responseData)}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Sending response: ${JSON.stringify(responseData)}`);
 
         try {
             await apigwmgmt.send(new PostToConnectionCommand({
                 Data: Buffer.from(JSON.stringify(responseData)),
                 ConnectionId: connectionId
             }));
-            console.log(`[DEBUG] Successfully sent connection ID ${connectionId} to client`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Successfully sent connection ID ${connectionId} to client`);
             return { statusCode: 200 };
         } catch (error) {
             console.log(`[ERROR] Failed to send connection ID: ${error.message}`);
@@ -283,7 +353,7 @@ async function handleDefault(event) {
     }
 
     // For non-ping messages, continue with token validation
-    console.log(`[DEBUG] Processing non-ping message: ${body.type}`);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Processing non-ping message: ${body.type}`);
 
     // Extract table type from query parameters
     const queryParams = event.queryStringParameters || {};
@@ -298,24 +368,24 @@ async function handleDefault(event) {
         }));
 
         if (!connectionResponse.Item) {
-            console.log(`[DEBUG] Connection ${connectionId} not found in database`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Connection ${connectionId} not found in database`);
             return { statusCode: 401, body: 'Connection not found' };
         }
 
         const connectionInfo = connectionResponse.Item;
-        console.log(`[DEBUG] Connection info: ${JSON.stringify(connectionInfo)}`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Connection info: ${JSON.stringify(connectionInfo)}`);
 
         // Extract token from query parameters for validation
         const token = queryParams.token;
         if (!token) {
-            console.log(`[DEBUG] No token provided for message from connection ${connectionId}`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] No token provided for message from connection ${connectionId}`);
             return { statusCode: 401, body: 'No token provided' };
         }
 
         // Verify token on every message
         const decodedToken = verifyToken(token);
         if (!decodedToken) {
-            console.log(`[DEBUG] Invalid token for message from connection ${connectionId}, closing connection`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Invalid token for message from connection ${connectionId}, closing connection`);
 
             // Close the connection by sending an error message
             if (apigwmgmt) {
@@ -334,13 +404,14 @@ async function handleDefault(event) {
                 TableName: connectionsTable,
                 Key: { connectionId: connectionId }
             }));
+            invalidateConnectionIds(tableType);
 
             return { statusCode: 401, body: 'Invalid or expired token' };
         }
 
         // Verify token matches stored connection info
         if (decodedToken.pid !== connectionInfo.pid || decodedToken.hash !== connectionInfo.hash) {
-            console.log(`[DEBUG] Token mismatch for connection ${connectionId}`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Token mismatch for connection ${connectionId}`);
             return { statusCode: 401, body: 'Token mismatch' };
         }
 
@@ -354,6 +425,34 @@ async function handleDefault(event) {
     return { statusCode: 200 };
 }
 
+/**
+ * Compare two JSON values (e.g. a work order's steps list) the way their JSON.stringify output
+ * would compare, without serializing: walks both in step and stops at the first difference
+ * @param {*} a - Value from the old image
+ * @param {*} b - Value from the new image
+ * @returns {boolean} - True if the values serialize identically
+ */
+function jsonEqual(a, b) {
+    if (a === b) return true;
+    if (typeof a !== 'object' || typeof b !== 'object' || a === null || b === null) return false;
+    if (Array.isArray(a)) {
+        if (!Array.isArray(b) || a.length !== b.length) return false;
+        for (let i = 0; i < a.length; i++) {
+            if (!jsonEqual(a[i], b[i])) return false;
+        }
+        return true;
+    }
+    if (Array.isArray(b)) return false;
+    const aKeys = Object.keys(a);
+    const bKeys = Object.keys(b);
+    if (aKeys.length !== bKeys.length) return false;
+    for (let i = 0; i < aKeys.length; i++) {
+        // Key order matters, as it does for the serialized form
+        if (aKeys[i] !== bKeys[i] || !jsonEqual(a[aKeys[i]], b[aKeys[i]])) return false;
+    }
+    return true;
+}
+
 // Replace the shallow getDiff with a deep diff
 function getDeepDiff(oldObj, newObj) {
     if (!oldObj) return newObj;
@@ -373,21 +472,155 @@ function getDeepDiff(oldObj, newObj) {
             if (Object.keys(nestedDiff).length > 0) {
                 diff[key] = nestedDiff;
             }
-        } else if (JSON.stringify(newObj[key]) !== JSON.stringify(oldObj[key])) {
+        } else if (!jsonEqual(oldObj[key], newObj[key])) {
             diff[key] = newObj[key];
         }
     }
     return diff;
 }
 
+// API Gateway rejects PostToConnection payloads over 128 KB; stay under it with headroom
+const MAX_BATCH_PAYLOAD_BYTES = 120 * 1024;
+
+/**
+ * Split stream updates into serialized payloads of at most MAX_BATCH_PAYLOAD_BYTES.
+ * A lone update is sent as-is, so a single-record invocation produces the same message as before;
+ * several updates are wrapped as { type: 'batch', updates: [...] }.
+ * @param {Array<Object>} updates - The WebSocket messages to deliver, in stream order
+ * @returns {Array<string>} - Serialized payloads, in order
+ */
+function buildBatchPayloads(updates) {
+    const payloads = [];
+    let chunk = [];
+    let chunkBytes = 0;
+    const flush = () => {
+        if (chunk.length === 1) {
+            payloads.push(chunk[0]);
+        } else if (chunk.length > 1) {
+            payloads.push(`{"type":"batch","updates":[${chunk.join(',')}]}`);
+        }
+        chunk = [];
+        chunkBytes = 0;
+    };
+    for (const update of updates) {
+        const serialized = JSON.stringify(update);
+        const bytes = Buffer.byteLength(serialized) + 1;
+        if (chunk.length > 0 && chunkBytes + bytes > MAX_BATCH_PAYLOAD_BYTES) {
+            flush();
+        }
+        chunk.push(serialized);
+        chunkBytes += bytes;
+    }
+    flush();
+    return payloads;
+}
+
+// Most PostToConnection calls in flight at once during a broadcast
+const MAX_CONCURRENT_POSTS = 32;
+
+/**
+ * Run fn over items with at most `limit` calls pending at a time.
+ * @param {Array} items - Items to process
+ * @param {number} limit - Maximum number of concurrent calls
+ * @param {Function} fn - Async function applied to each item
+ * @returns {Promise<void>}
+ */
+async function forEachConcurrently(items, limit, fn) {
+    let next = 0;
+    const worker = async () => {
+        while (next < items.length) {
+            const item = items[next++];
+            await fn(item);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+}
+
+// DynamoDB BatchWriteItem accepts at most 25 requests per call
+const MAX_BATCH_WRITE_ITEMS = 25;
+
+/**
+ * Delete connection records in BatchWriteItem chunks, resubmitting any unprocessed deletes
+ * @param {string} connectionsTable - The connections table name
+ * @param {Array<string>} connectionIds - Connection IDs to delete
+ */
+async function deleteConnections(connectionsTable, connectionIds) {
+    for (let i = 0; i < connectionIds.length; i += MAX_BATCH_WRITE_ITEMS) {
+        let requestItems = {
+            [connectionsTable]: connectionIds.slice(i, i + MAX_BATCH_WRITE_ITEMS).map(connectionId => ({
+                DeleteRequest: { Key: { connectionId } }
+            }))
+        };
+        for (let attempt = 0; attempt < 3 && requestItems; attempt++) {
+            const response = await dynamodb.send(new BatchWriteCommand({ RequestItems: requestItems }));
+            const unprocessed = response.UnprocessedItems?.[connectionsTable];
+            requestItems = unprocessed && unprocessed.length > 0 ? { [connectionsTable]: unprocessed } : null;
+        }
+        if (requestItems) {
+            console.log(`Error removing ${requestItems[connectionsTable].length} gone connection(s) from ${connectionsTable}: unprocessed after retries`);
+        }
+    }
+}
+
+/**
+ * Send payloads, in order, to every connection of a table type. Each payload goes out to all
+ * connections concurrently (up to MAX_CONCURRENT_POSTS) and finishes before the next starts, so
+ * every connection still receives the payloads in order. Gone connections are skipped for the
+ * remaining payloads and removed from the connections table in batches once sending finishes.
+ * @param {string} tableType - 'work-orders' or 'students'
+ * @param {Array<string>} payloads - Serialized messages to send
+ */
+async function broadcastPayloads(tableType, payloads) {
+    const connectionIds = await getConnectionIds(tableType);
+    if (DEBUG_LOGGING) console.log(`[DEBUG] Sending ${payloads.length} message(s) to ${connectionIds.length} WebSocket connections for ${tableType}`);
+    const connectionsTable = tableType === 'students' ? STUDENT_CONNECTIONS_TABLE : WORK_ORDER_CONNECTIONS_TABLE;
+    const gone = new Set();
+
+    for (const payload of payloads) {
+        const data = Buffer.from(payload);
+        const targets = connectionIds.filter(connectionId => !gone.has(connectionId));
+        await forEachConcurrently(targets, MAX_CONCURRENT_POSTS, async (connectionId) => {
+            try {
+                await apigwmgmt.send(new PostToConnectionCommand({
+                    Data: data,
+                    ConnectionId: connectionId
+                }));
+                if (DEBUG_LOGGING) console.log(`[DEBUG] Successfully sent to connection ${connectionId}`);
+            } catch (error) {
+                // SDK v3 errors carry the exception type in name; they have no code
+                if (error.name === 'GoneException') {
+                    // Connection is gone, remove it from the appropriate table after the fan-out
+                    console.log(`Connection ${connectionId} is gone, removing from ${tableType} table`);
+                    gone.add(connectionId);
+                } else {
+                    console.log(`Error sending to WebSocket: ${error.message}`);
+                }
+            }
+        });
+    }
+    if (gone.size > 0) {
+        try {
+            await deleteConnections(connectionsTable, [...gone]);
+        } catch (error) {
+            console.log(`Error removing gone connections from ${tableType} table: ${error.message}`);
+        }
+        invalidateConnectionIds(tableType);
+    }
+}
+
 /**
- * Handle DynamoDB stream events
+ * Handle DynamoDB stream events. Updates from all records in the invocation are collected per
+ * table type and delivered to each connection as one batch message (or a few, if large).
  * @param {Object} event - Lambda event object
  * @returns {Promise<Object>} - Response object
  */
 async function handleDynamoDBStream(event) {
     try {
-        console.log(`[DEBUG] Processing DynamoDB stream event with ${event.Records?.length || 0} records`);
+        if (DEBUG_LOGGING) console.log(`[DEBUG] Processing DynamoDB stream event with ${event.Records?.length || 0} records`);
+
+        // Records for the same item are coalesced: the first OldImage (what clients last saw) and
+        // the latest NewImage, diffed once after the loop. Map order keeps first-seen item order.
+        const changesByTableType = { 'work-orders': new Map(), 'students': new Map() };
 
         for (const record of event.Records || []) {
             const eventSourceARN = record.eventSourceARN;
@@ -397,11 +630,11 @@ async function handleDynamoDBStream(event) {
             if (tableMatch && tableMatch[1]) {
                 tableName = tableMatch[1];
             }
-            console.log(`[DEBUG] Processing record: eventName=${record.eventName}, tableName=${tableName}`);
+            if (DEBUG_LOGGING) console.log(`[DEBUG] Processing record: eventName=${record.eventName}, tableName=${tableName}`);
 
             // Only process records with 'NewImage'
             if (!record.dynamodb.NewImage) {
-                console.log(`[DEBUG] Skipping record without NewImage`);
+                if (DEBUG_LOGGING) console.log(`[DEBUG] Skipping record without NewImage`);
                 continue;
             }
 
@@ -411,55 +644,52 @@ async function handleDynamoDBStream(event) {
                 tableType = 'work-orders';
                 itemId = record.dynamodb.Keys.id.S;
                 messageType = 'workOrderUpdate';
-                console.log(`[DEBUG] Processing work order: ${itemId}`);
+                if (DEBUG_LOGGING) console.log(`[DEBUG] Processing work order: ${itemId}`);
             } else if (tableName.includes('Students') || tableName.includes('foundations.participants')) {
                 tableType = 'students';
                 itemId = record.dynamodb.Keys.id.S;
                 messageType = 'studentUpdate';
-                console.log(`[DEBUG] Processing student: ${itemId}`);
+                if (DEBUG_LOGGING) console.log(`[DEBUG] Processing student: ${itemId}`);
             } else {
-                console.log(`[DEBUG] Unknown table: ${tableName}`);
+                if (DEBUG_LOGGING) console.log(`[DEBUG] Unknown table: ${tableName}`);
                 continue;
             }
 
-            // Create message for WebSocket, sending only the diff if possible
-            const diff = getDeepDiff(record.dynamodb.OldImage, record.dynamodb.NewImage);
-            const wsMessage = {
-                type: messageType,
-                id: itemId,
-                eventName: record.eventName,
-                newImage: diff
-            };
-
-            console.log(`[DEBUG] Sending WebSocket message: ${JSON.stringify(wsMessage)}`);
-
-            // Send to WebSocket connections for this specific table type
-            const connectionIds = await getConnectionIds(tableType);
-            console.log(`[DEBUG] Sending to ${connectionIds.length} WebSocket connections for ${tableType}`);
-
-            for (const connectionId of connectionIds) {
-                try {
-                    await apigwmgmt.send(new PostToConnectionCommand({
-                        Data: Buffer.from(JSON.stringify(wsMessage)),
-                        ConnectionId: connectionId
-                    }));
-                    console.log(`[DEBUG] Successfully sent to connection ${connectionId}`);
-                } catch (error) {
-                    if (error.code === 'GoneException') {
-                        // Connection is gone, remove it from the appropriate table
-                        console.log(`Connection ${connectionId} is gone, removing from ${tableType} table`);
-                        const connectionsTable = tableType === 'students' ? STUDENT_CONNECTIONS_TABLE : WORK_ORDER_CONNECTIONS_TABLE;
-                        await dynamodb.send(new DeleteCommand({
-                            TableName: connectionsTable,
-                            Key: { connectionId: connectionId }
-                        }));
-                    } else {
-                        console.log(`Error sending to WebSocket: ${error.message}`);
-                    }
+            const changes = changesByTableType[tableType];
+            const existing = changes.get(itemId);
+            if (existing) {
+                existing.newImage = record.dynamodb.NewImage;
+                // An item inserted in this batch stays an INSERT: its diff is the full image
+                if (existing.eventName !== 'INSERT') {
+                    existing.eventName = record.eventName;
                 }
+            } else {
+                changes.set(itemId, {
+                    messageType,
+                    eventName: record.eventName,
+                    oldImage: record.dynamodb.OldImage,
+                    newImage: record.dynamodb.NewImage
+                });
             }
         }
 
+        // Create messages for WebSocket, sending only the diff if possible
+        const updatesByTableType = {};
+        for (const [tableType, changes] of Object.entries(changesByTableType)) {
+            updatesByTableType[tableType] = Array.from(changes, ([itemId, change]) => ({
+                type: change.messageType,
+                id: itemId,
+                eventName: change.eventName,
+                newImage: getDeepDiff(change.oldImage, change.newImage)
+            }));
+        }
+
+        // Send to WebSocket connections for each table type that had updates; the two
+        // connection tables are independent, so their fan-outs run concurrently
+        await Promise.all(Object.entries(updatesByTableType)
+            .filter(([, updates]) => updates.length > 0)
+            .map(([tableType, updates]) => broadcastPayloads(tableType, buildBatchPayloads(updates))));
+
         return {
             statusCode: 200,
             body: JSON.stringify('Success')
@@ -472,4 +702,4 @@ async function handleDynamoDBStream(event) {
             body: JSON.stringify('Error processing event')
         };
     }
-} 
\ No newline at end of file
+}
@@ -0,0 +1,108 @@
+const { test } = require('node:test');
+const assert = require('node:assert');
+const Module = require('module');
+
+// Stand-in AWS SDK and jsonwebtoken modules, so the handler runs without AWS or installed packages.
+// Every command records the client calls made with it in `sent`.
+const sent = [];
+const goneConnections = new Set(['gone-1']);
+const connections = ['gone-1', 'live-1'];
+
+function command(name) {
+    return class {
+        constructor(input) {
+            this.name = name;
+            this.input = input;
+        }
+    };
+}
+
+const fakeModules = {
+    '@aws-sdk/client-dynamodb': { DynamoDBClient: class {} },
+    '@aws-sdk/lib-dynamodb': {
+        DynamoDBDocumentClient: {
+            from: () => ({
+                send: async (cmd) => {
+                    sent.push(cmd);
+                    if (cmd.name === 'ScanCommand') {
+                        return { Items: cmd.input.Segment === 0 ? connections.map(connectionId => ({ connectionId })) : [] };
+                    }
+                    return {};
+                }
+            })
+        },
+        PutCommand: command('PutCommand'),
+        DeleteCommand: command('DeleteCommand'),
+        GetCommand: command('GetCommand'),
+        ScanCommand: command('ScanCommand'),
+        BatchWriteCommand: command('BatchWriteCommand')
+    },
+    '@aws-sdk/client-sqs': { SQSClient: class {} },
+    '@aws-sdk/client-apigatewaymanagementapi': {
+        ApiGatewayManagementApiClient: class {
+            async send(cmd) {
+                sent.push(cmd);
+                if (goneConnections.has(cmd.input.ConnectionId)) {
+                    // Shaped like an SDK v3 service exception: the type is in name, there is no code
+                    const error = new Error('Gone');
+                    error.name = 'GoneException';
+                    throw error;
+                }
+                return {};
+            }
+        },
+        PostToConnectionCommand: command('PostToConnectionCommand')
+    },
+    'jsonwebtoken': {}
+};
+
+const originalLoad = Module._load;
+Module._load = function (request, ...args) {
+    return fakeModules[request] || originalLoad.call(this, request, ...args);
+};
+
+process.env.WEBSOCKET_API_URL = 'wss://example.execute-api.us-east-1.amazonaws.com/prod';
+process.env.WORK_ORDER_CONNECTIONS_TABLE = 'WorkOrderConnections';
+process.env.STUDENT_CONNECTIONS_TABLE = 'StudentConnections';
+const { handler } = require('./index');
+
+function streamEvent(id) {
+    return {
+        Records: [{
+            eventName: 'MODIFY',
+            eventSourceARN: 'arn:aws:dynamodb:us-east-1:123456789012:table/WorkOrders/stream/2025-01-01T00:00:00.000',
+            dynamodb: {
+                Keys: { id: { S: id } },
+                OldImage: { id: { S: id }, status: { S: 'pending' } },
+                NewImage: { id: { S: id }, status: { S: 'running' } }
+            }
+        }]
+    };
+}
+
+function sentOf(name) {
+    return sent.filter(cmd => cmd.name === name);
+}
+
+test('gone connections are removed with one BatchWriteCommand', async () => {
+    sent.length = 0;
+    const response = await handler(streamEvent('wo-1'));
+    assert.strictEqual(response.statusCode, 200);
+
+    assert.deepStrictEqual(sentOf('PostToConnectionCommand').map(cmd => cmd.input.ConnectionId).sort(), ['gone-1', 'live-1']);
+    const batchWrites = sentOf('BatchWriteCommand');
+    assert.strictEqual(batchWrites.length, 1);
+    assert.deepStrictEqual(batchWrites[0].input.RequestItems, {
+        WorkOrderConnections: [{ DeleteRequest: { Key: { connectionId: 'gone-1' } } }]
+    });
+});
+
+test('connection IDs are read again after gone connections are removed', async () => {
+    connections.splice(connections.indexOf('gone-1'), 1);
+    sent.length = 0;
+    await handler(streamEvent('wo-2'));
+
+    assert.ok(sentOf('ScanCommand').length > 0, 'cached connection IDs should have been invalidated');
+    assert.deepStrictEqual(sentOf('PostToConnectionCommand').map(cmd => cmd.input.ConnectionId), ['live-1']);
+    assert.strictEqual(sentOf('BatchWriteCommand').length, 0);
+});
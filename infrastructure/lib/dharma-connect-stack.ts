@@ -32,6 +32,22 @@ export class DharmaConnectStack extends cdk.Stack {
             stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
         });
 
+        // Lets the email agent find Sleeping work orders with a Query instead of a Scan
+        workOrdersTable.addGlobalSecondaryIndex({
+            indexName: 'state-index',
+            partitionKey: { name: 'state', type: dynamodb.AttributeType.STRING },
+            projectionType: dynamodb.ProjectionType.KEYS_ONLY,
+        });
+
+        // One item per email sent, keyed by account, so the email agent can count an
+        // account's last 24 hours of sends with a Query. Items expire via TTL.
+        const sendLogTable = new dynamodb.Table(this, 'SendLogTable', {
+            partitionKey: { name: 'account', type: dynamodb.AttributeType.STRING },
+            sortKey: { name: 'sendKey', type: dynamodb.AttributeType.STRING },
+            billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+            timeToLiveAttribute: 'expiresAt',
+        });
+
         // Import existing students table (foundations.participants)
         const studentsTable = dynamodb.Table.fromTableName(this, 'StudentsTable', 'foundations.participants');
 
@@ -132,6 +148,10 @@ export class DharmaConnectStack extends cdk.Stack {
             value: workOrdersTable.tableName,
         });
 
+        new cdk.CfnOutput(this, 'SendLogTableName', {
+            value: sendLogTable.tableName,
+        });
+
         new cdk.CfnOutput(this, 'WorkOrderQueueUrl', {
             value: workOrderQueue.queueUrl,
         });
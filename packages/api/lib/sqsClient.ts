@@ -125,6 +125,11 @@ export async function sendWorkOrderMessage(
     const command = new SendMessageCommand({
         QueueUrl: queueUrl,
         MessageBody: messageBody,
+        // Mirrored as attributes so the agent can filter without parsing the body
+        MessageAttributes: {
+            workOrderId: { DataType: 'String', StringValue: workOrderId },
+            action: { DataType: 'String', StringValue: action }
+        },
         MessageGroupId: workOrderId, // Required for FIFO queues
         MessageDeduplicationId: `${workOrderId}_${stepName}_${action}_${startTime}` // Required for FIFO queues
     });
@@ -6,6 +6,7 @@
  */
 
 import React, { createContext, useContext, useRef, useState, useCallback, useEffect, ReactNode } from 'react';
+import { flushSync } from 'react-dom';
 import { useRouter } from 'next/router';
 import { getWebSocketConnection } from './apiActions';
 
@@ -146,6 +147,12 @@ export function WebSocketProvider({ children, resource = 'work-orders' }: WebSoc
                 // If this is a connection ID response, store it
                 if (data.type === 'connectionId') {
                     setConnectionId(data.connectionId);
+                } else if (data.type === 'batch' && Array.isArray(data.updates)) {
+                    // The stream Lambda batches every update from one invocation into a single frame.
+                    // Deliver them one at a time; flushSync commits each so no lastMessage is coalesced away.
+                    for (const update of data.updates) {
+                        flushSync(() => setLastMessage(update));
+                    }
                 } else {
                     // Store the last message for components to access
                     setLastMessage(data);